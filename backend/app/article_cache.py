@@ -0,0 +1,138 @@
+"""``/generate_article`` 的文章缓存。
+
+缓存键由去重排序后的单词 ID 与提示词版本组成，修改提示词时提升
+:data:`PROMPT_VERSION` 即可让旧文章自然失效。每个键最多保存
+``ARTICLE_CACHE_VARIANTS`` 篇文章，重复请求按最久未用的顺序轮换返回；
+版本数不足时在后台再生成一篇补齐。条目存放在 :class:`ArticleCache` 表中，
+总数超过 ``ARTICLE_CACHE_MAX_ENTRIES`` 时按最近使用时间淘汰。
+"""
+
+import hashlib
+import logging
+import os
+from datetime import datetime
+from sqlalchemy import delete, func, update
+from sqlmodel import select
+from .models import ArticleCache
+from .database import get_async_session
+from .llm_client import LLMError
+from . import crud_async
+
+ARTICLE_CACHE_VARIANTS = int(os.environ.get("ARTICLE_CACHE_VARIANTS", "3"))
+ARTICLE_CACHE_MAX_ENTRIES = int(os.environ.get("ARTICLE_CACHE_MAX_ENTRIES", "5000"))
+# 为 1 时在收藏变化后为该用户的全部收藏预先生成文章
+ARTICLE_CACHE_WARM = os.environ.get("ARTICLE_CACHE_WARM", "0") == "1"
+# 单篇文章最多使用的单词数
+MAX_ARTICLE_WORDS = 30
+
+PROMPT_VERSION = 1
+SYSTEM_PROMPT = (
+    "You are a helpful writing assistant. "
+    "When the user provides a list of words, compose a ~100-word passage "
+    "that naturally uses ALL the words. Do NOT add extra words to the list."
+)
+
+logger = logging.getLogger("uvicorn.error")
+# 正在后台生成的键，避免同一个键同时补齐多次
+_filling: set[str] = set()
+# 缓存条目数的运行计数，首次写入时统计一次，之后随插入和淘汰增减
+_entries: int | None = None
+
+
+def user_prompt(words) -> str:
+    """构造包含全部单词的用户提示词。"""
+    return "Please write a 100-word passage using the following words:\n" + ", ".join(
+        words
+    )
+
+
+def cache_key(word_ids) -> str:
+    """返回单词集合与提示词版本对应的缓存键。"""
+    ids = ",".join(str(i) for i in sorted(set(word_ids)))
+    return hashlib.sha1(f"v{PROMPT_VERSION}:{ids}".encode()).hexdigest()
+
+
+async def get(key: str):
+    """返回 ``(article, variants)``，取最久未用的一篇并刷新其使用时间。
+
+    未命中时返回 ``(None, 0)``。
+    """
+    async with get_async_session() as session:
+        rows = (
+            await session.exec(
+                select(ArticleCache.id, ArticleCache.article)
+                .where(ArticleCache.key == key)
+                .order_by(ArticleCache.last_used_at, ArticleCache.id)
+            )
+        ).all()
+        if not rows:
+            return None, 0
+        entry_id, article = rows[0]
+        await session.exec(
+            update(ArticleCache)
+            .where(ArticleCache.id == entry_id)
+            .values(last_used_at=datetime.utcnow())
+        )
+        await session.commit()
+    return article, len(rows)
+
+
+async def put(key: str, article: str):
+    """保存一篇新文章，超过总条目上限时淘汰最久未用的条目。"""
+    global _entries
+    async with get_async_session() as session:
+        session.add(ArticleCache(key=key, article=article))
+        await session.commit()
+        if _entries is None:
+            _entries = (await session.exec(select(func.count(ArticleCache.id)))).one()
+        else:
+            _entries += 1
+        excess = _entries - ARTICLE_CACHE_MAX_ENTRIES
+        if excess > 0:
+            oldest = (
+                select(ArticleCache.id)
+                .order_by(ArticleCache.last_used_at, ArticleCache.id)
+                .limit(excess)
+            )
+            result = await session.exec(
+                delete(ArticleCache).where(ArticleCache.id.in_(oldest))
+            )
+            await session.commit()
+            # 删除的行数少于预期说明计数偏高（如其他进程已淘汰），下次重新统计
+            _entries = _entries - result.rowcount if result.rowcount == excess else None
+
+
+async def fill(key: str, words, complete):
+    """在后台为 *key* 生成并保存一篇新文章；失败时只记录日志。"""
+    if key in _filling:
+        return
+    _filling.add(key)
+    try:
+        article = await complete(
+            SYSTEM_PROMPT, user_prompt(words), max_tokens=256, temperature=0.7
+        )
+        await put(key, article)
+    except LLMError as exc:
+        logger.warning("article cache fill failed: %s", exc.detail)
+    except Exception:
+        # 后台任务中的异常不会被 Starlette 记录到本模块的日志中
+        logger.exception("article cache fill failed")
+    finally:
+        _filling.discard(key)
+
+
+async def warm_user(user_id: int, complete):
+    """为用户当前的全部收藏预先生成文章，直到该键的版本数达到上限。"""
+    favorites = await crud_async.list_favorites(user_id)
+    words = sorted((w for w, *_ in favorites), key=lambda w: w.id)
+    if not words or len(words) > MAX_ARTICLE_WORDS:
+        return
+    key = cache_key(w.id for w in words)
+    async with get_async_session() as session:
+        variants = (
+            await session.exec(
+                select(func.count(ArticleCache.id)).where(ArticleCache.key == key)
+            )
+        ).one()
+    if variants < ARTICLE_CACHE_VARIANTS:
+        await fill(key, [w.word for w in words], complete)
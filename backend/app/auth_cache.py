@@ -0,0 +1,75 @@
+"""已验证令牌到用户身份的进程内 LRU/TTL 缓存。
+
+``get_current_user`` 命中缓存时既不解码 JWT 也不访问数据库。条目在 TTL
+到期或令牌本身过期时失效，修改用户名、密码、角色或删除用户时需调用
+:func:`invalidate_user` 立即清除该用户的所有条目。
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from .schemas import UserOut
+
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", "60"))
+
+_lock = threading.Lock()
+# token -> (过期时间戳, 用户身份)，按最近使用排序
+_entries: "OrderedDict[str, tuple[float, UserOut]]" = OrderedDict()
+# user_id -> 该用户已缓存的令牌，便于按用户失效
+_tokens_by_user: dict[int, set[str]] = {}
+
+
+def _drop(token: str):
+    """移除单个条目，调用方需持有锁。"""
+    entry = _entries.pop(token, None)
+    if entry is None:
+        return
+    tokens = _tokens_by_user.get(entry[1].id)
+    if tokens is not None:
+        tokens.discard(token)
+        if not tokens:
+            del _tokens_by_user[entry[1].id]
+
+
+def get(token: str) -> UserOut | None:
+    """返回缓存的用户身份，未命中或已过期时返回 ``None``。"""
+    with _lock:
+        entry = _entries.get(token)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            _drop(token)
+            return None
+        _entries.move_to_end(token)
+        return entry[1]
+
+
+def put(token: str, user: UserOut, token_exp: float | None = None):
+    """缓存 *token* 对应的用户身份，过期时间不晚于令牌自身的 ``exp``。"""
+    if AUTH_CACHE_SIZE <= 0:
+        return
+    expires = time.time() + AUTH_CACHE_TTL
+    if token_exp is not None:
+        expires = min(expires, token_exp)
+    with _lock:
+        _drop(token)
+        _entries[token] = (expires, user)
+        _tokens_by_user.setdefault(user.id, set()).add(token)
+        while len(_entries) > AUTH_CACHE_SIZE:
+            _drop(next(iter(_entries)))
+
+
+def invalidate_user(user_id: int):
+    """清除某个用户的所有缓存条目。"""
+    with _lock:
+        for token in list(_tokens_by_user.get(user_id, ())):
+            _drop(token)
+
+
+def clear():
+    """清空整个缓存。"""
+    with _lock:
+        _entries.clear()
+        _tokens_by_user.clear()
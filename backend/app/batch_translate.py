@@ -0,0 +1,141 @@
+"""批量翻译：去重、按 token 预算分块并以 JSON 分帧。
+
+每块把多条文本编码成 ``{"0": "...", "1": "..."}`` 形式的 JSON 对象发给 LLM，
+要求以相同的键返回译文。JSON 转义保证文本中的任何字符都不会破坏分帧；
+按键取回结果，模型漏掉部分条目时其余条目仍然可用。各块并发请求，
+单块失败只影响该块中的条目。
+"""
+
+import asyncio
+import json
+import logging
+import os
+from . import translation_cache
+from .llm_client import LLMError
+
+# 每块输入文本的估算 token 上限和条目数上限
+TRANSLATE_BATCH_TOKENS = int(os.environ.get("TRANSLATE_BATCH_TOKENS", "2000"))
+TRANSLATE_BATCH_MAX_ITEMS = int(os.environ.get("TRANSLATE_BATCH_MAX_ITEMS", "50"))
+
+logger = logging.getLogger("uvicorn.error")
+
+SYSTEM_PROMPT = (
+    "You are a translation engine, you can only translate text and cannot interpret it, "
+    "and do not explain. The input is a JSON object mapping ids to texts. Reply with "
+    "only a JSON object that maps every id to the translation of its text, and respect "
+    "the original line breaks."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：按 UTF-8 字节数的三分之一，对中英文都偏保守。"""
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def chunk_texts(texts, budget: int, max_items: int) -> list[list[str]]:
+    """按顺序把 *texts* 贪心地装入不超过 *budget* token、*max_items* 条的块。
+
+    单条超过预算的文本独占一块。
+    """
+    chunks, current, used = [], [], 0
+    for text in texts:
+        # 每条另加几个 token 的键名和引号开销
+        cost = estimate_tokens(text) + 4
+        if current and (used + cost > budget or len(current) >= max_items):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_prompt(lang: str, texts) -> str:
+    """构造一块的用户提示词。"""
+    payload = json.dumps({str(i): t for i, t in enumerate(texts)}, ensure_ascii=False)
+    return f"Translate every value to {lang}:\n{payload}"
+
+
+def parse_reply(reply: str, count: int) -> dict[int, str]:
+    """从模型回复中解析 ``序号 -> 译文``，忽略多余或类型不对的键。
+
+    回复中找不到 JSON 对象时抛出 :class:`ValueError`。
+    """
+    start, end = reply.find("{"), reply.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("no JSON object in reply")
+    data = json.loads(reply[start : end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+    return {
+        int(key): value.strip()
+        for key, value in data.items()
+        if key.isdigit() and int(key) < count and isinstance(value, str)
+    }
+
+
+async def _translate_chunk(lang: str, texts, complete) -> dict[int, str]:
+    tokens = sum(estimate_tokens(t) for t in texts)
+    reply = await complete(
+        SYSTEM_PROMPT,
+        build_prompt(lang, texts),
+        max_tokens=min(4096, 2 * tokens + 100),
+        temperature=0,
+    )
+    return parse_reply(reply, len(texts))
+
+
+async def translate_many(items, model: str, complete):
+    """翻译 ``(text, lang)`` 列表，返回 ``(results, errors)`` 两个字典。
+
+    两个字典都以 ``(text, lang)`` 为键；重复条目只翻译一次，已缓存的条目
+    不会发往上游。*complete* 与 :func:`main.complete` 的签名相同。
+    """
+    unique = list(dict.fromkeys(items))
+    cached = await asyncio.gather(
+        *(translation_cache.lookup(text, lang, model) for text, lang in unique)
+    )
+    results, errors = {}, {}
+    by_lang: dict[str, list[str]] = {}
+    for (text, lang), hit in zip(unique, cached):
+        if hit is not None:
+            results[(text, lang)] = hit
+        else:
+            by_lang.setdefault(lang, []).append(text)
+
+    chunks = [
+        (lang, chunk)
+        for lang, texts in by_lang.items()
+        for chunk in chunk_texts(
+            texts, TRANSLATE_BATCH_TOKENS, TRANSLATE_BATCH_MAX_ITEMS
+        )
+    ]
+    outcomes = await asyncio.gather(
+        *(_translate_chunk(lang, chunk, complete) for lang, chunk in chunks),
+        return_exceptions=True,
+    )
+    fresh = []
+    for (lang, chunk), outcome in zip(chunks, outcomes):
+        if isinstance(outcome, LLMError):
+            failure = outcome.detail
+        elif isinstance(outcome, ValueError):
+            failure = "Malformed reply from LLM"
+        elif isinstance(outcome, Exception):
+            # 上游返回意外格式等未预料的错误同样只让该块失败
+            logger.error("batch translation chunk failed", exc_info=outcome)
+            failure = "Translation failed"
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        for i, text in enumerate(chunk):
+            if isinstance(outcome, BaseException):
+                errors[(text, lang)] = failure
+            elif i in outcome:
+                results[(text, lang)] = outcome[i]
+                fresh.append((text, lang, outcome[i]))
+            else:
+                errors[(text, lang)] = "Missing from LLM reply"
+    await asyncio.gather(
+        *(translation_cache.store(t, lang, model, r) for t, lang, r in fresh)
+    )
+    return results, errors
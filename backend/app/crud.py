@@ -1,151 +1,522 @@
 """FastAPI 路由使用的数据库辅助函数。
 
 该模块封装创建用户、记录复习历史和维护收藏等常见 CRUD 操作，
-逻辑与框架无关，便于独立于 API 层进行测试。
+逻辑与框架无关，便于独立于 API 层进行测试。面向请求的函数都接受可选的
+``session`` 参数，传入时在调用方的会话上执行，否则各自使用新的会话。
 """
 
-from sqlmodel import select
+from sqlmodel import Session, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy import func, exists, case, delete, literal, tuple_
+from collections import Counter
 from datetime import datetime, timedelta, date
+import base64
+import hashlib
 import json
 import os
-from .models import User, Word, ReviewLog, DeletionRequest, Favorite
-from .database import get_session
-from .security import get_password_hash, verify_password
+from .models import (
+    User,
+    Word,
+    WordbookFile,
+    ReviewLog,
+    DeletionRequest,
+    Favorite,
+    DailyReviewStat,
+)
+from .database import get_session, session_scope
+from .security import get_password_hash, verify_and_update
+from . import (
+    database,
+    fulltext,
+    search_index,
+    fuzzy_index,
+    word_cache,
+    auth_cache,
+    user_journal,
+    scheduler,
+    jsonstream,
+)
 
 
 def create_user(username: str, password: str, role: str = "user"):
     """创建新用户并保存到数据库和 JSON 文件。"""
+    return add_user(username, get_password_hash(password), role)
+
+
+def add_user(username: str, hashed_password: str, role: str = "user"):
+    """使用已计算好的密码哈希创建用户，用户名已存在时返回 ``None``。
+
+    基本用户信息同时追加到 users.json 的日志中，便于简单持久化。
+    """
     with get_session() as session:
-        user = User(
-            username=username, hashed_password=get_password_hash(password), role=role
-        )
+        user = User(username=username, hashed_password=hashed_password, role=role)
         session.add(user)
         try:
             session.commit()
             session.refresh(user)
-
-            # 同时将基本用户信息写入 users.json 便于简单持久化
-            try:
-                with open("users.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except FileNotFoundError:
-                data = []
-            data.append({"id": user.id, "username": user.username, "role": user.role})
-            with open("users.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
+            user_journal.journal.record_create(user.id, user.username, user.role)
             return user
         except IntegrityError:
             session.rollback()
             return None
 
 
+def get_user(user_id: int, session: Session | None = None):
+    """按 ID 查找用户，不存在时返回 ``None``。"""
+    with session_scope(session) as session:
+        return session.get(User, user_id)
+
+
+def get_user_by_username(username: str, session: Session | None = None):
+    """按用户名查找用户，不存在时返回 ``None``。"""
+    with session_scope(session) as session:
+        return session.exec(select(User).where(User.username == username)).first()
+
+
 def authenticate_user(username: str, password: str):
-    """凭据正确时返回用户对象，否则返回 ``None``。"""
-    with get_session() as session:
-        statement = select(User).where(User.username == username)
-        user = session.exec(statement).first()
-        if user and verify_password(password, user.hashed_password):
-            return user
+    """凭据正确时返回用户对象，否则返回 ``None``。
+
+    若存储的哈希成本与当前配置不同，验证成功后会顺带重新哈希。
+    """
+    user = get_user_by_username(username)
+    if not user:
+        return None
+    ok, new_hash = verify_and_update(password, user.hashed_password)
+    if not ok:
         return None
+    if new_hash:
+        set_password_hash(user.id, new_hash)
+    return user
+
+
+def get_due_words(
+    user_id: int, limit: int | None = None, session: Session | None = None
+):
+    """获取需要复习的单词，若提供 *limit* 则只返回相应数量。
+
+    先取到期的复习记录（按 ``next_review`` 升序），再用反连接补充从未复习过的
+    新词。过滤、排序和 ``LIMIT`` 都在数据库中完成，开销与返回的单词数成正比。
+    """
+    if limit is not None and limit <= 0:
+        return []
+    with session_scope(session) as session:
+        words = list(session.exec(due_reviews_query(user_id, limit)).all())
+        if limit is not None and len(words) >= limit:
+            return words
+        rest = None if limit is None else limit - len(words)
+        words += session.exec(new_words_query(user_id, rest)).all()
+        return words
 
 
-def get_due_words(user_id: int, limit: int | None = None):
-    """获取需要复习的单词，若提供 *limit* 则只返回相应数量。"""
-    today = date.today()
-    with get_session() as session:
-        statement = select(Word, ReviewLog).join(
-            ReviewLog,
-            (Word.id == ReviewLog.word_id) & (ReviewLog.user_id == user_id),
-            isouter=True,
-        )
-        words = []
-        for word, review in session.exec(statement).all():
-            if not review or review.next_review <= today:
-                words.append(word)
-        if limit is not None:
-            words = words[:limit]
-        return words
+def due_reviews_query(user_id: int, limit: int | None = None):
+    """到期复习单词的查询，走 (user_id, next_review) 索引的范围扫描。"""
+    statement = (
+        select(Word)
+        .join(ReviewLog, ReviewLog.word_id == Word.id)
+        .where(ReviewLog.user_id == user_id, ReviewLog.next_review <= date.today())
+        .order_by(ReviewLog.next_review, ReviewLog.word_id)
+    )
+    return statement if limit is None else statement.limit(limit)
+
+
+def new_words_query(user_id: int, limit: int | None = None):
+    """从未复习过的新词的查询，通过反连接按 (user_id, word_id) 探测。"""
+    seen = exists().where(ReviewLog.user_id == user_id, ReviewLog.word_id == Word.id)
+    statement = select(Word).where(~seen).order_by(Word.id)
+    return statement if limit is None else statement.limit(limit)
+
+
+# 从未复习过的卡片的 SM-2 初始状态 (repetitions, ease_factor, interval)
+_NEW_CARD = (0, scheduler.DEFAULT_PARAMS.initial_ease, 0)
+
+
+def _insert(session, model):
+    """返回与当前数据库方言匹配、支持 ON CONFLICT 的 INSERT 语句。"""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model.__table__)
 
 
-def record_review(user_id: int, word_id: int, quality: int):
-    """更新单词复习的间隔重复记录。"""
+def daily_stats_upsert(session, user_id: int, events):
+    """构造把 ``(day, quality)`` 事件累加到每日汇总表的 upsert 及其参数。"""
+    stmt = _insert(session, DailyReviewStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "quality"],
+        set_={"count": DailyReviewStat.__table__.c.count + stmt.excluded.count},
+    )
+    params = [
+        {"user_id": user_id, "day": day, "quality": quality, "count": n}
+        for (day, quality), n in Counter(events).items()
+    ]
+    return stmt, params
+
+
+def _bump_daily_stats(session, user_id: int, events):
+    """在调用方的事务中把 ``(day, quality)`` 事件累加到每日汇总表。"""
+    stmt, params = daily_stats_upsert(session, user_id, events)
+    if params:
+        session.exec(stmt, params=params)
+
+
+def backfill_daily_stats():
+    """汇总表为空时，用已有复习记录的最近一次复习时间回填。"""
     with get_session() as session:
-        log = session.exec(
-            select(ReviewLog).where(
-                ReviewLog.user_id == user_id, ReviewLog.word_id == word_id
+        if session.exec(select(DailyReviewStat.id).limit(1)).first() is not None:
+            return
+        day = func.date(ReviewLog.reviewed_at)
+        rows = session.exec(
+            select(ReviewLog.user_id, day, ReviewLog.quality, func.count()).group_by(
+                ReviewLog.user_id, day, ReviewLog.quality
             )
-        ).first()
-        interval = 1
-        if log:
-            interval = log.last_interval
-        # 简单的间隔重复：quality>=3 时间隔翻倍，否则重置
-        if quality >= 3:
-            interval = interval * 2
-        else:
-            interval = 1
-        next_review = date.today() + timedelta(days=interval)
-        if log:
-            log.quality = quality
-            log.last_interval = interval
-            log.next_review = next_review
-            log.reviewed_at = datetime.utcnow()
-        else:
-            log = ReviewLog(
-                user_id=user_id,
-                word_id=word_id,
-                quality=quality,
-                last_interval=interval,
-                next_review=next_review,
+        ).all()
+        for user_id, d, quality, n in rows:
+            session.add(
+                DailyReviewStat(
+                    user_id=user_id,
+                    day=date.fromisoformat(d) if isinstance(d, str) else d,
+                    quality=quality,
+                    count=n,
+                )
             )
-            session.add(log)
+        session.commit()
+
+
+def count_reviews_on(user_id: int, day: date, session: Session | None = None) -> int:
+    """返回用户某天（UTC）复习过的不同单词数，供每日学习上限使用。"""
+    with session_scope(session) as session:
+        return session.exec(reviews_on_query(user_id, day)).one()
+
+
+def reviews_on_query(user_id: int, day: date):
+    """用户某天复习过的不同单词数的查询。
+
+    每个用户/单词只有一条复习记录，同一天重复复习同一张卡片只占一个名额；
+    因此这里统计复习记录而不是每日汇总表中的复习次数。
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return select(func.count()).where(
+        ReviewLog.user_id == user_id,
+        ReviewLog.reviewed_at >= start,
+        ReviewLog.reviewed_at < start + timedelta(days=1),
+    )
+
+
+def daily_review_stats(
+    user_id: int, start: date, end: date, session: Session | None = None
+):
+    """返回 ``[start, end]`` 内每天按评分划分的复习次数，按日期升序。"""
+    with session_scope(session) as session:
+        rows = session.exec(
+            select(DailyReviewStat.day, DailyReviewStat.quality, DailyReviewStat.count)
+            .where(
+                DailyReviewStat.user_id == user_id,
+                DailyReviewStat.day >= start,
+                DailyReviewStat.day <= end,
+            )
+            .order_by(DailyReviewStat.day, DailyReviewStat.quality)
+        ).all()
+    days: dict[date, dict[int, int]] = {}
+    for day, quality, n in rows:
+        days.setdefault(day, {})[quality] = n
+    return [
+        {"day": day, "total": sum(counts.values()), "by_quality": counts}
+        for day, counts in days.items()
+    ]
+
+
+def record_reviews(user_id: int, reviews, session: Session | None = None):
+    """在单个事务中批量记录复习结果，按 SM-2 计算调度。
+
+    *reviews* 为 ``(word_id, quality, reviewed_at)`` 序列，``reviewed_at`` 可为
+    ``None`` 表示当前时间。同一单词出现多次时按复习时间先后依次计算。先一次性
+    读出相关单词已有的间隔，再以 ``(user_id, word_id)`` 为冲突目标执行一条
+    upsert，返回每个单词最终的调度结果。
+    """
+    now = datetime.utcnow()
+    items = sorted(
+        (
+            (word_id, quality, reviewed_at or now)
+            for word_id, quality, reviewed_at in reviews
+        ),
+        key=lambda r: r[2],
+    )
+    if not items:
+        return []
+    with session_scope(session) as session:
+        word_ids = {word_id for word_id, _, _ in items}
+        states = {
+            word_id: scheduler.resume_state(quality, reps, ease, interval)
+            for word_id, quality, reps, ease, interval in session.exec(
+                select(
+                    ReviewLog.word_id,
+                    ReviewLog.quality,
+                    ReviewLog.repetitions,
+                    ReviewLog.ease_factor,
+                    ReviewLog.last_interval,
+                ).where(ReviewLog.user_id == user_id, ReviewLog.word_id.in_(word_ids))
+            ).all()
+        }
+        rows: dict[int, dict] = {}
+        for word_id, quality, reviewed_at in items:
+            reps, ease, interval = scheduler.sm2_step(
+                quality, *states.get(word_id, _NEW_CARD)
+            )
+            states[word_id] = (reps, ease, interval)
+            rows[word_id] = {
+                "user_id": user_id,
+                "word_id": word_id,
+                "quality": quality,
+                "repetitions": reps,
+                "ease_factor": ease,
+                "last_interval": interval,
+                "next_review": reviewed_at.date() + timedelta(days=interval),
+                "reviewed_at": reviewed_at,
+            }
+        stmt = _insert(session, ReviewLog)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "word_id"],
+            set_={
+                c: stmt.excluded[c]
+                for c in (
+                    "quality",
+                    "repetitions",
+                    "ease_factor",
+                    "last_interval",
+                    "next_review",
+                    "reviewed_at",
+                )
+            },
+        )
+        session.exec(stmt, params=list(rows.values()))
+        _bump_daily_stats(
+            session, user_id, [(ts.date(), quality) for _, quality, ts in items]
+        )
+        session.commit()
+        return list(rows.values())
+
+
+def record_review(
+    user_id: int, word_id: int, quality: int, session: Session | None = None
+):
+    """按 SM-2 更新单词复习的间隔重复记录。"""
+    with session_scope(session) as session:
+        log = session.exec(review_log_query(user_id, word_id)).first()
+        now = datetime.utcnow()
+        log = apply_review(log, user_id, word_id, quality, now)
+        session.add(log)
+        _bump_daily_stats(session, user_id, [(now.date(), quality)])
         session.commit()
         session.refresh(log)
         return log
 
 
-def search_words(query: str):
-    """不区分大小写搜索单词，优先返回以查询开头的结果。"""
+def review_log_query(user_id: int, word_id: int):
+    """某个用户/单词对的复习记录查询。"""
+    return select(ReviewLog).where(
+        ReviewLog.user_id == user_id, ReviewLog.word_id == word_id
+    )
+
+
+def apply_review(
+    log: ReviewLog | None, user_id: int, word_id: int, quality: int, now: datetime
+) -> ReviewLog:
+    """按 SM-2 把一次复习应用到已有记录上，没有记录时创建新记录。"""
+    state = _NEW_CARD
+    if log is not None:
+        state = scheduler.resume_state(
+            log.quality, log.repetitions, log.ease_factor, log.last_interval
+        )
+    reps, ease, interval = scheduler.sm2_step(quality, *state)
+    if log is None:
+        log = ReviewLog(user_id=user_id, word_id=word_id, quality=quality)
+    log.quality = quality
+    log.repetitions = reps
+    log.ease_factor = ease
+    log.last_interval = interval
+    log.next_review = date.today() + timedelta(days=interval)
+    log.reviewed_at = now
+    return log
+
+
+# 单词总数只在同步词书时变化，缓存起来避免每次统计都扫描 Word 表
+_word_count: int | None = None
+
+
+def count_words(session: Session | None = None) -> int:
+    """返回词库中的单词总数。"""
+    global _word_count
+    if _word_count is None:
+        with session_scope(session) as session:
+            _word_count = session.exec(word_count_query()).one()
+    return _word_count
+
+
+def word_count_query():
+    """单词总数的查询。"""
+    return select(func.count()).select_from(Word)
+
+
+def review_overview(
+    user_id: int, limit: int | None = None, session: Session | None = None
+):
+    """用一条聚合查询返回 ``(已复习数, 到期数, 最近复习日期)``。
+
+    到期数包括到期的复习记录和从未复习过的新词，后者由单词总数减去已复习数
+    得到；若提供 *limit*，则扣除今天已复习的单词数后再截断。所有查询共用一个会话。
+    """
+    with session_scope(session) as session:
+        reviewed, due_reviews, next_due = session.exec(overview_query(user_id)).one()
+        due = due_reviews + max(count_words(session) - reviewed, 0)
+        if limit:
+            today = datetime.utcnow().date()
+            reviewed_today = count_reviews_on(user_id, today, session)
+            due = min(due, max(limit - reviewed_today, 0))
+    return reviewed, due, next_due
+
+
+def overview_query(user_id: int):
+    """一次返回复习记录数、到期记录数和最早复习日期的聚合查询。"""
+    return select(
+        func.count(),
+        func.coalesce(
+            func.sum(case((ReviewLog.next_review <= date.today(), 1), else_=0)), 0
+        ),
+        func.min(ReviewLog.next_review),
+    ).where(ReviewLog.user_id == user_id)
+
+
+def search_words(
+    query: str,
+    limit: int | None = None,
+    offset: int = 0,
+    session: Session | None = None,
+):
+    """不区分大小写搜索词头、释义和短语，按相关度排序并分页。"""
+    with session_scope(session) as session:
+        return session.exec(search_query(query, limit, offset)).all()
+
+
+def search_query(query: str, limit: int | None = None, offset: int = 0):
+    """返回搜索用的查询：有全文索引时使用 :func:`fulltext.search_query`。
+
+    否则退回对词头和释义 JSON 的 ``LIKE`` 扫描，以查询开头的单词排在前面。
+    """
+    if database.fulltext_enabled:
+        return fulltext.search_query(query, limit, offset)
     q = query.lower()
-    with get_session() as session:
-        starts = select(Word).where(func.lower(Word.word).like(f"{q}%"))
-        others = (
-            select(Word)
-            .where(
-                (func.lower(Word.word).contains(q))
-                | (func.lower(Word.translations).contains(q))
-            )
-            .where(func.lower(Word.word).not_like(f"{q}%"))
+    statement = (
+        select(Word)
+        .where(
+            (func.lower(Word.word).contains(q))
+            | (func.lower(Word.translations).contains(q))
         )
-        words = session.exec(starts).all()
-        words += session.exec(others).all()
-        return words
+        .order_by(case((func.lower(Word.word).startswith(q), 0), else_=1), Word.id)
+        .offset(offset)
+    )
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def get_words(word_ids, session: Session | None = None):
+    """按给定顺序返回这些 ID 对应的单词，忽略不存在的 ID。"""
+    with session_scope(session) as session:
+        return order_by_ids(session.exec(words_query(word_ids)).all(), word_ids)
+
+
+def words_query(word_ids):
+    """返回按 ID 批量读取单词的查询。"""
+    return select(Word).where(Word.id.in_(list(word_ids)))
 
 
-def get_review_logs(user_id: int):
+def order_by_ids(words, word_ids):
+    """把 *words* 排成 *word_ids* 的顺序。"""
+    by_id = {w.id: w for w in words}
+    return [by_id[i] for i in word_ids if i in by_id]
+
+
+def get_review_logs(user_id: int, session: Session | None = None):
     """返回指定用户的所有复习记录。"""
-    with get_session() as session:
+    with session_scope(session) as session:
         statement = select(ReviewLog).where(ReviewLog.user_id == user_id)
         return session.exec(statement).all()
 
 
-def list_users():
-    """返回所有用户对象。"""
+# 导出 CSV 时使用的列，顺序即表头顺序
+EXPORT_COLUMNS = ("word_id", "quality", "last_interval", "next_review", "reviewed_at")
+
+
+def iter_review_logs(user_id: int, batch_size: int = 1000):
+    """按批读取用户的复习记录，每次产出一批导出列组成的行。
+
+    通过 ``yield_per`` 以游标方式分批拉取，内存占用与记录总数无关。
+    流式响应会在请求结束后继续读取，会话随生成器的结束而关闭。
+    """
     with get_session() as session:
+        statement = (
+            select(*(getattr(ReviewLog, c) for c in EXPORT_COLUMNS))
+            .where(ReviewLog.user_id == user_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for batch in session.exec(statement).partitions():
+            yield batch
+
+
+def list_users(session: Session | None = None):
+    """返回所有用户对象。"""
+    with session_scope(session) as session:
         return session.exec(select(User)).all()
 
 
 def reset_password(user_id: int, new_password: str):
     """更新用户的密码哈希。"""
-    with get_session() as session:
+    return set_password_hash(user_id, get_password_hash(new_password))
+
+
+def set_password_hash(
+    user_id: int, hashed_password: str, session: Session | None = None
+):
+    """直接写入已计算好的密码哈希，用户不存在时返回 ``None``。"""
+    with session_scope(session) as session:
         user = session.get(User, user_id)
         if not user:
             return None
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = hashed_password
         session.add(user)
         session.commit()
+        auth_cache.invalidate_user(user_id)
+        return user
+
+
+def set_role(user_id: int, role: str, session: Session | None = None):
+    """修改用户角色，用户不存在时返回 ``None``。"""
+    with session_scope(session) as session:
+        user = session.get(User, user_id)
+        if not user:
+            return None
+        user.role = role
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        user_journal.journal.record_update(user_id, role=role)
+        auth_cache.invalidate_user(user_id)
+        return user
+
+
+def set_username(user_id: int, username: str, session: Session | None = None):
+    """修改用户名，用户不存在时返回 ``None``。"""
+    with session_scope(session) as session:
+        user = session.get(User, user_id)
+        if not user:
+            return None
+        user.username = username
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        user_journal.journal.record_update(user_id, username=username)
+        auth_cache.invalidate_user(user_id)
         return user
 
 
@@ -166,9 +537,9 @@ def ensure_default_admin():
     return None
 
 
-def create_deletion_request(user_id: int):
+def create_deletion_request(user_id: int, session: Session | None = None):
     """记录用户希望删除账户的请求。"""
-    with get_session() as session:
+    with session_scope(session) as session:
         exists = session.exec(
             select(DeletionRequest).where(DeletionRequest.user_id == user_id)
         ).first()
@@ -181,9 +552,9 @@ def create_deletion_request(user_id: int):
         return req
 
 
-def list_deletion_requests():
+def list_deletion_requests(session: Session | None = None):
     """返回所有未处理的删除请求。"""
-    with get_session() as session:
+    with session_scope(session) as session:
         return session.exec(select(DeletionRequest)).all()
 
 
@@ -194,102 +565,248 @@ def delete_user(user_id: int):
         if not user:
             return False
         session.query(ReviewLog).filter(ReviewLog.user_id == user_id).delete()
+        session.query(DailyReviewStat).filter(
+            DailyReviewStat.user_id == user_id
+        ).delete()
         session.query(DeletionRequest).filter(
             DeletionRequest.user_id == user_id
         ).delete()
         session.delete(user)
         session.commit()
-
-        # 如果存在则从 users.json 中移除
-        try:
-            with open("users.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            data = []
-        data = [u for u in data if u.get("id") != user_id]
-        with open("users.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        auth_cache.invalidate_user(user_id)
+        user_journal.journal.record_delete(user_id)
         return True
 
 
-def add_favorite(user_id: int, word_id: int):
-    """将单词标记为用户的收藏。"""
-    with get_session() as session:
-        exists = session.exec(
-            select(Favorite).where(
-                Favorite.user_id == user_id, Favorite.word_id == word_id
-            )
-        ).first()
-        if exists:
-            return exists
-        fav = Favorite(user_id=user_id, word_id=word_id)
-        session.add(fav)
+def add_favorite(user_id: int, word_id: int, session: Session | None = None) -> bool:
+    """将单词标记为用户的收藏，返回是否新增；已收藏时保留原收藏时间。"""
+    with session_scope(session) as session:
+        stmt = _insert(session, Favorite).on_conflict_do_nothing(
+            index_elements=["user_id", "word_id"]
+        )
+        result = session.exec(
+            stmt,
+            params={
+                "user_id": user_id,
+                "word_id": word_id,
+                "added_at": datetime.utcnow(),
+            },
+        )
         session.commit()
-        session.refresh(fav)
-        return fav
+        return result.rowcount > 0
 
 
-def remove_favorite(user_id: int, word_id: int) -> bool:
-    """删除收藏关系。"""
-    with get_session() as session:
-        fav = session.exec(
-            select(Favorite).where(
+def remove_favorite(user_id: int, word_id: int, session: Session | None = None) -> bool:
+    """删除收藏关系，返回是否确有删除。"""
+    with session_scope(session) as session:
+        result = session.exec(
+            delete(Favorite).where(
                 Favorite.user_id == user_id, Favorite.word_id == word_id
             )
-        ).first()
-        if not fav:
-            return False
-        session.delete(fav)
+        )
         session.commit()
-        return True
+        return result.rowcount > 0
+
+
+def list_favorites(
+    user_id: int,
+    q: str | None = None,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    session: Session | None = None,
+):
+    """返回用户的收藏列表 ``(word, added_at, favorite_id)``，参数见 :func:`favorites_query`。"""
+    with session_scope(session) as session:
+        return session.exec(favorites_query(user_id, q, limit, after)).all()
+
+
+def favorites_cursor(added_at: datetime, favorite_id: int) -> str:
+    """把一条收藏的排序键编码为不透明的分页游标。"""
+    raw = f"{added_at.isoformat()}|{favorite_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def parse_favorites_cursor(cursor: str) -> tuple[datetime, int]:
+    """解析 :func:`favorites_cursor` 生成的游标，格式不对时抛出 :class:`ValueError`。"""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    added_at, _, favorite_id = raw.partition("|")
+    return datetime.fromisoformat(added_at), int(favorite_id)
+
+
+def favorites_query(
+    user_id: int,
+    q: str | None = None,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+):
+    """用户收藏单词、收藏时间及收藏 ID 的查询，按 ``(added_at, id)`` 倒序。
+
+    *after* 为上一页最后一条的 ``(added_at, id)``，按键集分页从其后继续，
+    借助 ``(user_id, added_at, id)`` 索引无需 OFFSET 扫描。*q* 通过全文索引
+    筛选词头、释义或短语包含它的收藏，没有全文索引时退回 ``LIKE``。
+    """
+    statement = (
+        select(Word, Favorite.added_at, Favorite.id)
+        .join(Favorite, Favorite.word_id == Word.id)
+        .where(Favorite.user_id == user_id)
+    )
+    if q and database.fulltext_enabled:
+        # 只匹配词头、释义和短语的文本，不会命中 JSON 键名
+        statement = statement.join(
+            fulltext.wordsearch, fulltext.wordsearch.c.rowid == Word.id
+        ).where(fulltext.match_condition(q))
+    elif q:
+        ql = q.lower()
+        statement = statement.where(
+            (func.lower(Word.word).contains(ql))
+            | (func.lower(Word.translations).contains(ql))
+        )
+    if after is not None:
+        statement = statement.where(
+            tuple_(Favorite.added_at, Favorite.id)
+            < tuple_(
+                literal(after[0], Favorite.added_at.type),
+                literal(after[1], Favorite.id.type),
+            )
+        )
+    statement = statement.order_by(Favorite.added_at.desc(), Favorite.id.desc())
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+def _file_sha256(path: str) -> str:
+    """按块计算文件内容的 SHA-256。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _import_wordbook(session, path: str, existing: set, batch_size: int):
+    """流式解析词书文件，把 *existing* 中没有的单词按批插入。
+
+    返回新插入单词的 ``(id, word)`` 列表以及本文件出现过的小写单词集合。
+    """
+    table = Word.__table__
+    stmt = (
+        _insert(session, Word)
+        .on_conflict_do_nothing()
+        .returning(table.c.id, table.c.word)
+    )
+    added, keys, batch = [], set(), []
+
+    def flush():
+        rows = session.execute(stmt, batch).all()
+        # 全文索引与单词在同一事务中写入，词书回滚时一并撤销
+        by_key = {b["word"].lower(): b for b in batch}
+        fulltext.index_words(
+            session,
+            [
+                fulltext.document(
+                    word_id,
+                    word,
+                    by_key[word.lower()]["translations"],
+                    by_key[word.lower()]["phrases"],
+                )
+                for word_id, word in rows
+            ],
+        )
+        return rows
+
+    with open(path, "r", encoding="utf-8") as f:
+        for w in jsonstream.iter_array(f):
+            key = w.get("word", "").lower()
+            if not key or key in existing or key in keys:
+                continue
+            keys.add(key)
+            batch.append(
+                {
+                    "word": w["word"],
+                    "translations": json.dumps(
+                        w.get("translations", []), ensure_ascii=False
+                    ),
+                    "phrases": json.dumps(w.get("phrases", []), ensure_ascii=False),
+                }
+            )
+            if len(batch) >= batch_size:
+                added += flush()
+                batch = []
+    if batch:
+        added += flush()
+    return added, keys
 
 
-def list_favorites(user_id: int, q: str | None = None):
-    """返回用户的收藏列表，可按 ``q`` 过滤。"""
+def seed_words(book_file: str, batch_size: int = 1000) -> int:
+    """单词表为空时从 *book_file* 导入初始单词，返回导入的数量。"""
+    global _word_count
     with get_session() as session:
-        statement = (
-            select(Word, Favorite.added_at)
-            .join(Favorite, Favorite.word_id == Word.id)
-            .where(Favorite.user_id == user_id)
-        )
-        if q:
-            ql = q.lower()
-            statement = statement.where(
-                (func.lower(Word.word).contains(ql))
-                | (func.lower(Word.translations).contains(ql))
-            )
-        statement = statement.order_by(Favorite.added_at.desc())
-        return session.exec(statement).all()
+        if session.exec(select(Word.id).limit(1)).first() is not None:
+            return 0
+        rows, _ = _import_wordbook(session, book_file, set(), batch_size)
+        session.commit()
+    _word_count = None
+    word_cache.invalidate()
+    return len(rows)
 
 
-def sync_wordbooks(directory: str):
-    """将 *directory* 中缺失的单词补充进数据库。"""
+def sync_wordbooks(directory: str, batch_size: int = 1000):
+    """将 *directory* 中缺失的单词补充进数据库。
+
+    :class:`WordbookFile` 清单记录每本词书的 mtime、大小和内容哈希，
+    未变化的文件只需一次 ``stat`` 即可跳过。变化的文件流式解析，
+    新单词以 ``INSERT ... ON CONFLICT DO NOTHING`` 分批写入，每本词书一个事务。
+    """
+    global _word_count
     if not directory or not os.path.exists(directory):
         return
 
+    added = []
     with get_session() as session:
-        existing = {w.word.lower(): w.id for w in session.exec(select(Word)).all()}
+        manifest = {m.name: m for m in session.exec(select(WordbookFile)).all()}
+        existing = None
 
-        for fn in os.listdir(directory):
+        for fn in sorted(os.listdir(directory)):
             if not fn.startswith("wordBook_") or not fn.endswith(".json"):
                 continue
             path = os.path.join(directory, fn)
             try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except Exception:
-                continue
-            for w in data:
-                key = w.get("word", "").lower()
-                if not key or key in existing:
+                stat = os.stat(path)
+                entry = manifest.get(fn)
+                version = (stat.st_mtime_ns, stat.st_size)
+                if entry is not None and (entry.mtime_ns, entry.size) == version:
                     continue
-                word = Word(
-                    word=w["word"],
-                    translations=json.dumps(
-                        w.get("translations", []), ensure_ascii=False
-                    ),
-                    phrases=json.dumps(w.get("phrases", []), ensure_ascii=False),
+                sha256 = _file_sha256(path)
+                rows, keys = [], set()
+                if entry is None or entry.sha256 != sha256:
+                    if existing is None:
+                        # 只取小写单词，不加载完整的 Word 行
+                        existing = set(
+                            session.exec(select(func.lower(Word.word))).all()
+                        )
+                    rows, keys = _import_wordbook(session, path, existing, batch_size)
+                session.merge(
+                    WordbookFile(
+                        name=fn,
+                        sha256=sha256,
+                        mtime_ns=stat.st_mtime_ns,
+                        size=stat.st_size,
+                    )
                 )
-                session.add(word)
-                existing[key] = True
-        session.commit()
+                session.commit()
+            except Exception:
+                # 解析失败的词书整本回滚，且不写入清单，下次启动时重试
+                session.rollback()
+                continue
+            added += rows
+            if existing is not None:
+                existing |= keys
+
+    _word_count = None
+    # SQLite 可能复用已删除单词的 ID，先清掉这些 ID 的旧负载缓存
+    word_cache.invalidate([word_id for word_id, _ in added])
+    # 新单词提交后才有 ID，此时再增量写入前缀索引
+    for word_id, word in added:
+        search_index.add(word_id, word)
+    fuzzy_index.add_many(added)
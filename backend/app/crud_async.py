@@ -0,0 +1,115 @@
+"""热点路由使用的异步数据库辅助函数。
+
+与 :mod:`crud` 中的同名函数行为一致，查询语句也直接复用 :mod:`crud` 中的
+构造函数，只是通过异步引擎执行，使路由可以写成原生 ``async def``，
+不再占用线程池线程等待 SQLite I/O。各函数都可传入 ``session`` 以共用请求的会话。
+"""
+
+from datetime import datetime
+from .models import User
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .database import async_session_scope
+from . import crud
+
+
+async def get_user(user_id: int, session: AsyncSession | None = None):
+    """按 ID 查找用户，不存在时返回 ``None``。"""
+    async with async_session_scope(session) as session:
+        return await session.get(User, user_id)
+
+
+async def get_due_words(
+    user_id: int, limit: int | None = None, session: AsyncSession | None = None
+):
+    """:func:`crud.get_due_words` 的异步版本。"""
+    if limit is not None and limit <= 0:
+        return []
+    async with async_session_scope(session) as session:
+        words = list((await session.exec(crud.due_reviews_query(user_id, limit))).all())
+        if limit is not None and len(words) >= limit:
+            return words
+        rest = None if limit is None else limit - len(words)
+        words += (await session.exec(crud.new_words_query(user_id, rest))).all()
+        return words
+
+
+async def record_review(
+    user_id: int, word_id: int, quality: int, session: AsyncSession | None = None
+):
+    """:func:`crud.record_review` 的异步版本。"""
+    async with async_session_scope(session) as session:
+        log = (await session.exec(crud.review_log_query(user_id, word_id))).first()
+        now = datetime.utcnow()
+        log = crud.apply_review(log, user_id, word_id, quality, now)
+        session.add(log)
+        stmt, params = crud.daily_stats_upsert(
+            session, user_id, [(now.date(), quality)]
+        )
+        await session.exec(stmt, params=params)
+        await session.commit()
+        return log
+
+
+async def search_words(
+    query: str,
+    limit: int | None = None,
+    offset: int = 0,
+    session: AsyncSession | None = None,
+):
+    """:func:`crud.search_words` 的异步版本。"""
+    async with async_session_scope(session) as session:
+        return (await session.exec(crud.search_query(query, limit, offset))).all()
+
+
+async def get_words(word_ids, session: AsyncSession | None = None):
+    """:func:`crud.get_words` 的异步版本。"""
+    if not word_ids:
+        return []
+    async with async_session_scope(session) as session:
+        words = (await session.exec(crud.words_query(word_ids))).all()
+    return crud.order_by_ids(words, word_ids)
+
+
+async def list_favorites(
+    user_id: int,
+    q: str | None = None,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    session: AsyncSession | None = None,
+):
+    """:func:`crud.list_favorites` 的异步版本。"""
+    statement = crud.favorites_query(user_id, q, limit, after)
+    async with async_session_scope(session) as session:
+        return (await session.exec(statement)).all()
+
+
+async def count_words(session: AsyncSession | None = None) -> int:
+    """:func:`crud.count_words` 的异步版本，与同步版本共用缓存。"""
+    if crud._word_count is None:
+        async with async_session_scope(session) as session:
+            crud._word_count = (await session.exec(crud.word_count_query())).one()
+    return crud._word_count
+
+
+async def count_reviews_on(
+    user_id: int, day, session: AsyncSession | None = None
+) -> int:
+    """:func:`crud.count_reviews_on` 的异步版本。"""
+    async with async_session_scope(session) as session:
+        return (await session.exec(crud.reviews_on_query(user_id, day))).one()
+
+
+async def review_overview(
+    user_id: int, limit: int | None = None, session: AsyncSession | None = None
+):
+    """:func:`crud.review_overview` 的异步版本。"""
+    async with async_session_scope(session) as session:
+        reviewed, due_reviews, next_due = (
+            await session.exec(crud.overview_query(user_id))
+        ).one()
+        due = due_reviews + max(await count_words(session) - reviewed, 0)
+        if limit:
+            today = datetime.utcnow().date()
+            reviewed_today = await count_reviews_on(user_id, today, session)
+            due = min(due, max(limit - reviewed_today, 0))
+    return reviewed, due, next_due
@@ -1,16 +1,249 @@
-"""与数据库引擎交互的辅助函数。"""
+"""与数据库引擎交互的辅助函数。
 
+数据库地址通过 ``DATABASE_URL`` 环境变量配置，默认使用当前目录下的 SQLite 文件。
+SQLite 连接启用 WAL 等 pragma，使读请求不再被复习写入阻塞；其他数据库使用
+可配置大小的连接池。:func:`get_session` 总是生成独立的会话；需要在一个请求内
+共用会话时，由 :func:`request_session` / :func:`async_request_session` 依赖注入，
+再显式传给 CRUD 函数的 ``session`` 参数（见 :func:`session_scope`）。
+
+另有一个指向同一数据库的异步引擎（SQLite 使用 aiosqlite），供热点路由通过
+:mod:`crud_async` 以原生协程访问数据库；同步引擎继续服务其余路由、测试和脚本。
+
+SQLite 下还会建立单词全文索引用的 FTS5 虚拟表，见 :mod:`fulltext`。
+"""
+
+import os
+from contextlib import nullcontext
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./wordcards.db")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+_is_memory = _is_sqlite and (":memory:" in DATABASE_URL or DATABASE_URL == "sqlite://")
+
+# 单词全文索引表；trigram 分词器按三字符切分，中英文都能做子串匹配（需 SQLite 3.34+）
+FULLTEXT_TABLE = "wordsearch"
+# Word 上不区分大小写的唯一索引（见 models.Word），旧数据需先合并重复单词
+WORD_CASE_INDEX = "uq_word_lower_word"
+# init_db 成功建立全文索引表后置为 True，否则搜索退回 LIKE 扫描
+fulltext_enabled = False
+
+
+def _async_url(url: str) -> str:
+    """把同步驱动的数据库地址换成对应的异步驱动。"""
+    for prefix, async_prefix in (
+        ("sqlite:", "sqlite+aiosqlite:"),
+        ("postgresql+psycopg2:", "postgresql+asyncpg:"),
+        ("postgresql:", "postgresql+asyncpg:"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix) :]
+    return url
 
-DATABASE_URL = "sqlite:///./wordcards.db"
-engine = create_engine(DATABASE_URL, echo=False)
+
+if _is_memory:
+    # 每个内存连接默认各自打开一个独立的数据库，异步引擎会看不到 init_db 建的表；
+    # 改为两个引擎都连接同一个具名的共享缓存内存库，并各自只保持一个连接
+    _MEMORY_URI = f"file:wordcards-{os.getpid()}?mode=memory&cache=shared&uri=true"
+    DATABASE_URL = f"sqlite:///{_MEMORY_URI}"
+    ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
+    _pool_options = {
+        "poolclass": StaticPool,
+        "connect_args": {"check_same_thread": False},
+    }
+else:
+    ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+    _pool_options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": not _is_sqlite,
+        "pool_recycle": 1800 if not _is_sqlite else -1,
+    }
+engine = create_engine(DATABASE_URL, echo=False, **_pool_options)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, **_pool_options)
+
+if _is_sqlite:
+
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """为每个新的 SQLite 连接设置 WAL 及相关 pragma。"""
+        cursor = dbapi_connection.cursor()
+        if not _is_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        # WAL 模式下 NORMAL 已能保证数据库一致性，只在断电时可能丢失最后的事务
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
 
 
 def init_db():
-    """根据 SQLModel 元数据创建表。"""
+    """根据 SQLModel 元数据创建表，并为已有的表补建新增的列和索引。"""
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+    # create_all 不会给已存在的表添加索引，这里逐个补齐；
+    # 表达式索引无法通过反射检查是否存在，因此统一使用 IF NOT EXISTS
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+            except IntegrityError:
+                if index.name == WORD_CASE_INDEX:
+                    _create_after_word_merge(index)
+                elif index.unique and len(index.columns):
+                    _create_after_dedupe(index)
+                else:
+                    raise
+    _create_fulltext_table()
+
+
+def _create_fulltext_table():
+    """建立单词全文索引的 FTS5 虚拟表；数据库不支持时保持禁用。"""
+    global fulltext_enabled
+    if not _is_sqlite:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FULLTEXT_TABLE} "
+                    "USING fts5(word, translations, phrases, tokenize='trigram')"
+                )
+            )
+    except OperationalError:
+        # SQLite 编译时未启用 FTS5 或版本过旧，没有 trigram 分词器
+        return
+    fulltext_enabled = True
+
+
+def _create_after_dedupe(index):
+    """旧数据违反新增的唯一索引时，每组只保留 ID 最大（最新）的一行后再建索引。"""
+    table = index.table.name
+    columns = ", ".join(c.name for c in index.columns)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"DELETE FROM {table} WHERE id NOT IN "
+                f"(SELECT MAX(id) FROM {table} GROUP BY {columns})"
+            )
+        )
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _create_after_word_merge(index):
+    """合并只有大小写不同的单词后再建立不区分大小写的唯一索引。
+
+    早期的导入没有去重，旧数据库中可能同时存在 ``Apple`` 和 ``apple``。
+    每组保留 ID 最小的一行，把其余行上的复习记录和收藏改指向它：
+    同一用户两边都有复习记录时保留最近复习的那条，收藏只保留一条。
+    全文索引在启动回填时会因行数不一致而整体重建。
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(
+                "SELECT id, lower(word) FROM word WHERE lower(word) IN "
+                "(SELECT lower(word) FROM word GROUP BY lower(word) "
+                "HAVING COUNT(*) > 1) ORDER BY id"
+            )
+        ).all()
+        keep = {}
+        for word_id, key in rows:
+            new = keep.setdefault(key, word_id)
+            if new == word_id:
+                continue
+            ids = {"old": word_id, "new": new}
+            conn.execute(
+                text(
+                    "DELETE FROM reviewlog WHERE word_id = :old AND EXISTS "
+                    "(SELECT 1 FROM reviewlog r WHERE r.user_id = reviewlog.user_id "
+                    "AND r.word_id = :new AND r.reviewed_at >= reviewlog.reviewed_at)"
+                ),
+                ids,
+            )
+            conn.execute(
+                text(
+                    "DELETE FROM reviewlog WHERE word_id = :new AND EXISTS "
+                    "(SELECT 1 FROM reviewlog r WHERE r.user_id = reviewlog.user_id "
+                    "AND r.word_id = :old)"
+                ),
+                ids,
+            )
+            conn.execute(
+                text(
+                    "DELETE FROM favorite WHERE word_id = :old AND user_id IN "
+                    "(SELECT user_id FROM favorite WHERE word_id = :new)"
+                ),
+                ids,
+            )
+            for table in ("reviewlog", "favorite"):
+                conn.execute(
+                    text(f"UPDATE {table} SET word_id = :new WHERE word_id = :old"),
+                    ids,
+                )
+            conn.execute(text("DELETE FROM word WHERE id = :old"), ids)
+        conn.execute(CreateIndex(index, if_not_exists=True))
 
 
 def get_session():
     """生成新的数据库会话。"""
     return Session(engine)
+
+
+def get_async_session() -> AsyncSession:
+    """生成新的异步数据库会话；提交后不使对象过期，避免隐式的惰性加载。"""
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+def session_scope(session: Session | None = None):
+    """CRUD 函数使用的会话上下文：传入 *session* 时直接使用（退出时不关闭），
+    否则生成新的会话。"""
+    return nullcontext(session) if session is not None else get_session()
+
+
+def async_session_scope(session: AsyncSession | None = None):
+    """:func:`session_scope` 的异步版本。"""
+    return nullcontext(session) if session is not None else get_async_session()
+
+
+def request_session():
+    """FastAPI 依赖：为路由注入一个在请求结束时关闭的会话。"""
+    with Session(engine) as session:
+        yield session
+
+
+async def async_request_session():
+    """FastAPI 依赖：为异步路由注入一个在请求结束时关闭的异步会话。
+
+    同一请求中的各个依赖得到的是同一个会话；未使用时不会占用连接。
+    """
+    async with get_async_session() as session:
+        yield session
+
+
+def _add_missing_columns():
+    """给已有的表补上模型中新增、且带 ``server_default`` 的列。"""
+    inspector = inspect(engine)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or column.server_default is None:
+                continue
+            ddl = (
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                f"{column.type.compile(engine.dialect)} "
+                f"NOT NULL DEFAULT {column.server_default.arg}"
+            )
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
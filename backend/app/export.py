@@ -0,0 +1,89 @@
+"""复习记录的流式导出。
+
+个人导出逐批生成 CSV 文本，管理员导出把每个用户的记录写成 ZIP 中的一个
+CSV 文件。两者都是生成器，交给 ``StreamingResponse`` 边读边发送，
+内存占用只取决于批大小而与记录总数无关。
+"""
+
+import csv
+import io
+import re
+import zipfile
+from . import crud
+
+
+class _ZipSink:
+    """供 ``zipfile`` 写入的不可定位缓冲区，写入的数据可随时取出发送。
+
+    该对象没有 ``tell``/``seek``，``ZipFile`` 会据此改用数据描述符
+    逐项写出，而不必回头修改本地文件头。
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        """取出并清空目前缓冲的所有字节。"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _format_batch(batch) -> str:
+    """把一批导出行格式化为 CSV 文本。"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for word_id, quality, last_interval, next_review, reviewed_at in batch:
+        writer.writerow(
+            [
+                word_id,
+                quality,
+                last_interval,
+                next_review.isoformat(),
+                reviewed_at.isoformat(),
+            ]
+        )
+    return buf.getvalue()
+
+
+def _header() -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(crud.EXPORT_COLUMNS)
+    return buf.getvalue()
+
+
+def iter_user_csv(user_id: int, batch_size: int = 1000):
+    """逐批产出单个用户复习记录的 CSV 文本，首先立即产出表头。"""
+    yield _header()
+    for batch in crud.iter_review_logs(user_id, batch_size):
+        yield _format_batch(batch)
+
+
+def iter_all_users_zip(batch_size: int = 1000):
+    """逐块产出包含所有用户复习记录的 ZIP 字节流，每个用户一个 CSV。"""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for user in crud.list_users():
+            # 用户名可能含有路径分隔符等字符，只保留安全字符
+            safe = re.sub(r"[^\w.-]", "_", user.username)
+            name = f"user_{user.id}_{safe}.csv"
+            # 大小未知，强制使用 ZIP64 以免单个文件超过 4GB 时出错
+            with zf.open(name, mode="w", force_zip64=True) as entry:
+                entry.write(_header().encode("utf-8"))
+                for batch in crud.iter_review_logs(user.id, batch_size):
+                    entry.write(_format_batch(batch).encode("utf-8"))
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # 关闭 ZipFile 时才写出中央目录
+    yield sink.drain()
@@ -0,0 +1,115 @@
+"""单词的 FTS5 全文索引。
+
+``Word.translations`` 与 ``Word.phrases`` 以 JSON 字符串存储，直接对其做
+``LIKE`` 会匹配到 ``"translation"``、``"type"`` 等键名，且每次都要全表扫描。
+这里把词头、释义文本和短语（英文与释义）抽取到 ``wordsearch`` 虚拟表中，
+以单词 ID 作为 rowid。表使用 trigram 分词器，因此不需要分词也能对中文做
+子串匹配：三个字符及以上的查询走 ``MATCH`` 并按 bm25 排序，更短的查询
+退回对索引表的 ``LIKE`` 扫描。新单词与 Word 表在同一事务中写入，
+已有数据库在启动时回填。
+"""
+
+import json
+from sqlalchemy import case, column, func, literal_column, or_, table, text
+from sqlmodel import select
+from .models import Word
+from . import database
+from .database import FULLTEXT_TABLE, get_session
+
+wordsearch = table(
+    FULLTEXT_TABLE,
+    column("rowid"),
+    column("word"),
+    column("translations"),
+    column("phrases"),
+)
+# bm25 的列权重：词头命中最重要，短语中的命中最不重要
+WEIGHTS = (10.0, 4.0, 1.0)
+# trigram 分词器下 MATCH 查询至少需要的字符数
+MIN_MATCH_LENGTH = 3
+
+_insert_sql = text(
+    f"INSERT INTO {FULLTEXT_TABLE} (rowid, word, translations, phrases) "
+    "VALUES (:id, :word, :translations, :phrases)"
+)
+
+
+def document(word_id: int, word: str, translations: str, phrases: str | None):
+    """把一个单词的 JSON 字段展开为全文索引的一行，只保留可读文本。"""
+    translations = json.loads(translations) if translations else []
+    phrases = json.loads(phrases) if phrases else []
+    return {
+        "id": word_id,
+        "word": word,
+        "translations": "\n".join(t.get("translation", "") for t in translations),
+        "phrases": "\n".join(
+            f"{p.get('phrase', '')}\n{p.get('translation', '')}" for p in phrases
+        ),
+    }
+
+
+def index_words(session, docs):
+    """在 *session* 的当前事务中写入 :func:`document` 生成的行。"""
+    if database.fulltext_enabled and docs:
+        session.execute(_insert_sql, docs)
+
+
+def backfill(batch_size: int = 1000) -> int:
+    """索引行数与 Word 表不一致时（如首次启用）全量重建，返回写入的行数。"""
+    if not database.fulltext_enabled:
+        return 0
+    with get_session() as session:
+        indexed = session.execute(
+            select(func.count()).select_from(wordsearch)
+        ).scalar_one()
+        total = session.execute(select(func.count(Word.id))).scalar_one()
+        if indexed == total:
+            return 0
+        session.execute(text(f"DELETE FROM {FULLTEXT_TABLE}"))
+        rows = session.execute(
+            select(Word.id, Word.word, Word.translations, Word.phrases)
+        )
+        for batch in rows.partitions(batch_size):
+            index_words(session, [document(*row) for row in batch])
+        session.commit()
+    return total
+
+
+def match_condition(query: str):
+    """返回筛选包含 *query* 的索引行的条件，需与 :data:`wordsearch` 连接使用。
+
+    三个字符及以上整个查询作为一个短语走 ``MATCH``（trigram 分词器下即子串
+    匹配），更短的查询退回对索引列的 ``LIKE``。
+    """
+    q = query.strip().lower()
+    if len(q) >= MIN_MATCH_LENGTH:
+        phrase = '"' + q.replace('"', '""') + '"'
+        return literal_column(FULLTEXT_TABLE).op("MATCH")(phrase)
+    return or_(
+        wordsearch.c.word.contains(q, autoescape=True),
+        wordsearch.c.translations.contains(q, autoescape=True),
+        wordsearch.c.phrases.contains(q, autoescape=True),
+    )
+
+
+def search_query(query: str, limit: int | None = None, offset: int = 0):
+    """返回按相关度排序的单词查询。
+
+    词头与 *query* 完全相同的排在最前，其次是以它开头的，其余按 bm25 排序。
+    """
+    q = query.strip().lower()
+    statement = (
+        select(Word)
+        .join(wordsearch, wordsearch.c.rowid == Word.id)
+        .where(match_condition(q))
+    )
+    order = [
+        case((func.lower(Word.word) == q, 0), else_=1),
+        case((func.lower(Word.word).startswith(q, autoescape=True), 0), else_=1),
+    ]
+    if len(q) >= MIN_MATCH_LENGTH:
+        order.append(func.bm25(literal_column(FULLTEXT_TABLE), *WEIGHTS))
+    statement = statement.order_by(*order, Word.id).offset(offset)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
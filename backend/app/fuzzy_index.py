@@ -0,0 +1,185 @@
+"""英文词头的进程内模糊匹配索引，用于容错搜索。
+
+每个小写词头在首尾各补两个空格后拆成三元组（trigram），倒排表记录含有各
+三元组的单词。距离采用限制版 Damerau-Levenshtein（OSA），相邻字母互换
+计为一处错误。距离为 *k* 的两个词满足三个必要条件：每处编辑至多破坏
+4 个三元组，因此至少共享 ``max(三元组数) - 4k`` 个；长度相差不超过 *k*；
+字母计数之差的 L1 范数不超过 ``2k``。查询时先用 ``np.bincount`` 统计共享
+三元组数，再按长度和字母计数逐层排除，最后用 NumPy 对剩余候选一次性计算
+带状的编辑距离矩阵。启动时全量构建，同步词书新增单词时增量追加。
+"""
+
+import threading
+import numpy as np
+from sqlmodel import select
+from .models import Word
+from .database import get_session
+
+# 超过该长度的词头不参与模糊匹配
+MAX_WORD_LENGTH = 32
+
+_lock = threading.Lock()
+# 以下数组按下标一一对应：_entries 为 (id, 原始拼写)，_codes 为按 Unicode 码位
+# 编码、以 0 补齐的小写词头，_lengths 与 _sizes 为词头长度和不重复三元组数，
+# _letters 为 a–z 各字母及其他字符的计数
+_entries: list[tuple[int, str]] = []
+_codes = np.zeros((0, MAX_WORD_LENGTH), dtype=np.uint32)
+_lengths = np.zeros(0, dtype=np.int16)
+_sizes = np.zeros(0, dtype=np.int16)
+_letters = np.zeros((0, 27), dtype=np.int8)
+# 三元组 -> 含有它的单词下标
+_postings: dict[str, np.ndarray] = {}
+
+
+def trigrams(key: str) -> set[str]:
+    """返回补齐首尾后的不重复三元组。"""
+    padded = f"  {key}  "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance(key: str) -> int:
+    """查询允许的最大编辑距离：七个字母以下只容忍一处错误，过短的词不做模糊匹配。
+
+    同时保证三元组下界至少为 1，使候选总能从倒排表中取得。
+    """
+    if len(key) < 3:
+        return 0
+    return min(1 if len(key) < 7 else 2, (len(trigrams(key)) - 1) // 4)
+
+
+def _encode(key: str) -> np.ndarray:
+    return np.frombuffer(key.encode("utf-32-le"), dtype=np.uint32)
+
+
+def _letter_counts(codes: np.ndarray) -> np.ndarray:
+    """按行统计编码矩阵中 a–z 的出现次数，其他字符合并计入最后一列。"""
+    rows, cols = np.nonzero(codes)
+    values = codes[rows, cols].astype(np.int64) - ord("a")
+    buckets = np.where((values >= 0) & (values < 26), values, 26)
+    flat = np.bincount(rows * 27 + buckets, minlength=len(codes) * 27)
+    return flat.reshape(len(codes), 27).astype(np.int8)
+
+
+def _build(items, offset: int):
+    """把 ``(id, word)`` 编码为待追加的数组和 ``三元组 -> 下标列表``。"""
+    entries, keys, grams = [], [], {}
+    for word_id, word in items:
+        key = word.lower()
+        if not key or len(key) > MAX_WORD_LENGTH:
+            continue
+        pos = offset + len(entries)
+        entries.append((word_id, word))
+        keys.append(key)
+        for gram in trigrams(key):
+            grams.setdefault(gram, []).append(pos)
+    codes = np.zeros((len(keys), MAX_WORD_LENGTH), dtype=np.uint32)
+    for row, key in enumerate(keys):
+        codes[row, : len(key)] = _encode(key)
+    lengths = np.array([len(k) for k in keys], dtype=np.int16)
+    sizes = np.array([len(trigrams(k)) for k in keys], dtype=np.int16)
+    return entries, codes, lengths, sizes, _letter_counts(codes), grams
+
+
+def rebuild():
+    """从 Word 表全量重建模糊索引。"""
+    global _entries, _codes, _lengths, _sizes, _letters, _postings
+    with get_session() as session:
+        rows = session.exec(select(Word.id, Word.word)).all()
+    entries, codes, lengths, sizes, letters, grams = _build(rows, 0)
+    postings = {g: np.array(p, dtype=np.int32) for g, p in grams.items()}
+    with _lock:
+        _entries, _codes, _lengths, _sizes = entries, codes, lengths, sizes
+        _letters, _postings = letters, postings
+
+
+def add_many(items):
+    """将一批新单词 ``(id, word)`` 追加到索引。"""
+    global _entries, _codes, _lengths, _sizes, _letters, _postings
+    with _lock:
+        entries, codes, lengths, sizes, letters, grams = _build(items, len(_entries))
+        if not entries:
+            return
+        postings = dict(_postings)
+        for gram, positions in grams.items():
+            new = np.array(positions, dtype=np.int32)
+            old = postings.get(gram)
+            postings[gram] = new if old is None else np.concatenate([old, new])
+        # 整体替换而非原地修改，正在查询的线程仍持有一致的旧快照
+        _entries = _entries + entries
+        _codes = np.concatenate([_codes, codes])
+        _lengths = np.concatenate([_lengths, lengths])
+        _sizes = np.concatenate([_sizes, sizes])
+        _letters = np.concatenate([_letters, letters])
+        _postings = postings
+
+
+def distances(key: str, codes: np.ndarray, lengths: np.ndarray, bound: int):
+    """计算 *key* 与每个候选的 OSA 距离，超过 *bound* 的结果都记为 ``bound + 1``。
+
+    *codes* 与 *lengths* 为候选的编码矩阵和长度；只计算对角线两侧 *bound*
+    以内的带状区域，每一步都对全部候选向量化执行。
+    """
+    over = bound + 1
+    q = _encode(key)
+    width = min(len(q) + bound, codes.shape[1])
+    shape = (len(codes), width + 1)
+    before = None
+    previous = np.full(shape, over, dtype=np.int16)
+    previous[:, :over] = np.arange(over)
+    for i in range(1, len(q) + 1):
+        current = np.full(shape, over, dtype=np.int16)
+        if i <= bound:
+            current[:, 0] = i
+        for j in range(max(1, i - bound), min(width, i + bound) + 1):
+            cell = previous[:, j - 1] + (codes[:, j - 1] != q[i - 1])
+            np.minimum(cell, previous[:, j] + 1, out=cell)
+            np.minimum(cell, current[:, j - 1] + 1, out=cell)
+            if i > 1 and j > 1:
+                swapped = (codes[:, j - 1] == q[i - 2]) & (codes[:, j - 2] == q[i - 1])
+                cell = np.where(swapped, np.minimum(cell, before[:, j - 2] + 1), cell)
+            np.minimum(cell, over, out=cell)
+            current[:, j] = cell
+        before, previous = previous, current
+    found = previous[np.arange(len(codes)), np.minimum(lengths, width)]
+    found[np.abs(lengths.astype(np.int64) - len(q)) > bound] = over
+    return found
+
+
+def match(query: str, limit: int = 10) -> list[tuple[int, str]]:
+    """返回与 *query* 拼写相近的单词 ``(id, word)``。
+
+    按编辑距离升序排列，距离相同时共享三元组多者优先；
+    查询过短或没有足够接近的单词时返回空列表。
+    """
+    key = query.strip().lower()
+    bound = max_distance(key)
+    if not bound or limit <= 0 or len(key) > MAX_WORD_LENGTH + bound:
+        return []
+    grams = trigrams(key)
+    with _lock:
+        entries, codes, lengths, sizes = _entries, _codes, _lengths, _sizes
+        letters = _letters
+        postings = [_postings[g] for g in grams if g in _postings]
+    if not postings:
+        return []
+    slack = 4 * bound
+    counts = np.bincount(np.concatenate(postings), minlength=len(entries))
+    candidates = np.flatnonzero(counts >= len(grams) - slack)
+    shared = counts[candidates]
+    keep = (shared >= sizes[candidates] - slack) & (
+        np.abs(lengths[candidates] - len(key)) <= bound
+    )
+    candidates, shared = candidates[keep], shared[keep]
+    query_letters = _letter_counts(_encode(key)[None, :])
+    gap = np.abs(letters[candidates] - query_letters).sum(axis=1)
+    candidates, shared = candidates[gap <= 2 * bound], shared[gap <= 2 * bound]
+    found = distances(key, codes[candidates], lengths[candidates], bound)
+    close = found <= bound
+    candidates, shared, found = candidates[close], shared[close], found[close]
+    order = np.lexsort((candidates, -shared, found))[:limit]
+    return [entries[pos] for pos in candidates[order]]
+
+
+def size() -> int:
+    """返回当前索引中的单词数量。"""
+    return len(_entries)
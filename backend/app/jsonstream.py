@@ -0,0 +1,77 @@
+"""顶层 JSON 数组的增量解析。
+
+词书文件是由单词对象组成的数组，体积可能很大。:func:`iter_array` 按块读取
+文件，用标准库 :class:`json.JSONDecoder` 的 ``raw_decode`` 逐个解析元素，
+内存中只保留当前元素附近的一小段文本。
+"""
+
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_array(f, chunk_size: int = 1 << 16):
+    """逐个产出文本文件 *f* 中顶层 JSON 数组的元素。
+
+    文件内容不是合法的 JSON 数组时抛出 :class:`ValueError`。
+    """
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        # 丢弃已解析的部分，再追加下一块
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        buf = buf[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                raise ValueError("unexpected end of JSON array")
+            fill()
+            continue
+        char = buf[pos]
+        if not started:
+            if char != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            pos += 1
+            expect_item, after_comma = True, False
+            continue
+        if char == "]":
+            if expect_item and after_comma:
+                raise ValueError("trailing comma in JSON array")
+            return
+        if not expect_item:
+            if char != ",":
+                raise ValueError("expected ',' or ']' in JSON array")
+            pos += 1
+            expect_item, after_comma = True, True
+            continue
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # 元素可能被块边界截断，读入更多内容后重试
+            if eof:
+                raise
+            fill()
+            continue
+        if not eof:
+            # 数字可能在块末尾被截断（如 "3." 之后的部分尚未读入），
+            # 确认元素后面已经读到分隔符再产出
+            after = end
+            while after < len(buf) and buf[after] in _WHITESPACE:
+                after += 1
+            if after == len(buf) or buf[after] not in ",]":
+                fill()
+                continue
+        yield item
+        pos = end
+        expect_item = False
@@ -0,0 +1,225 @@
+"""外部 LLM 服务的共享 HTTP 客户端。
+
+整个应用生命周期内复用同一个 :class:`httpx.AsyncClient`，保留 TLS 会话与
+keep-alive 连接；并发请求数由全局信号量限制。重试采用带抖动的指数退避，
+连续失败达到阈值后熔断器打开，冷却期内的请求直接失败，不再逐个等待重试。
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import httpx
+
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "20"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "4"))
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class LLMError(Exception):
+    """调用 LLM 失败，``status_code`` 为应返回给客户端的 HTTP 状态码。"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CircuitBreaker:
+    """连续失败 *threshold* 次后打开，*cooldown* 秒内拒绝请求。
+
+    冷却期过后放行一个试探请求（半开）；试探成功则关闭，失败则重新计时。
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """当前是否允许发出请求。"""
+        state = self.state
+        if state == "half_open":
+            # 重新计时，冷却期内只放行这一个试探请求
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+_client: httpx.AsyncClient | None = None
+_semaphore: asyncio.Semaphore | None = None
+_in_flight = 0
+
+
+def start():
+    """创建共享客户端和并发信号量，由应用生命周期在事件循环中调用。"""
+    global _client, _semaphore
+    _client = httpx.AsyncClient(
+        timeout=LLM_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+        ),
+    )
+    _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+async def close():
+    """关闭共享客户端及其连接池。"""
+    global _client, _semaphore
+    if _client is not None:
+        await _client.aclose()
+    _client = _semaphore = None
+
+
+def backoff_delay(attempt: int) -> float:
+    """第 *attempt* 次重试前的等待时间（full jitter 指数退避）。"""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2**attempt))
+
+
+def _status_failure(resp: httpx.Response) -> LLMError | None:
+    """处理上游的错误状态码：不应重试的返回要抛出的异常，可重试的返回 ``None``。"""
+    code = resp.status_code
+    logger.error("LLM error %s: %s", code, resp.text)
+    if 400 <= code < 500 and code != 429:
+        # 上游可达，只是拒绝了这个请求
+        breaker.record_success()
+        return LLMError(code, f"LLM returned {code}")
+    breaker.record_failure()
+    return None
+
+
+async def chat(url: str, api_key: str, payload: dict) -> dict:
+    """向 *url* 发送 chat completion 请求并返回解析后的 JSON。
+
+    网络错误、429 和 5xx 会按退避策略重试；其他 4xx 直接以同样的状态码失败。
+    熔断器打开时抛出 503，重试耗尽时抛出 502。
+    """
+    global _in_flight
+    if _client is None:
+        start()
+    headers = {"Authorization": f"Bearer {api_key}"}
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not breaker.allow():
+            raise LLMError(503, "LLM service temporarily unavailable")
+        try:
+            async with _semaphore:
+                _in_flight += 1
+                try:
+                    resp = await _client.post(url, headers=headers, json=payload)
+                finally:
+                    _in_flight -= 1
+        except httpx.RequestError as exc:
+            logger.error("LLM network error: %s", exc)
+            breaker.record_failure()
+        else:
+            if resp.status_code < 400:
+                breaker.record_success()
+                return resp.json()
+            failure = _status_failure(resp)
+            if failure is not None:
+                raise failure
+        if attempt < LLM_MAX_RETRIES:
+            await asyncio.sleep(backoff_delay(attempt))
+    raise LLMError(502, "LLM service unavailable after retries")
+
+
+async def stream_chat(url: str, api_key: str, payload: dict):
+    """以 ``stream: True`` 请求上游，逐个产出回复的增量文本。
+
+    只有在收到第一个增量之前的失败会按 :func:`chat` 的策略重试。调用方提前
+    关闭该异步生成器（例如客户端断开）时，上游连接随之立即释放。
+    """
+    global _in_flight
+    if _client is None:
+        start()
+    headers = {"Authorization": f"Bearer {api_key}"}
+    payload = {**payload, "stream": True}
+    started = False
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not breaker.allow():
+            raise LLMError(503, "LLM service temporarily unavailable")
+        try:
+            async with _semaphore:
+                _in_flight += 1
+                try:
+                    async with _client.stream(
+                        "POST", url, headers=headers, json=payload
+                    ) as resp:
+                        if resp.status_code >= 400:
+                            await resp.aread()
+                            failure = _status_failure(resp)
+                            if failure is not None:
+                                raise failure
+                        else:
+                            breaker.record_success()
+                            started = True
+                            async for delta in _iter_deltas(resp):
+                                yield delta
+                            return
+                finally:
+                    _in_flight -= 1
+        except httpx.RequestError as exc:
+            logger.error("LLM network error: %s", exc)
+            breaker.record_failure()
+            if started:
+                raise LLMError(502, "LLM stream interrupted")
+        if attempt < LLM_MAX_RETRIES:
+            await asyncio.sleep(backoff_delay(attempt))
+    raise LLMError(502, "LLM service unavailable after retries")
+
+
+async def _iter_deltas(resp: httpx.Response):
+    """解析上游的 SSE 响应，产出每个 chunk 中的 ``delta.content``。"""
+    async for line in resp.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            return
+        try:
+            choices = json.loads(data).get("choices") or [{}]
+        except ValueError:
+            logger.error("LLM sent malformed stream chunk: %s", data)
+            continue
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            yield content
+
+
+def stats() -> dict:
+    """返回熔断器状态和当前并发数。"""
+    return {
+        "breaker": breaker.state,
+        "consecutive_failures": breaker.failures,
+        "in_flight": _in_flight,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+    }
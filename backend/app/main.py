@@ -5,46 +5,140 @@
 行为与原实现保持一致。
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status, Response
+from fastapi import (
+    FastAPI,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+    BackgroundTasks,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from typing import List
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 from jose import JWTError
-import json
 import os
 from dotenv import load_dotenv
-import csv
-import io
 import asyncio
-import httpx
 import logging
-from sqlmodel import select
-from sqlalchemy import func
-
-from .database import init_db, get_session
+import orjson
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .database import (
+    init_db,
+    get_session,
+    request_session,
+    async_request_session,
+)
 from .models import User, Word
 from .schemas import (
     UserCreate,
     Token,
     WordOut,
+    WordSuggestion,
     ReviewIn,
+    ReviewBatchItem,
+    ReviewScheduleOut,
     StatsOut,
+    DailyStatOut,
     UserOut,
     UserUpdate,
     PasswordUpdate,
     TranslationRequest,
+    TranslationBatchRequest,
+    TranslationBatchResult,
     ArticleRequest,
 )
-from . import crud, security
+from . import (
+    crud,
+    crud_async,
+    wordbook_cache,
+    security,
+    search_index,
+    fuzzy_index,
+    fulltext,
+    word_cache,
+    export,
+    auth_cache,
+    scheduler,
+    startup,
+    translation_cache,
+    llm_client,
+    batch_translate,
+    article_cache,
+)
 from .security import create_access_token, decode_token
 
 # 如存在本地 .env 文件则加载其中的变量
 load_dotenv()
 
-app = FastAPI(title="Word Cards")
 logger = logging.getLogger("uvicorn.error")
 
+WORDBOOK_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "wordbooks")
+DEFAULT_BOOK = os.environ.get("WORDBOOK_NAME", "TEST")
+# 为 0 时在开始接受请求前完成全部启动阶段，否则这些阶段在后台执行
+STARTUP_IN_BACKGROUND = os.environ.get("STARTUP_IN_BACKGROUND", "1") != "0"
+
+
+def seed_words():
+    """首次运行时用默认词书填充空的单词表。"""
+    book_file = os.path.join(WORDBOOK_DIR, f"wordBook_{DEFAULT_BOOK}.json")
+    if not os.path.exists(book_file):
+        book_file = os.path.join(
+            os.path.dirname(__file__), "..", "..", "TEST_Words.json"
+        )
+    crud.seed_words(book_file)
+
+
+# 建表之后的启动阶段，按顺序执行
+STARTUP_PHASES = [
+    ("seed_words", seed_words),
+    # 确保默认管理员账户存在
+    ("default_admin", crud.ensure_default_admin),
+    # 与词书同步以便新单词获得 ID
+    ("sync_wordbooks", lambda: crud.sync_wordbooks(WORDBOOK_DIR)),
+    # 同步完成后构建内存前缀索引，供自动补全使用
+    ("search_index", search_index.rebuild),
+    # 已有数据库首次启用全文索引时，为现有单词回填
+    ("fulltext", fulltext.backfill),
+    # 容错搜索用的三元组索引
+    ("fuzzy_index", fuzzy_index.rebuild),
+    ("translation_cache", translation_cache.purge_expired),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：先建表，其余启动阶段在后台（或同步）执行。"""
+    startup.state = state = startup.Startup()
+    llm_client.start()
+    # 所有路由都依赖数据表，建表很快，在接受请求前完成
+    with state.phase("init_db"):
+        await run_in_threadpool(init_db)
+    # 首次启用每日汇总表时用已有的复习记录回填。回填以“汇总表为空”为条件，
+    # 必须在接受请求前完成，否则后台阶段期间记录的复习会让历史永远不被回填
+    with state.phase("backfill_daily_stats"):
+        await run_in_threadpool(crud.backfill_daily_stats)
+    task = asyncio.create_task(run_in_threadpool(state.run, STARTUP_PHASES))
+    if not STARTUP_IN_BACKGROUND:
+        await task
+    try:
+        yield
+    finally:
+        # 启动线程无法中断，关闭时等待其结束，避免留下未完成的事务
+        await task
+        await llm_client.close()
+
+
+app = FastAPI(title="Word Cards", lifespan=lifespan)
+
 # 允许前端开发服务器访问 API
 # 为了方便在开发环境不同端口访问，放开所有来源。
 app.add_middleware(
@@ -55,52 +149,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应，供返回大量单词的接口使用。"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 # 翻译 API 配置，需在环境变量中设置 TRANSLATE_API_KEY 才能启用。
 TRANSLATE_API_URL = "https://api.siliconflow.cn/v1/chat/completions"
 TRANSLATE_API_KEY = os.environ.get("TRANSLATE_API_KEY")
+TRANSLATE_MODEL = os.environ.get("TRANSLATE_MODEL", "deepseek-ai/DeepSeek-V3")
 
-init_db()
-
-# 首次运行时从 JSON 导入单词
-
-# 如果是第一次运行，创建 SQLite 数据库文件并用默认词书初始化。
-if not os.path.exists("wordcards.db"):
-    init_db()
 
-WORDBOOK_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "wordbooks")
-DEFAULT_BOOK = os.environ.get("WORDBOOK_NAME", "TEST")
+@app.get("/healthz")
+def healthz():
+    """存活检查：进程能处理请求即返回 200。"""
+    return {"status": "ok"}
 
-with get_session() as session:
-    if not session.exec(select(Word)).first():
-        # 读取内置词书 JSON 并填充 Words 表
-        book_file = os.path.join(WORDBOOK_DIR, f"wordBook_{DEFAULT_BOOK}.json")
-        if not os.path.exists(book_file):
-            book_file = os.path.join(
-                os.path.dirname(__file__), "..", "..", "TEST_Words.json"
-            )
-        with open(book_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            for w in data:
-                word = Word(
-                    word=w["word"],
-                    translations=json.dumps(w["translations"], ensure_ascii=False),
-                    phrases=json.dumps(w.get("phrases", []), ensure_ascii=False),
-                )
-                session.add(word)
-            session.commit()
 
-    # 确保默认管理员账户存在
-    crud.ensure_default_admin()
-    # 与词书同步以便新单词获得 ID
-    crud.sync_wordbooks(WORDBOOK_DIR)
+@app.get("/readyz")
+def readyz():
+    """就绪检查：启动阶段全部完成后返回 200，否则返回 503 及各阶段耗时。"""
+    state = startup.state
+    return JSONResponse(state.snapshot(), status_code=200 if state.ready else 503)
 
 
 @app.post("/auth/register", response_model=Token)
-def register(user: UserCreate):
+async def register(user: UserCreate):
     """创建新用户并返回访问令牌。"""
-    u = crud.create_user(user.username, user.password)
+    hashed = await security.get_password_hash_async(user.password)
+    u = await run_in_threadpool(crud.add_user, user.username, hashed)
     if not u:
         # 数据库层面已保证用户名唯一
         raise HTTPException(status_code=400, detail="Username taken")
@@ -109,13 +191,23 @@ def register(user: UserCreate):
 
 
 @app.post("/auth/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    """验证用户并签发 JWT 访问令牌。"""
-    user = crud.authenticate_user(form_data.username, form_data.password)
-    if not user:
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+    """验证用户并签发 JWT 访问令牌。
+
+    bcrypt 校验在专用进程池中完成；若哈希成本参数已调整，则顺带重新哈希。
+    """
+    user = await run_in_threadpool(crud.get_user_by_username, form_data.username)
+    ok, new_hash = False, None
+    if user:
+        ok, new_hash = await security.verify_and_update_async(
+            form_data.password, user.hashed_password
+        )
+    if not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
+    if new_hash:
+        await run_in_threadpool(crud.set_password_hash, user.id, new_hash)
     access = create_access_token({"sub": str(user.id)})
     return Token(access_token=access)
 
@@ -134,8 +226,18 @@ def refresh(token: str = Depends(oauth2_scheme)):
     return Token(access_token=access)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    """返回当前已认证的用户的依赖。"""
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(async_request_session),
+):
+    """返回当前已认证用户身份的依赖。
+
+    验证过的令牌会缓存在 :mod:`auth_cache` 中，命中时不再访问数据库；
+    未命中时通过异步引擎查询，不占用线程池。
+    """
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
     credentials_exception = HTTPException(
         status_code=401, detail="Could not validate credentials"
     )
@@ -146,131 +248,147 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    with get_session() as session:
-        user = session.get(User, int(user_id))
-        if user is None:
-            raise credentials_exception
-        return user
+    user = await crud_async.get_user(int(user_id), session)
+    if user is None:
+        raise credentials_exception
+    identity = UserOut(id=user.id, username=user.username, role=user.role)
+    auth_cache.put(token, identity, payload.get("exp"))
+    return identity
 
 
-@app.get("/words/today", response_model=List[WordOut])
-def words_today(
-    limit: int | None = None, current_user: User = Depends(get_current_user)
+@app.get("/words/today", response_model=List[WordOut], response_class=ORJSONResponse)
+async def words_today(
+    limit: int | None = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(async_request_session),
 ):
     """返回当前用户今日应复习的单词。"""
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    reviewed_today = 0
     if limit:
-        with get_session() as session:
-            reviewed_today = session.exec(
-                select(func.count())
-                .select_from(crud.ReviewLog)
-                .where(
-                    crud.ReviewLog.user_id == current_user.id,
-                    crud.ReviewLog.reviewed_at >= today_start,
-                )
-            ).one()
+        reviewed_today = await crud_async.count_reviews_on(
+            current_user.id, datetime.utcnow().date(), session
+        )
         remaining = max(limit - reviewed_today, 0)
     else:
         remaining = None
 
-    words = crud.get_due_words(current_user.id, remaining)
-    result = []
-    for w in words:
-        result.append(
-            WordOut(
-                id=w.id,
-                word=w.word,
-                translations=json.loads(w.translations),
-                phrases=json.loads(w.phrases) if w.phrases else [],
-            )
+    words = await crud_async.get_due_words(current_user.id, remaining, session)
+    return ORJSONResponse(word_cache.payloads(words))
+
+
+# 单次批量提交的最大记录数，避免 IN 列表过长
+MAX_REVIEW_BATCH = 500
+
+
+@app.post("/review/batch", response_model=List[ReviewScheduleOut])
+def review_batch(
+    reviews: List[ReviewBatchItem], current_user: User = Depends(get_current_user)
+):
+    """在一个事务中提交多条复习记录，返回每个单词的最新调度。"""
+    if len(reviews) > MAX_REVIEW_BATCH:
+        raise HTTPException(
+            status_code=400, detail=f"Too many reviews (limit {MAX_REVIEW_BATCH})"
         )
-    return result
+    records = []
+    for r in reviews:
+        reviewed_at = r.reviewed_at
+        # 数据库中统一保存不带时区的 UTC 时间
+        if reviewed_at is not None and reviewed_at.tzinfo is not None:
+            reviewed_at = reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        records.append((r.word_id, r.quality, reviewed_at))
+    return crud.record_reviews(current_user.id, records)
 
 
 @app.post("/review/{word_id}")
-def review_word(
-    word_id: int, info: ReviewIn, current_user: User = Depends(get_current_user)
+async def review_word(
+    word_id: int,
+    info: ReviewIn,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(async_request_session),
 ):
     """记录对指定单词的复习质量评分。"""
-    crud.record_review(current_user.id, word_id, info.quality)
+    await crud_async.record_review(current_user.id, word_id, info.quality, session)
     return {"status": "ok"}
 
 
-@app.get("/search", response_model=List[WordOut])
-def search(q: str, current_user: User = Depends(get_current_user)):
-    """搜索拼写或翻译中包含 *q* 的单词。"""
-    words = crud.search_words(q)
-    result = []
-    for w in words:
-        result.append(
-            WordOut(
-                id=w.id,
-                word=w.word,
-                translations=json.loads(w.translations),
-                phrases=json.loads(w.phrases) if w.phrases else [],
-            )
-        )
-    return result
+@app.get("/search", response_model=List[WordOut], response_class=ORJSONResponse)
+async def search(
+    q: str,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(async_request_session),
+):
+    """搜索词头、释义或短语中包含 *q* 的单词，按相关度排序并分页。
+
+    第一页没有任何单词包含 *q* 时，改为返回拼写与 *q* 相近的单词
+    （按编辑距离排序），以容忍拼写错误。
+    """
+    words = await crud_async.search_words(q, limit, offset, session)
+    if not words and offset == 0:
+        matches = fuzzy_index.match(q, limit)
+        words = await crud_async.get_words([i for i, _ in matches], session)
+    return ORJSONResponse(word_cache.payloads(words))
+
+
+@app.get("/search/suggest", response_model=List[WordSuggestion])
+async def search_suggest(
+    q: str, limit: int = 10, current_user: User = Depends(get_current_user)
+):
+    """根据内存前缀索引返回以 *q* 开头的单词，用于输入时自动补全。"""
+    limit = max(min(limit, 50), 1)
+    return [
+        WordSuggestion(id=word_id, word=word)
+        for word_id, word in search_index.suggest(q, limit)
+    ]
 
 
 @app.get("/stats/overview", response_model=StatsOut)
-def stats_overview(
-    limit: int | None = None, current_user: User = Depends(get_current_user)
+async def stats_overview(
+    limit: int | None = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(async_request_session),
 ):
-    with get_session() as session:
-        result = session.exec(
-            select(func.count())
-            .select_from(crud.ReviewLog)
-            .where(crud.ReviewLog.user_id == current_user.id)
-        )
-        reviewed = result.one()
+    """返回已复习数、到期数和最近的复习日期，只需一次聚合查询。"""
+    reviewed, due, next_due = await crud_async.review_overview(
+        current_user.id, limit, session
+    )
+    return StatsOut(reviewed=reviewed, due=due, next_due=next_due)
 
-        due_words = crud.get_due_words(current_user.id)
-        if limit:
-            today_start = datetime.utcnow().replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            reviewed_today = session.exec(
-                select(func.count())
-                .select_from(crud.ReviewLog)
-                .where(
-                    crud.ReviewLog.user_id == current_user.id,
-                    crud.ReviewLog.reviewed_at >= today_start,
-                )
-            ).one()
-            remaining = max(limit - reviewed_today, 0)
-            due_words = due_words[:remaining]
-
-        next_due_result = session.exec(
-            select(func.min(crud.ReviewLog.next_review)).where(
-                crud.ReviewLog.user_id == current_user.id
-            )
-        )
-        next_due = next_due_result.one()
 
-        return StatsOut(reviewed=reviewed, due=len(due_words), next_due=next_due)
+@app.get("/stats/daily", response_model=List[DailyStatOut])
+def stats_daily(
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    current_user: User = Depends(get_current_user),
+):
+    """返回日期区间内每天的复习次数（默认最近 30 天），供统计图表使用。"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+    return crud.daily_review_stats(current_user.id, start, end)
 
 
 @app.get("/stats/export")
 def stats_export(current_user: User = Depends(get_current_user)):
-    logs = crud.get_review_logs(current_user.id)
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(
-        ["word_id", "quality", "last_interval", "next_review", "reviewed_at"]
+    """以流式 CSV 导出当前用户的全部复习记录。"""
+    return StreamingResponse(
+        export.iter_user_csv(current_user.id),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="review_logs.csv"'},
+    )
+
+
+@app.get("/admin/logs/export")
+def admin_export_logs(current_user: User = Depends(get_current_user)):
+    """以流式 ZIP 导出所有用户的复习记录，每个用户一个 CSV（仅管理员）。"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return StreamingResponse(
+        export.iter_all_users_zip(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="review_logs.zip"'},
     )
-    for log in logs:
-        writer.writerow(
-            [
-                log.word_id,
-                log.quality,
-                log.last_interval,
-                log.next_review.isoformat(),
-                log.reviewed_at.isoformat(),
-            ]
-        )
-    return Response(content=output.getvalue(), media_type="text/csv")
 
 
 @app.get("/wordbooks")
@@ -284,14 +402,48 @@ def list_wordbooks():
 
 
 @app.get("/wordbook/{name}")
-def get_wordbook(name: str):
-    """返回指定词书的原始单词列表。"""
+def get_wordbook(
+    name: str,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=0),
+):
+    """返回指定词书的原始单词列表。
+
+    解析和编码结果按文件修改时间缓存，支持 ETag/Last-Modified 条件请求、
+    预压缩的 gzip/brotli 正文，以及可选的 ``offset``/``limit`` 分页。
+    """
     filename = os.path.join(WORDBOOK_DIR, f"wordBook_{name}.json")
-    if not os.path.exists(filename):
+    entry = wordbook_cache.get(filename)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Word book not found")
-    with open(filename, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data
+    paged = offset > 0 or limit is not None
+    etag = entry.page_etag(offset, limit) if paged else entry.etag
+    headers = {
+        "ETag": etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if entry.not_modified(
+        etag,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    ):
+        return Response(status_code=304, headers=headers)
+    if paged:
+        headers["X-Total-Count"] = str(len(entry.data))
+        return Response(
+            entry.page(offset, limit), media_type="application/json", headers=headers
+        )
+    encoding = wordbook_cache.choose_encoding(
+        request.headers.get("accept-encoding"), entry
+    )
+    body = entry.body
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = entry.encoded[encoding]
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @app.get("/admin/users")
@@ -304,13 +456,62 @@ def admin_users(current_user: User = Depends(get_current_user)):
 
 
 @app.put("/admin/users/{user_id}/reset_pwd")
-def admin_reset(
+async def admin_reset(
     user_id: int, password: str, current_user: User = Depends(get_current_user)
 ):
     """为指定用户重置密码（仅管理员）。"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-    crud.reset_password(user_id, password)
+    hashed = await security.get_password_hash_async(password)
+    await run_in_threadpool(crud.set_password_hash, user_id, hashed)
+    return {"status": "ok"}
+
+
+@app.post("/admin/reschedule")
+def admin_reschedule(
+    user_id: int | None = None, current_user: User = Depends(get_current_user)
+):
+    """按当前 SM-2 参数重新计算复习计划，可限定单个用户（仅管理员）。"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {"updated": scheduler.reschedule(user_id)}
+
+
+@app.get("/admin/metrics/password_hash")
+def admin_hash_metrics(current_user: User = Depends(get_current_user)):
+    """返回密码哈希进程池的排队与耗时统计（仅管理员）。"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return security.hash_pool_stats()
+
+
+@app.get("/admin/metrics/translation_cache")
+def admin_translation_cache_metrics(current_user: User = Depends(get_current_user)):
+    """返回翻译缓存的命中率统计（仅管理员）。"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return translation_cache.stats()
+
+
+@app.get("/admin/metrics/llm")
+def admin_llm_metrics(current_user: User = Depends(get_current_user)):
+    """返回 LLM 客户端的熔断器状态与并发数（仅管理员）。"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return llm_client.stats()
+
+
+@app.put("/admin/users/{user_id}/role")
+def admin_set_role(
+    user_id: int, role: str, current_user: User = Depends(get_current_user)
+):
+    """修改指定用户的角色（仅管理员）。"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if role not in ("user", "admin"):
+        raise HTTPException(status_code=400, detail="Invalid role")
+    if not crud.set_role(user_id, role):
+        raise HTTPException(status_code=404, detail="User not found")
     return {"status": "ok"}
 
 
@@ -323,27 +524,29 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 
 @app.put("/users/me", response_model=UserOut)
-def update_me(info: UserUpdate, current_user: User = Depends(get_current_user)):
+def update_me(
+    info: UserUpdate,
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(request_session),
+):
     """更新当前账户的用户名。"""
-    with get_session() as session:
-        user = session.get(User, current_user.id)
-        user.username = info.username
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-        return UserOut(id=user.id, username=user.username, role=user.role)
+    user = crud.set_username(current_user.id, info.username, session)
+    return UserOut(id=user.id, username=user.username, role=user.role)
 
 
 @app.put("/users/me/password")
-def change_password(
+async def change_password(
     info: PasswordUpdate, current_user: User = Depends(get_current_user)
 ):
     """修改当前用户的密码。"""
-    with get_session() as session:
-        user = session.get(User, current_user.id)
-        if not security.verify_password(info.old_password, user.hashed_password):
-            raise HTTPException(status_code=400, detail="Incorrect password")
-    crud.reset_password(current_user.id, info.new_password)
+    user = await run_in_threadpool(crud.get_user, current_user.id)
+    ok, _ = await security.verify_and_update_async(
+        info.old_password, user.hashed_password
+    )
+    if not ok:
+        raise HTTPException(status_code=400, detail="Incorrect password")
+    hashed = await security.get_password_hash_async(info.new_password)
+    await run_in_threadpool(crud.set_password_hash, current_user.id, hashed)
     return {"status": "ok"}
 
 
@@ -355,23 +558,24 @@ def request_delete(current_user: User = Depends(get_current_user)):
 
 
 @app.get("/admin/deletion_requests")
-def admin_list_deletions(current_user: User = Depends(get_current_user)):
+def admin_list_deletions(
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(request_session),
+):
     """获取所有待处理的删除请求（仅管理员）。"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
-    reqs = crud.list_deletion_requests()
     result = []
-    with get_session() as session:
-        for r in reqs:
-            user = session.get(User, r.user_id)
-            if user:
-                result.append(
-                    {
-                        "user_id": user.id,
-                        "username": user.username,
-                        "requested_at": r.requested_at.isoformat(),
-                    }
-                )
+    for r in crud.list_deletion_requests(session):
+        user = session.get(User, r.user_id)
+        if user:
+            result.append(
+                {
+                    "user_id": user.id,
+                    "username": user.username,
+                    "requested_at": r.requested_at.isoformat(),
+                }
+            )
     return result
 
 
@@ -387,9 +591,92 @@ def admin_approve_delete(user_id: int, current_user: User = Depends(get_current_
 
 
 # 使用外部 API 的简单翻译接口
+def chat_payload(
+    system_prompt: str, user_prompt: str, max_tokens: int, temperature: float
+) -> dict:
+    """构造发往 LLM 的 chat completion 请求体。"""
+    return {
+        "model": TRANSLATE_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        "stream": False,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_p": 1,
+        "n": 1,
+        "response_format": {"type": "text"},
+    }
+
+
+async def complete(
+    system_prompt: str, user_prompt: str, max_tokens: int, temperature: float
+) -> str:
+    """通过共享的 LLM 客户端完成一次对话，返回去除首尾空白的回复。"""
+    data = await llm_client.chat(
+        TRANSLATE_API_URL,
+        TRANSLATE_API_KEY,
+        chat_payload(system_prompt, user_prompt, max_tokens, temperature),
+    )
+    return data["choices"][0]["message"]["content"].strip()
+
+
+def sse_event(data: dict, event: str | None = None) -> bytes:
+    """编码一条 server-sent event。"""
+    head = f"event: {event}\n" if event else ""
+    return (head + "data: " + orjson.dumps(data).decode() + "\n\n").encode()
+
+
+async def stream_completion(
+    system_prompt: str,
+    user_prompt: str,
+    max_tokens: int,
+    temperature: float,
+    on_done=None,
+):
+    """把 LLM 的流式回复转成 SSE：每个增量一条 ``{"delta"}`` 事件。
+
+    结束时发送 ``done`` 事件携带完整结果（并调用 ``await on_done(result)``），
+    失败时发送 ``error`` 事件。客户端断开时 Starlette 会取消本生成器，
+    上游流随之关闭。
+    """
+    parts = []
+    try:
+        async for delta in llm_client.stream_chat(
+            TRANSLATE_API_URL,
+            TRANSLATE_API_KEY,
+            chat_payload(system_prompt, user_prompt, max_tokens, temperature),
+        ):
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+    except llm_client.LLMError as exc:
+        yield sse_event({"status": exc.status_code, "detail": exc.detail}, "error")
+        return
+    result = "".join(parts).strip()
+    if on_done is not None:
+        await on_done(result)
+    yield sse_event({"result": result}, "done")
+
+
+def sse_response(events) -> StreamingResponse:
+    """返回禁用缓存和代理缓冲的 SSE 响应。"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.exception_handler(llm_client.LLMError)
+async def llm_error_handler(request: Request, exc: llm_client.LLMError):
+    """把 LLM 调用失败转换为对应状态码的错误响应。"""
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+
+
 @app.post("/translate")
-async def translate(payload: TranslationRequest):
-    """通过外部 LLM 服务翻译任意文本。"""
+async def translate(payload: TranslationRequest, stream: bool = False):
+    """通过外部 LLM 服务翻译任意文本；``stream=true`` 时以 SSE 逐段返回。"""
     text = payload.text
     lang = payload.lang
     if not TRANSLATE_API_KEY:
@@ -403,158 +690,178 @@ async def translate(payload: TranslationRequest):
     )
     user_prompt = f"Translate the text to {lang}, please do not explain any sentences, just translate or leave them as they are.:\n{text}"
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        backoff = [0.5, 1.5, 3.0]
-        for delay in backoff:
-            try:
-                resp = await client.post(
-                    TRANSLATE_API_URL,
-                    headers={
-                        "Authorization": f"Bearer {TRANSLATE_API_KEY}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "deepseek-ai/DeepSeek-V3",
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt},
-                        ],
-                        "stream": False,
-                        "max_tokens": 1000,
-                        "temperature": 0,
-                        "top_p": 1,
-                        "n": 1,
-                        "response_format": {"type": "text"},
-                    },
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                result = data["choices"][0]["message"]["content"].strip()
-                return {"result": result}
-            except httpx.HTTPStatusError as exc:
-                logger.error(
-                    "DeepSeek error %s: %s", exc.response.status_code, exc.response.text
-                )
-                if 400 <= exc.response.status_code < 500:
-                    raise HTTPException(
-                        exc.response.status_code,
-                        f"LLM returned {exc.response.status_code}",
-                    )
-            except httpx.RequestError as exc:
-                logger.error("Network error: %s", exc)
-            await asyncio.sleep(delay)
+    if stream:
+        cached = await translation_cache.lookup(text, lang, TRANSLATE_MODEL)
+        if cached is not None:
+            return sse_response(iter([sse_event({"result": cached}, "done")]))
+
+        async def remember(result):
+            await translation_cache.store(text, lang, TRANSLATE_MODEL, result)
+
+        return sse_response(
+            stream_completion(
+                system_prompt, user_prompt, 1000, temperature=0, on_done=remember
+            )
+        )
+
+    async def call_upstream():
+        return await complete(
+            system_prompt, user_prompt, max_tokens=1000, temperature=0
+        )
+
+    # 相同的 (text, lang, model) 直接复用缓存，并发的相同请求只调用一次上游
+    result = await translation_cache.translate(
+        text, lang, TRANSLATE_MODEL, call_upstream
+    )
+    return {"result": result}
+
+
+# 单次批量翻译的最大条目数
+MAX_TRANSLATE_BATCH = 200
+
+
+@app.post("/translate/batch", response_model=List[TranslationBatchResult])
+async def translate_batch(payload: TranslationBatchRequest):
+    """批量翻译多条文本，按输入顺序返回结果；部分失败时其余条目照常返回。"""
+    if not TRANSLATE_API_KEY:
         raise HTTPException(
-            status.HTTP_502_BAD_GATEWAY, "Translation service unavailable after retries"
+            status_code=500, detail="Translation API key not configured"
+        )
+    if len(payload.items) > MAX_TRANSLATE_BATCH:
+        raise HTTPException(
+            status_code=400, detail=f"Too many items (limit {MAX_TRANSLATE_BATCH})"
+        )
+    keys = [(item.text, item.lang) for item in payload.items]
+    results, errors = await batch_translate.translate_many(
+        keys, TRANSLATE_MODEL, complete
+    )
+    return [
+        TranslationBatchResult(
+            text=text,
+            lang=lang,
+            result=results.get((text, lang)),
+            error=errors.get((text, lang)),
         )
+        for text, lang in keys
+    ]
+
+
+def warm_article_cache(background: BackgroundTasks, user_id: int):
+    """启用预热时，在响应之后为用户的当前收藏生成文章。"""
+    if article_cache.ARTICLE_CACHE_WARM and TRANSLATE_API_KEY:
+        background.add_task(article_cache.warm_user, user_id, complete)
 
 
 @app.post("/favorites/{word_id}")
-def add_fav(word_id: int, current_user: User = Depends(get_current_user)):
+def add_fav(
+    word_id: int,
+    background: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+):
     """将单词加入用户的收藏列表。"""
     crud.add_favorite(current_user.id, word_id)
+    warm_article_cache(background, current_user.id)
     return {"status": "ok"}
 
 
 @app.delete("/favorites/{word_id}")
-def remove_fav(word_id: int, current_user: User = Depends(get_current_user)):
+def remove_fav(
+    word_id: int,
+    background: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+):
     """从收藏中移除单词。"""
     ok = crud.remove_favorite(current_user.id, word_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Not found")
+    warm_article_cache(background, current_user.id)
     return {"status": "ok"}
 
 
-@app.get("/favorites", response_model=List[WordOut])
-def list_fav(q: str | None = None, current_user: User = Depends(get_current_user)):
-    """列出当前用户收藏的单词。"""
-    words = crud.list_favorites(current_user.id, q)
-    result = []
-    for w, added_at in words:
-        result.append(
-            WordOut(
-                id=w.id,
-                word=w.word,
-                translations=json.loads(w.translations),
-                phrases=json.loads(w.phrases) if w.phrases else [],
-                added_at=added_at,
-            )
-        )
-    return result
+@app.get("/favorites", response_model=List[WordOut], response_class=ORJSONResponse)
+async def list_fav(
+    q: str | None = None,
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = None,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(async_request_session),
+):
+    """列出当前用户收藏的单词，按收藏时间倒序。
+
+    指定 ``limit`` 时分页返回；还有下一页时在 ``X-Next-Cursor`` 响应头中给出
+    游标，作为下一次请求的 ``cursor`` 参数。
+    """
+    after = None
+    if cursor:
+        try:
+            after = crud.parse_favorites_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = await crud_async.list_favorites(current_user.id, q, limit, after, session)
+    headers = {}
+    if limit is not None and len(rows) == limit:
+        _, added_at, favorite_id = rows[-1]
+        headers["X-Next-Cursor"] = crud.favorites_cursor(added_at, favorite_id)
+    # 缓存中的字典是共享的，收藏时间需合并到副本中
+    return ORJSONResponse(
+        [{**word_cache.payload(w), "added_at": added_at} for w, added_at, _ in rows],
+        headers=headers,
+    )
 
 
 @app.post("/generate_article")
 async def generate_article(
-    payload: ArticleRequest, current_user: User = Depends(get_current_user)
+    payload: ArticleRequest,
+    background: BackgroundTasks,
+    stream: bool = False,
+    current_user: User = Depends(get_current_user),
 ):
-    """使用提供的单词列表生成简短段落。"""
-    # 从数据库获取单词
+    """使用提供的单词列表生成简短段落；``stream=true`` 时以 SSE 逐段返回。
+
+    相同单词集合的文章会被缓存并轮换返回，缓存版本不足时在后台补齐。
+    """
+    # 从数据库获取单词；生成可能持续数秒，取完即关闭会话以免长时间占用连接
     with get_session() as session:
-        stmt = select(Word).where(Word.id.in_(payload.word_ids))
-        words = [w.word for w in session.exec(stmt)]
+        stmt = select(Word).where(Word.id.in_(payload.word_ids)).order_by(Word.id)
+        rows = session.exec(stmt).all()
 
-    if not words:
+    if not rows:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Word list is empty")
-    if len(words) > 30:
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Too many words (limit 30)")
-
-    # 构造语言模型的提示词
-    system_prompt = (
-        "You are a helpful writing assistant. "
-        "When the user provides a list of words, compose a ~100-word passage "
-        "that naturally uses ALL the words. Do NOT add extra words to the list."
-    )
-    user_prompt = (
-        "Please write a 100-word passage using the following words:\n"
-        + ", ".join(words)
-    )
+    if len(rows) > article_cache.MAX_ARTICLE_WORDS:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Too many words (limit {article_cache.MAX_ARTICLE_WORDS})",
+        )
 
     if not TRANSLATE_API_KEY:
         raise HTTPException(
             status.HTTP_500_INTERNAL_SERVER_ERROR, "API KEY not configured"
         )
 
-    # 调用外部 LLM 服务并重试
-    async with httpx.AsyncClient(timeout=20) as client:
-        backoff = [0.5, 1.5, 3.0]
-        for delay in backoff:
-            try:
-                resp = await client.post(
-                    TRANSLATE_API_URL,
-                    headers={
-                        "Authorization": f"Bearer {TRANSLATE_API_KEY}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "deepseek-ai/DeepSeek-V3",
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt},
-                        ],
-                        "stream": False,
-                        "max_tokens": 256,
-                        "temperature": 0.7,
-                        "top_p": 1,
-                        "n": 1,
-                        "response_format": {"type": "text"},
-                    },
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                article = data["choices"][0]["message"]["content"].strip()
-                return {"result": article}
-            except httpx.HTTPStatusError as exc:
-                logger.error(
-                    "DeepSeek error %s: %s", exc.response.status_code, exc.response.text
-                )
-                if 400 <= exc.response.status_code < 500:
-                    raise HTTPException(
-                        exc.response.status_code,
-                        f"LLM returned {exc.response.status_code}",
-                    )
-            except httpx.RequestError as exc:
-                logger.error("Network error: %s", exc)
-            await asyncio.sleep(delay)
-
-    raise HTTPException(
-        status.HTTP_502_BAD_GATEWAY, "LLM service unavailable after retries"
+    words = [w.word for w in rows]
+    key = article_cache.cache_key(w.id for w in rows)
+    article, variants = await article_cache.get(key)
+    if article is not None:
+        if variants < article_cache.ARTICLE_CACHE_VARIANTS:
+            background.add_task(article_cache.fill, key, words, complete)
+        if stream:
+            return sse_response(iter([sse_event({"result": article}, "done")]))
+        return {"result": article}
+
+    system_prompt = article_cache.SYSTEM_PROMPT
+    user_prompt = article_cache.user_prompt(words)
+    if stream:
+
+        async def remember(result):
+            await article_cache.put(key, result)
+
+        return sse_response(
+            stream_completion(
+                system_prompt, user_prompt, 256, temperature=0.7, on_done=remember
+            )
+        )
+    article = await complete(
+        system_prompt, user_prompt, max_tokens=256, temperature=0.7
     )
+    await article_cache.put(key, article)
+    return {"result": article}
@@ -3,6 +3,7 @@
 from typing import Optional
 from datetime import datetime, date
 from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, Index, func, text
 
 
 class User(SQLModel, table=True):
@@ -17,24 +18,97 @@ class User(SQLModel, table=True):
 class Word(SQLModel, table=True):
     """词汇条目及其翻译和例句。"""
 
+    # 单词不区分大小写地唯一，词书同步以此作为 ON CONFLICT DO NOTHING 的冲突依据
+    __table_args__ = (
+        Index("uq_word_lower_word", func.lower(text("word")), unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     word: str = Field(index=True)
     translations: str  # JSON 字符串
     phrases: Optional[str] = None  # JSON 字符串
 
 
+class WordbookFile(SQLModel, table=True):
+    """已同步词书文件的清单，用于在启动时跳过未变化的文件。"""
+
+    name: str = Field(primary_key=True)
+    sha256: str
+    mtime_ns: int = Field(sa_type=BigInteger)
+    size: int = Field(sa_type=BigInteger)
+    synced_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class ReviewLog(SQLModel, table=True):
     """每个用户/单词对的间隔重复历史。"""
 
+    # 调度查询按 (user_id, next_review) 做范围扫描；
+    # (user_id, word_id) 唯一，既供新词反连接探测，也是批量 upsert 的冲突目标；
+    # (user_id, reviewed_at) 供每日上限统计当天复习过的单词
+    __table_args__ = (
+        Index("ix_reviewlog_user_next", "user_id", "next_review"),
+        Index("ix_reviewlog_user_reviewed", "user_id", "reviewed_at"),
+        Index("uq_reviewlog_user_word", "user_id", "word_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     word_id: int = Field(foreign_key="word.id")
     quality: int
     last_interval: int
+    # SM-2 状态：连续成功次数与难度系数；server_default 便于给旧表补列
+    repetitions: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    ease_factor: float = Field(default=2.5, sa_column_kwargs={"server_default": "2.5"})
     next_review: date
     reviewed_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class DailyReviewStat(SQLModel, table=True):
+    """按用户、日期（UTC）和评分预聚合的复习次数，记录复习时增量更新。"""
+
+    __table_args__ = (
+        Index(
+            "uq_dailyreviewstat_user_day_quality",
+            "user_id",
+            "day",
+            "quality",
+            unique=True,
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id")
+    day: date
+    quality: int
+    count: int = 0
+
+
+class TranslationCache(SQLModel, table=True):
+    """持久化的翻译结果，以 (text, lang, model) 的哈希为主键。"""
+
+    key: str = Field(primary_key=True)
+    model: str
+    lang: str
+    result: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class ArticleCache(SQLModel, table=True):
+    """按单词集合缓存的生成文章，每个键可保存多个轮换使用的版本。"""
+
+    # 按键取版本，按最近使用时间做 LRU 淘汰
+    __table_args__ = (
+        Index("ix_articlecache_key_used", "key", "last_used_at"),
+        Index("ix_articlecache_last_used", "last_used_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    key: str
+    article: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class DeletionRequest(SQLModel, table=True):
     """用户请求删除账户的记录。"""
 
@@ -46,6 +120,13 @@ class DeletionRequest(SQLModel, table=True):
 class Favorite(SQLModel, table=True):
     """用户收藏以便日后查阅的单词。"""
 
+    # 收藏列表按 (added_at, id) 做键集分页；(user_id, word_id) 唯一，
+    # 也是收藏 upsert 的冲突目标
+    __table_args__ = (
+        Index("ix_favorite_user_added", "user_id", "added_at", "id"),
+        Index("uq_favorite_user_word", "user_id", "word_id", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
     word_id: int = Field(foreign_key="word.id")
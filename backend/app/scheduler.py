@@ -0,0 +1,165 @@
+"""SM-2 间隔重复调度。
+
+:func:`sm2_step` 在记录单次复习时计算新的 (repetitions, ease_factor, interval)。
+:func:`reschedule` 则在算法或参数调整后，按批读取已有的复习记录，用 NumPy
+向量化地重新推导间隔与下次复习日期，再以批量 ``UPDATE`` 写回数据库，
+无需逐行通过 ORM 更新。
+"""
+
+from dataclasses import dataclass
+from datetime import date
+import numpy as np
+from sqlalchemy import update
+from sqlmodel import select
+from .models import ReviewLog
+from .database import get_session
+
+
+@dataclass(frozen=True)
+class SM2Params:
+    """SM-2 算法的可调参数。"""
+
+    initial_ease: float = 2.5
+    min_ease: float = 1.3
+    first_interval: int = 1
+    second_interval: int = 6
+    # 对第三次及以后的间隔整体缩放，用于在记忆保持率与复习量之间权衡
+    interval_modifier: float = 1.0
+    # 间隔上限（天）；否则连续满分时间隔指数增长，日期会超出 date.max
+    max_interval: int = 36500
+
+
+DEFAULT_PARAMS = SM2Params()
+
+
+def sm2_step(
+    quality: int,
+    repetitions: int,
+    ease_factor: float,
+    interval: int,
+    params: SM2Params = DEFAULT_PARAMS,
+):
+    """根据 0–5 的评分计算一次复习后的 ``(repetitions, ease_factor, interval)``。"""
+    if quality >= 3:
+        if repetitions == 0:
+            interval = params.first_interval
+        elif repetitions == 1:
+            interval = params.second_interval
+        else:
+            interval = round(interval * ease_factor * params.interval_modifier)
+            interval = min(max(interval, 1), params.max_interval)
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval = params.first_interval
+    ease_factor += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return repetitions, max(ease_factor, params.min_ease), interval
+
+
+def sm2_intervals(repetitions, ease_factor, params: SM2Params = DEFAULT_PARAMS):
+    """由连续成功次数和难度系数向量化地推导当前间隔。
+
+    只保存了最近一次复习的状态，因此假设整个历史中难度系数不变，
+    按 SM-2 的递推式 ``I(n) = round(I(n-1) * EF)`` 逐步展开。
+    """
+    reps = np.asarray(repetitions, dtype=np.int64)
+    ease = np.asarray(ease_factor, dtype=np.float64)
+    interval = np.where(reps >= 2, params.second_interval, params.first_interval)
+    interval = interval.astype(np.float64)
+    factor = ease * params.interval_modifier
+    for step in range(3, int(reps.max(initial=0)) + 1):
+        grown = np.clip(np.rint(interval * factor), 1, params.max_interval)
+        interval = np.where(reps >= step, grown, interval)
+    return interval.astype(np.int64)
+
+
+def _legacy_repetitions(quality, repetitions, last_interval):
+    """估算旧版“间隔翻倍”算法写入的记录对应的连续成功次数。
+
+    旧算法不记录 repetitions，连续成功 k 次后间隔为 ``2**k``；
+    SM-2 中评分 >= 3 的记录 repetitions 至少为 1，据此识别旧记录。
+    """
+    legacy = (quality >= 3) & (repetitions == 0)
+    estimated = np.maximum(np.rint(np.log2(np.maximum(last_interval, 1))), 1)
+    return np.where(legacy, estimated.astype(np.int64), repetitions)
+
+
+def resume_state(quality: int, repetitions: int, ease_factor: float, interval: int):
+    """把已有复习记录换算为 :func:`sm2_step` 的输入状态。
+
+    升级前写入的旧记录补列后 repetitions 为 0，若直接使用会被当作新卡片，
+    下次复习间隔重置为 1 天；这里按 :func:`_legacy_repetitions` 估算其连续成功次数。
+    """
+    reps = _legacy_repetitions(quality, repetitions, interval)
+    return int(reps), ease_factor, interval
+
+
+def reschedule(
+    user_id: int | None = None,
+    params: SM2Params = DEFAULT_PARAMS,
+    batch_size: int = 10000,
+) -> int:
+    """按 *params* 重新计算复习记录的间隔与下次复习日期，返回更新的行数。
+
+    未指定 *user_id* 时处理整张表。读取与写回都按 *batch_size* 分批进行，
+    每批在一个事务中以按主键的批量 ``UPDATE`` 写回。
+    """
+    columns = (
+        ReviewLog.id,
+        ReviewLog.quality,
+        ReviewLog.repetitions,
+        ReviewLog.ease_factor,
+        ReviewLog.last_interval,
+        ReviewLog.reviewed_at,
+    )
+    statement = select(*columns).order_by(ReviewLog.id)
+    if user_id is not None:
+        statement = statement.where(ReviewLog.user_id == user_id)
+
+    updated = 0
+    last_id = 0
+    with get_session() as session:
+        while True:
+            # 按主键分页读取，写回不会干扰后续批次的读取
+            rows = session.exec(
+                statement.where(ReviewLog.id > last_id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            ids, quality, reps, ease, last_interval, reviewed_at = zip(*rows)
+            quality = np.fromiter(quality, dtype=np.int64)
+            reps = _legacy_repetitions(
+                quality,
+                np.fromiter(reps, dtype=np.int64),
+                np.fromiter(last_interval, dtype=np.int64),
+            )
+            ease = np.maximum(np.fromiter(ease, dtype=np.float64), params.min_ease)
+            intervals = sm2_intervals(reps, ease, params)
+            # 评分不及格的卡片下一次仍从第一个间隔开始
+            intervals = np.where(quality >= 3, intervals, params.first_interval)
+            days = np.fromiter((ts.toordinal() for ts in reviewed_at), dtype=np.int64)
+            next_review = (days + intervals).tolist()
+
+            session.execute(
+                update(ReviewLog),
+                [
+                    {
+                        "id": i,
+                        "repetitions": r,
+                        "ease_factor": e,
+                        "last_interval": n,
+                        "next_review": date.fromordinal(d),
+                    }
+                    for i, r, e, n, d in zip(
+                        ids,
+                        reps.tolist(),
+                        ease.tolist(),
+                        intervals.tolist(),
+                        next_review,
+                    )
+                ],
+            )
+            session.commit()
+            updated += len(rows)
+            last_id = ids[-1]
+    return updated
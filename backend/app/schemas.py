@@ -1,8 +1,8 @@
 """用于请求和响应数据的 Pydantic 模型。"""
 
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import date, datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class UserCreate(BaseModel):
@@ -29,10 +29,34 @@ class WordOut(BaseModel):
     added_at: Optional[datetime] = None
 
 
+class WordSuggestion(BaseModel):
+    """自动补全返回的单词条目。"""
+
+    id: int
+    word: str
+
+
 class ReviewIn(BaseModel):
-    """复习单词时提交的质量评分。"""
+    """复习单词时提交的质量评分（SM-2 的 0–5 分）。"""
+
+    quality: int = Field(ge=0, le=5)
+
+
+class ReviewBatchItem(BaseModel):
+    """批量提交中的单条复习记录，离线复习可带上实际复习时间。"""
+
+    word_id: int
+    quality: int = Field(ge=0, le=5)
+    reviewed_at: Optional[datetime] = None
+
+
+class ReviewScheduleOut(BaseModel):
+    """复习后单词的最新调度结果。"""
 
+    word_id: int
     quality: int
+    last_interval: int
+    next_review: date
 
 
 class StatsOut(BaseModel):
@@ -43,6 +67,14 @@ class StatsOut(BaseModel):
     next_due: Optional[date] = None
 
 
+class DailyStatOut(BaseModel):
+    """某一天的复习次数，按 0–5 评分细分。"""
+
+    day: date
+    total: int
+    by_quality: Dict[int, int]
+
+
 class UserOut(BaseModel):
     """公开的用户信息。"""
 
@@ -71,6 +103,21 @@ class TranslationRequest(BaseModel):
     lang: str
 
 
+class TranslationBatchRequest(BaseModel):
+    """/translate/batch 接口的请求体。"""
+
+    items: List[TranslationRequest]
+
+
+class TranslationBatchResult(BaseModel):
+    """批量翻译中单个条目的结果，失败时 ``result`` 为空并给出 ``error``。"""
+
+    text: str
+    lang: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
 class ArticleRequest(BaseModel):
     """根据收藏单词生成文章的请求体。"""
 
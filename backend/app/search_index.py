@@ -0,0 +1,57 @@
+"""英文词头的进程内前缀索引。
+
+索引以按小写词头排序的数组保存，借助 ``bisect`` 在 O(log n) 时间内定位
+前缀所在区间，供自动补全接口使用，避免每次按键都对 Word 表做全表扫描。
+启动时全量构建，之后同步词书新增单词时按需增量插入。
+"""
+
+import bisect
+import threading
+from sqlmodel import select
+from .models import Word
+from .database import get_session
+
+_lock = threading.Lock()
+# 两个数组按下标一一对应：_keys 为小写词头，_entries 为 (id, 原始拼写)
+_keys: list[str] = []
+_entries: list[tuple[int, str]] = []
+
+
+def rebuild():
+    """从 Word 表全量重建前缀索引。"""
+    global _keys, _entries
+    with get_session() as session:
+        rows = session.exec(select(Word.id, Word.word)).all()
+    items = sorted((word.lower(), word_id, word) for word_id, word in rows)
+    keys = [k for k, _, _ in items]
+    entries = [(word_id, word) for _, word_id, word in items]
+    with _lock:
+        _keys, _entries = keys, entries
+
+
+def add(word_id: int, word: str):
+    """将单个新单词插入索引，保持数组有序。"""
+    key = word.lower()
+    with _lock:
+        pos = bisect.bisect_right(_keys, key)
+        _keys.insert(pos, key)
+        _entries.insert(pos, (word_id, word))
+
+
+def suggest(prefix: str, limit: int = 10) -> list[tuple[int, str]]:
+    """返回以 *prefix* 开头的单词 ``(id, word)``，按字母序最多 *limit* 个。"""
+    p = prefix.strip().lower()
+    if not p or limit <= 0:
+        return []
+    result = []
+    with _lock:
+        i = bisect.bisect_left(_keys, p)
+        while i < len(_keys) and len(result) < limit and _keys[i].startswith(p):
+            result.append(_entries[i])
+            i += 1
+    return result
+
+
+def size() -> int:
+    """返回当前索引中的单词数量。"""
+    return len(_keys)
@@ -3,7 +3,11 @@
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta, UTC
+from concurrent.futures import Future, ProcessPoolExecutor
+import asyncio
 import os
+import threading
+import time
 
 # SECRET_KEY 控制 JWT 的签名密钥，生产环境应通过环境变量提供；
 # 如果未设置则随机生成，使每次开发运行的值都唯一。
@@ -13,17 +17,136 @@ SECRET_KEY = os.getenv("SECRET_KEY") or secrets.token_urlsafe(32)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt 的计算成本可通过环境变量调整；已有哈希的成本与当前配置不同时，
+# 登录成功后会透明地重新哈希，无需迁移脚本。
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 专用于密码哈希的进程池大小，即同时进行的 bcrypt 计算上限；为 0 时在调用线程内执行
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4)))
+)
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "queue_wait_total": 0.0,
+    "compute_total": 0.0,
+}
+
+
+def _hash_job(password: str):
+    """在工作进程中计算哈希，并返回实际计算耗时。"""
+    start = time.perf_counter()
+    hashed = pwd_context.hash(password)
+    return hashed, time.perf_counter() - start
+
+
+def _verify_job(password: str, hashed: str):
+    """在工作进程中校验密码，必要时按当前成本参数生成新哈希。"""
+    start = time.perf_counter()
+    result = pwd_context.verify_and_update(password, hashed)
+    return result, time.perf_counter() - start
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return _pool
+
+
+def _submit(fn, *args) -> Future:
+    """把哈希任务提交到进程池，并在完成时记录排队与计算耗时。"""
+    with _stats_lock:
+        _stats["submitted"] += 1
+        _stats["in_flight"] += 1
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+    submitted_at = time.perf_counter()
+    inner = _get_pool().submit(fn, *args)
+    outer: Future = Future()
+
+    def _done(f: Future):
+        elapsed = time.perf_counter() - submitted_at
+        with _stats_lock:
+            _stats["completed"] += 1
+            _stats["in_flight"] -= 1
+        try:
+            value, compute = f.result()
+        except BaseException as exc:
+            outer.set_exception(exc)
+            return
+        with _stats_lock:
+            _stats["compute_total"] += compute
+            _stats["queue_wait_total"] += max(elapsed - compute, 0.0)
+        outer.set_result(value)
+
+    inner.add_done_callback(_done)
+    return outer
+
+
+def _run(fn, *args):
+    """同步执行哈希任务；未启用进程池时直接在当前线程计算。"""
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)[0]
+    return _submit(fn, *args).result()
+
+
+async def _run_async(fn, *args):
+    """异步执行哈希任务，等待期间不占用事件循环或线程池线程。"""
+    if PASSWORD_HASH_WORKERS <= 0:
+        return (await asyncio.to_thread(fn, *args))[0]
+    return await asyncio.wrap_future(_submit(fn, *args))
 
 
 def get_password_hash(password: str) -> str:
     """返回给定明文密码的 bcrypt 哈希值。"""
-    return pwd_context.hash(password)
+    return _run(_hash_job, password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
     """将 *password* 与已有的 bcrypt 哈希进行比对。"""
-    return pwd_context.verify(password, hashed)
+    return verify_and_update(password, hashed)[0]
+
+
+def verify_and_update(password: str, hashed: str):
+    """校验密码，返回 ``(是否匹配, 新哈希或 None)``。
+
+    当 *hashed* 的成本参数与当前配置不同时，第二项为按新参数生成的哈希，
+    调用方应将其写回数据库。
+    """
+    return _run(_verify_job, password, hashed)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """:func:`get_password_hash` 的异步版本。"""
+    return await _run_async(_hash_job, password)
+
+
+async def verify_and_update_async(password: str, hashed: str):
+    """:func:`verify_and_update` 的异步版本。"""
+    return await _run_async(_verify_job, password, hashed)
+
+
+def hash_pool_stats() -> dict:
+    """返回密码哈希进程池的排队与耗时统计。"""
+    with _stats_lock:
+        stats = dict(_stats)
+    completed = stats["completed"] or 1
+    stats["workers"] = PASSWORD_HASH_WORKERS
+    stats["avg_queue_wait_ms"] = round(
+        stats.pop("queue_wait_total") / completed * 1000, 2
+    )
+    stats["avg_compute_ms"] = round(stats.pop("compute_total") / completed * 1000, 2)
+    return stats
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
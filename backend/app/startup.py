@@ -0,0 +1,75 @@
+"""应用启动阶段的执行、计时与就绪状态。
+
+启动工作被拆分为若干命名阶段，每个阶段的耗时都会写入日志并保存在
+:class:`Startup` 中，供 ``/readyz`` 返回。除建表外的阶段可以在后台线程中
+执行，使工作进程能尽快开始接受请求，由 ``/readyz`` 告知何时完全就绪。
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class Startup:
+    """一次启动过程的状态：``pending``、``running``、``ready`` 或 ``failed``。"""
+
+    def __init__(self):
+        self.status = "pending"
+        self.error = None
+        # 阶段名 -> 耗时（毫秒），按执行顺序排列
+        self.timings: dict[str, float] = {}
+        self._done = threading.Event()
+
+    @contextmanager
+    def phase(self, name: str):
+        """执行一个命名阶段并记录其耗时。"""
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.timings[name] = round(elapsed * 1000, 1)
+        logger.info("startup phase %s took %.3fs", name, elapsed)
+
+    def run(self, phases):
+        """依次执行 ``(name, func)`` 阶段，全部成功后标记为就绪。
+
+        某个阶段抛出异常时记录错误并停止，状态变为 ``failed``。
+        """
+        self.status = "running"
+        start = time.perf_counter()
+        name = None
+        try:
+            for name, func in phases:
+                with self.phase(name):
+                    func()
+        except Exception as exc:
+            logger.exception("startup phase %s failed", name)
+            self.error = f"{name}: {exc}"
+            self.status = "failed"
+        else:
+            logger.info("startup finished in %.3fs", time.perf_counter() - start)
+            self.status = "ready"
+        finally:
+            self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """等待启动结束，返回是否已就绪。"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def snapshot(self) -> dict:
+        """返回可直接序列化为 JSON 的状态摘要。"""
+        result = {"status": self.status, "phases": dict(self.timings)}
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+# 当前进程的启动状态，每次进入应用生命周期时重新创建
+state = Startup()
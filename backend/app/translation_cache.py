@@ -0,0 +1,199 @@
+"""``/translate`` 结果的两级缓存与并发请求合并。
+
+缓存键是 ``(text, lang, model)`` 的 SHA-256，因此相同内容无论来自哪个用户都
+共用一份结果。第一级为进程内 LRU，第二级为数据库中的 :class:`TranslationCache`
+表，两者都在 ``TRANSLATION_CACHE_TTL`` 秒后过期。同一键的并发未命中请求只会
+触发一次上游调用，其余请求等待同一个结果。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from sqlmodel import delete
+from .models import TranslationCache
+from .database import get_async_session, get_session
+from . import crud
+
+TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "5000"))
+TRANSLATION_CACHE_TTL = float(
+    os.environ.get("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600))
+)
+
+_lock = threading.Lock()
+# key -> (过期时间戳, 译文)，按最近使用排序
+_entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+# key -> 正在进行的查找/上游调用
+_inflight: dict[str, asyncio.Future] = {}
+_stats = {"memory_hits": 0, "db_hits": 0, "coalesced": 0, "misses": 0, "errors": 0}
+
+
+def cache_key(text: str, lang: str, model: str) -> str:
+    """返回 ``(text, lang, model)`` 的内容哈希。"""
+    raw = json.dumps([text, lang, model], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def _memory_get(key: str) -> str | None:
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return entry[1]
+
+
+def _memory_put(key: str, result: str, expires: float):
+    if TRANSLATION_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _entries[key] = (expires, result)
+        _entries.move_to_end(key)
+        while len(_entries) > TRANSLATION_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+async def _db_get(key: str):
+    """返回未过期的持久化条目，不存在时返回 ``None``。"""
+    async with get_async_session() as session:
+        row = await session.get(TranslationCache, key)
+    cutoff = datetime.utcnow() - timedelta(seconds=TRANSLATION_CACHE_TTL)
+    if row is None or row.created_at <= cutoff:
+        return None
+    return row
+
+
+async def _db_put(key: str, model: str, lang: str, result: str, created_at):
+    async with get_async_session() as session:
+        stmt = crud._insert(session, TranslationCache)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={
+                "result": stmt.excluded.result,
+                "created_at": stmt.excluded.created_at,
+            },
+        )
+        values = {
+            "key": key,
+            "model": model,
+            "lang": lang,
+            "result": result,
+            "created_at": created_at,
+        }
+        await session.exec(stmt, params=values)
+        await session.commit()
+
+
+async def _db_lookup(key: str) -> str | None:
+    """查数据库缓存，命中时同时回填进程内缓存。"""
+    row = await _db_get(key)
+    if row is None:
+        return None
+    _count("db_hits")
+    created_at = row.created_at.replace(tzinfo=timezone.utc)
+    _memory_put(key, row.result, created_at.timestamp() + TRANSLATION_CACHE_TTL)
+    return row.result
+
+
+async def lookup(text: str, lang: str, model: str) -> str | None:
+    """只查两级缓存，不调用上游；未命中时返回 ``None`` 并计为一次未命中。"""
+    key = cache_key(text, lang, model)
+    result = _memory_get(key)
+    if result is not None:
+        _count("memory_hits")
+        return result
+    result = await _db_lookup(key)
+    if result is None:
+        _count("misses")
+    return result
+
+
+async def store(text: str, lang: str, model: str, result: str):
+    """把上游返回的译文写入两级缓存。"""
+    key = cache_key(text, lang, model)
+    await _db_put(key, model, lang, result, datetime.utcnow())
+    _memory_put(key, result, time.time() + TRANSLATION_CACHE_TTL)
+
+
+async def _load(text: str, lang: str, model: str, fetch) -> str:
+    """依次查数据库和上游，并把结果写回两级缓存。"""
+    result = await _db_lookup(cache_key(text, lang, model))
+    if result is not None:
+        return result
+    _count("misses")
+    try:
+        result = await fetch()
+    except Exception:
+        _count("errors")
+        raise
+    await store(text, lang, model, result)
+    return result
+
+
+def _finished(key: str, task: asyncio.Future):
+    _inflight.pop(key, None)
+    # 所有等待者都已断开时也要取走异常，避免 "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+async def translate(text: str, lang: str, model: str, fetch) -> str:
+    """返回 *text* 的译文，缓存未命中时调用 ``await fetch()`` 获取。
+
+    *fetch* 抛出的异常原样传给所有等待同一键的请求，失败结果不会被缓存。
+    单个请求被取消不会中断其他请求共享的上游调用。
+    """
+    key = cache_key(text, lang, model)
+    result = _memory_get(key)
+    if result is not None:
+        _count("memory_hits")
+        return result
+    task = _inflight.get(key)
+    if task is not None:
+        _count("coalesced")
+    else:
+        task = asyncio.ensure_future(_load(text, lang, model, fetch))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _finished(key, t))
+    return await asyncio.shield(task)
+
+
+def purge_expired() -> int:
+    """删除数据库中已过期的条目，返回删除的行数。"""
+    cutoff = datetime.utcnow() - timedelta(seconds=TRANSLATION_CACHE_TTL)
+    with get_session() as session:
+        result = session.exec(
+            delete(TranslationCache).where(TranslationCache.created_at <= cutoff)
+        )
+        session.commit()
+        return result.rowcount
+
+
+def stats() -> dict:
+    """返回命中率等统计；合并到进行中请求的调用也算作命中。"""
+    with _lock:
+        result = dict(_stats)
+        result["size"] = len(_entries)
+    result["in_flight"] = len(_inflight)
+    hits = result["memory_hits"] + result["db_hits"] + result["coalesced"]
+    total = hits + result["misses"]
+    result["hit_rate"] = round(hits / total, 4) if total else 0.0
+    return result
+
+
+def clear():
+    """清空进程内缓存（不影响数据库中的条目）。"""
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,146 @@
+"""用户信息镜像的追加式日志。
+
+原先每次注册或删除都要读出整个 ``users.json``、修改后再整体重写，批量注册
+时代价为 O(n²)，多个进程同时写还会损坏文件。现在改为向日志文件追加一行
+JSON 事件（新建、修改或删除；写入后 fsync，并用文件锁串行化多进程写入），日志增长到一定规模
+后再原子地压缩回 ``users.json`` 快照。读取时先加载快照，再按顺序重放日志。
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 日志超过该大小且不小于快照大小时触发压缩，保证摊还后仍为线性
+COMPACT_MIN_BYTES = int(os.environ.get("USERS_JOURNAL_COMPACT_BYTES", str(1 << 20)))
+
+
+class UserJournal:
+    """由快照文件和追加日志共同组成的用户列表。"""
+
+    def __init__(self, snapshot_path: str, journal_path: str):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.lock_path = journal_path + ".lock"
+
+    @contextmanager
+    def _locked(self):
+        """持有跨进程的排他文件锁。"""
+        with open(self.lock_path, "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def append(self, event: dict):
+        """追加一条事件并落盘，必要时顺带压缩。"""
+        line = json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._locked():
+            with open(self.journal_path, "a+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                if end:
+                    f.seek(end - 1)
+                    if f.read(1) != b"\n":
+                        # 上次写入中途崩溃留下半行：先补上换行，使它自成一行
+                        # 在重放时被跳过，而不会把这条新事件也拼接坏
+                        line = b"\n" + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                journal_size = f.tell()
+            if journal_size >= max(COMPACT_MIN_BYTES, self._snapshot_size()):
+                self._compact()
+
+    def record_create(self, user_id: int, username: str, role: str):
+        """记录新建用户。"""
+        self.append({"op": "create", "id": user_id, "username": username, "role": role})
+
+    def record_update(self, user_id: int, **fields):
+        """记录用户名或角色的修改，*fields* 只包含变化的字段。"""
+        self.append({"op": "update", "id": user_id, **fields})
+
+    def record_delete(self, user_id: int):
+        """记录删除用户。"""
+        self.append({"op": "delete", "id": user_id})
+
+    def load_users(self) -> list[dict]:
+        """重建当前的用户列表：加载快照后依次重放日志中的事件。"""
+        with self._locked():
+            return list(self._replay().values())
+
+    def compact(self):
+        """把当前状态原子地写入快照并清空日志。"""
+        with self._locked():
+            self._compact()
+
+    def _snapshot_size(self) -> int:
+        try:
+            return os.path.getsize(self.snapshot_path)
+        except FileNotFoundError:
+            return 0
+
+    def _replay(self) -> dict[int, dict]:
+        """调用方需持有锁。重放是幂等的，压缩中途崩溃也不会产生重复条目。"""
+        users: dict[int, dict] = {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                for u in json.load(f):
+                    users[u["id"]] = u
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # 进程在写入中途崩溃时，末尾可能残留半行
+                        continue
+                    if event.get("op") == "create":
+                        users[event["id"]] = {
+                            "id": event["id"],
+                            "username": event["username"],
+                            "role": event["role"],
+                        }
+                    elif event.get("op") == "update":
+                        if event["id"] in users:
+                            users[event["id"]].update(
+                                (k, event[k])
+                                for k in ("username", "role")
+                                if k in event
+                            )
+                    elif event.get("op") == "delete":
+                        users.pop(event["id"], None)
+        except FileNotFoundError:
+            pass
+        return users
+
+    def _compact(self):
+        """调用方需持有锁。先写临时文件再替换，最后截断日志。"""
+        users = list(self._replay().values())
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(users, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        with open(self.journal_path, "wb") as f:
+            os.fsync(f.fileno())
+
+
+# 应用默认使用当前工作目录下的 users.json 作为快照
+journal = UserJournal("users.json", "users.journal")
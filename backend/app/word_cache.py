@@ -0,0 +1,50 @@
+"""按单词 ID 缓存已解码的单词负载。
+
+``Word.translations`` 与 ``Word.phrases`` 以 JSON 字符串存储，热门接口原本每次
+请求都要逐行 ``json.loads`` 并构造 ``WordOut``。这里缓存解码后的字典，配合
+``ORJSONResponse`` 直接序列化，跳过逐行解析和 pydantic 校验。
+词书同步或导入修改单词时需调用 :func:`invalidate`。
+"""
+
+import json
+import threading
+from .models import Word
+
+_lock = threading.Lock()
+_cache: dict[int, dict] = {}
+
+
+def _decode(word: Word) -> dict:
+    """把 ORM 对象转换为与 ``WordOut`` 字段一致的字典。"""
+    return {
+        "id": word.id,
+        "word": word.word,
+        "translations": json.loads(word.translations),
+        "phrases": json.loads(word.phrases) if word.phrases else [],
+        "added_at": None,
+    }
+
+
+def payload(word: Word) -> dict:
+    """返回单词的缓存负载，调用方不得修改返回的字典。"""
+    cached = _cache.get(word.id)
+    if cached is None:
+        cached = _decode(word)
+        with _lock:
+            _cache[word.id] = cached
+    return cached
+
+
+def payloads(words) -> list[dict]:
+    """批量获取多个单词的缓存负载。"""
+    return [payload(w) for w in words]
+
+
+def invalidate(word_ids=None):
+    """使指定 ID 的缓存失效；未提供 *word_ids* 时清空全部缓存。"""
+    with _lock:
+        if word_ids is None:
+            _cache.clear()
+        else:
+            for word_id in word_ids:
+                _cache.pop(word_id, None)
@@ -0,0 +1,94 @@
+"""词书文件的解析与编码缓存。
+
+以文件路径为键缓存解析后的单词列表、编码好的 JSON 正文及其 gzip/brotli
+压缩版本，并以 ``(mtime, size)`` 判断文件是否变化。预热之后每次请求只需
+一次 ``stat``；配合 ETag/Last-Modified 还能直接返回 304。
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+import orjson
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，缺失时只提供 gzip
+    brotli = None
+
+_lock = threading.Lock()
+_entries: dict[str, "WordbookEntry"] = {}
+
+
+class WordbookEntry:
+    """单个词书文件的缓存内容。"""
+
+    def __init__(self, path: str, stat: os.stat_result):
+        with open(path, "r", encoding="utf-8") as f:
+            self.data = json.load(f)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.body = orjson.dumps(self.data)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.mtime = int(stat.st_mtime)
+        self.encoded = {"gzip": gzip.compress(self.body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(self.body)
+
+    def page_etag(self, offset: int, limit: int | None) -> str:
+        """分页响应的 ETag，由整本词书的 ETag 和分页参数组成。"""
+        return f'"{self.etag[1:-1]}-{offset}-{limit}"'
+
+    def not_modified(
+        self, etag: str, if_none_match: str | None, if_modified_since: str | None
+    ):
+        """根据条件请求头判断客户端缓存是否仍然有效。"""
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in tags or etag in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.mtime <= since
+        return False
+
+    def page(self, offset: int, limit: int | None) -> bytes:
+        """返回分页后的 JSON 正文。"""
+        end = None if limit is None else offset + limit
+        return orjson.dumps(self.data[offset:end])
+
+
+def get(path: str) -> WordbookEntry | None:
+    """返回 *path* 的缓存条目，文件变化时重新加载；文件不存在时返回 ``None``。"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        with _lock:
+            _entries.pop(path, None)
+        return None
+    entry = _entries.get(path)
+    if entry is None or entry.version != (stat.st_mtime_ns, stat.st_size):
+        entry = WordbookEntry(path, stat)
+        with _lock:
+            _entries[path] = entry
+    return entry
+
+
+def choose_encoding(accept_encoding: str | None, entry: WordbookEntry) -> str | None:
+    """按 Accept-Encoding 选择可用的预压缩版本，优先 brotli。"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in entry.encoded and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
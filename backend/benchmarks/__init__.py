@@ -0,0 +1 @@
+"""基准测试与压力测试工具，只应在独立的数据库上运行。"""
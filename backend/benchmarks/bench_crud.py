@@ -0,0 +1,115 @@
+"""Micro-benchmarks for hot crud functions, using pytest-benchmark.
+
+The file name does not match ``test_*.py``, so it is only collected when passed
+explicitly. It needs a dedicated database; an empty one is filled with
+synthetic data first (sizes from ``BENCH_USERS``, ``BENCH_WORDS`` and
+``BENCH_REVIEWS``)::
+
+    DATABASE_URL=sqlite:///./bench.db python -m pytest \\
+        backend/benchmarks/bench_crud.py --benchmark-autosave
+    # after a change, fail if any mean is more than 20% slower
+    DATABASE_URL=sqlite:///./bench.db python -m pytest \\
+        backend/benchmarks/bench_crud.py --benchmark-compare \\
+        --benchmark-compare-fail=mean:20%
+"""
+
+import os, sys
+import itertools
+import json
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+if "DATABASE_URL" not in os.environ:
+    pytest.skip(
+        "set DATABASE_URL to a dedicated benchmark database", allow_module_level=True
+    )
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from sqlalchemy import func
+from sqlmodel import select
+from backend.app import crud, fuzzy_index, search_index
+from backend.app.database import get_session, init_db
+from backend.app.models import ReviewLog, User, Word
+from backend.benchmarks import synthetic
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Return ``(heavy_user_id, fresh_user_id, sample_words)``."""
+    init_db()
+    with get_session() as session:
+        empty = session.exec(select(ReviewLog.id).limit(1)).first() is None
+    if empty:
+        synthetic.generate(
+            int(os.environ.get("BENCH_USERS", "100")),
+            int(os.environ.get("BENCH_WORDS", "50000")),
+            int(os.environ.get("BENCH_REVIEWS", "500000")),
+        )
+    search_index.rebuild()
+    fuzzy_index.rebuild()
+    with get_session() as session:
+        heavy = session.exec(
+            select(ReviewLog.user_id)
+            .group_by(ReviewLog.user_id)
+            .order_by(func.count().desc())
+            .limit(1)
+        ).one()
+        words = session.exec(select(Word).order_by(Word.id).limit(1000)).all()
+        # inserted directly, like synthetic does, so users.json is not touched
+        fresh = User(username=f"bench_fresh{os.getpid()}", hashed_password="x")
+        session.add(fresh)
+        session.commit()
+        session.refresh(fresh)
+    return heavy, fresh.id, words
+
+
+def test_get_due_words(benchmark, dataset):
+    heavy, _, _ = dataset
+    benchmark(crud.get_due_words, heavy, 50)
+
+
+def test_get_new_words(benchmark, dataset):
+    """A user without reviews exercises the new-word anti-join."""
+    _, fresh, _ = dataset
+    benchmark(crud.get_due_words, fresh, 50)
+
+
+def test_review_overview(benchmark, dataset):
+    heavy, _, _ = dataset
+    benchmark(crud.review_overview, heavy)
+
+
+def test_daily_review_stats(benchmark, dataset):
+    heavy, _, _ = dataset
+    today = date.today()
+    benchmark(crud.daily_review_stats, heavy, today - timedelta(days=30), today)
+
+
+def test_record_review(benchmark, dataset):
+    heavy, _, words = dataset
+    ids = itertools.cycle(w.id for w in words)
+    benchmark(lambda: crud.record_review(heavy, next(ids), 4))
+
+
+def test_search_headword(benchmark, dataset):
+    _, _, words = dataset
+    benchmark(crud.search_words, words[500].word[:4], 50)
+
+
+def test_search_translation(benchmark, dataset):
+    _, _, words = dataset
+    text = json.loads(words[500].translations)[0]["translation"]
+    benchmark(crud.search_words, text[:2], 50)
+
+
+def test_fuzzy_match(benchmark, dataset):
+    _, _, words = dataset
+    word = max(words, key=lambda w: len(w.word)).word
+    benchmark(fuzzy_index.match, word[1] + word[0] + word[2:])
+
+
+def test_suggest(benchmark, dataset):
+    _, _, words = dataset
+    benchmark(search_index.suggest, words[500].word[:2], 10)
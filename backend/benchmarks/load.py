@@ -0,0 +1,224 @@
+"""在进程内对 ASGI 应用施加并发负载，按路由报告延迟分位数。
+
+请求通过 ``httpx.ASGITransport`` 直接送入应用，不经过网络和 uvicorn，因此
+测得的是应用本身（路由、依赖、数据库访问）的耗时；客户端与应用共用同一个
+事件循环，并发数较高时的排队也会体现在延迟中。每个并发工作协程随机挑选
+合成用户和路由，路由按 :data:`MIX` 的权重抽取。
+
+用法（先用 :mod:`synthetic` 生成数据）::
+
+    DATABASE_URL=sqlite:///./bench.db python -m backend.benchmarks.load \\
+        --concurrency 32 --duration 30 --json run.json --compare baseline.json
+
+``--compare`` 与之前保存的结果对比，任一路由的 p95 变慢超过 ``--tolerance``
+时以非零状态退出，便于在 CI 中发现性能回退。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+import numpy as np
+
+# 启动阶段全部完成后再开始计时
+os.environ.setdefault("STARTUP_IN_BACKGROUND", "0")
+
+import httpx
+from sqlalchemy import func
+from sqlmodel import select
+from ..app.main import app
+from ..app.models import ReviewLog, User, Word
+from ..app.database import get_session
+from ..app.security import create_access_token
+from ..app import user_journal
+
+# 路由 -> 权重，大致对应一次学习会话中各请求的比例
+MIX = {
+    "GET /words/today": 35,
+    "POST /review/{id}": 30,
+    "GET /search": 20,
+    "GET /stats/overview": 15,
+}
+PERCENTILES = (50, 95, 99)
+
+
+class Workload:
+    """压测所需的合成用户令牌、单词 ID 和搜索词。"""
+
+    def __init__(self, users: int, seed: int = 0):
+        rng = random.Random(seed)
+        with get_session() as session:
+            # 有复习记录的用户才能代表真实负载
+            user_ids = (
+                session.exec(
+                    select(ReviewLog.user_id).group_by(ReviewLog.user_id)
+                ).all()
+                or session.exec(select(User.id)).all()
+            )
+            words = session.exec(
+                select(Word.word, Word.translations).order_by(func.random()).limit(500)
+            ).all()
+            max_word = session.exec(select(func.max(Word.id))).one() or 1
+        if not user_ids:
+            sys.exit("No users found; run backend.benchmarks.synthetic first.")
+        user_ids = rng.sample(user_ids, min(users, len(user_ids)))
+        self.headers = [
+            {"Authorization": f"Bearer {create_access_token({'sub': str(u)})}"}
+            for u in user_ids
+        ]
+        self.max_word = max_word
+        # 词头前缀、中文释义片段和带拼写错误的词头各占一部分
+        self.queries = []
+        for word, translations in words:
+            self.queries.append(word[: rng.randint(3, max(3, len(word)))])
+            text = json.loads(translations)[0]["translation"] if translations else ""
+            if len(text) >= 2:
+                self.queries.append(text[:2])
+            if len(word) >= 5:
+                i = rng.randrange(len(word) - 1)
+                self.queries.append(word[:i] + word[i + 1] + word[i] + word[i + 2 :])
+
+    def request(self, route: str, rng: random.Random):
+        """返回 ``(method, url, kwargs)``。"""
+        headers = rng.choice(self.headers)
+        if route == "GET /words/today":
+            return "GET", "/words/today", {"headers": headers, "params": {"limit": 50}}
+        if route == "POST /review/{id}":
+            word_id = rng.randint(1, self.max_word)
+            body = {"quality": rng.choice([2, 3, 4, 4, 5, 5])}
+            return "POST", f"/review/{word_id}", {"headers": headers, "json": body}
+        if route == "GET /search":
+            params = {"q": rng.choice(self.queries)}
+            return "GET", "/search", {"headers": headers, "params": params}
+        return "GET", "/stats/overview", {"headers": headers}
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    """把 ``路由 -> [(延迟秒, 状态码)]`` 汇总为每个路由的计数、吞吐和分位数。"""
+    report = {}
+    for route, items in samples.items():
+        latencies = np.array([latency for latency, _ in items]) * 1000
+        quantiles = np.percentile(latencies, PERCENTILES) if len(items) else []
+        report[route] = {
+            "count": len(items),
+            "errors": sum(1 for _, status in items if status >= 400),
+            "rps": round(len(items) / elapsed, 1) if elapsed else 0.0,
+            **{f"p{p}_ms": round(float(q), 2) for p, q in zip(PERCENTILES, quantiles)},
+            "max_ms": round(float(latencies.max()), 2) if len(items) else 0.0,
+        }
+    return report
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """返回 p95 比基线慢超过 *tolerance*（比例）的路由说明。"""
+    slower = []
+    for route, stats in report.items():
+        before = baseline.get(route, {}).get("p95_ms")
+        if before and stats.get("p95_ms", 0) > before * (1 + tolerance):
+            slower.append(f"{route}: p95 {before} -> {stats['p95_ms']} ms")
+    return slower
+
+
+@contextmanager
+def scratch_journal():
+    """把用户日志临时指向临时目录。
+
+    应用启动时可能创建默认管理员，否则会写入当前目录下真实的 ``users.json``。
+    """
+    saved = user_journal.journal
+    with tempfile.TemporaryDirectory() as directory:
+        user_journal.journal = user_journal.UserJournal(
+            os.path.join(directory, "users.json"),
+            os.path.join(directory, "users.journal"),
+        )
+        try:
+            yield
+        finally:
+            user_journal.journal = saved
+
+
+async def run(
+    workload: Workload,
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+    warmup: float = 1.0,
+):
+    """运行 *warmup* 秒预热和 *duration* 秒计时负载，返回 ``(samples, elapsed)``。"""
+    routes, weights = list(MIX), list(MIX.values())
+    samples = {route: [] for route in routes}
+    transport = httpx.ASGITransport(app=app)
+
+    with scratch_journal():
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+
+                async def worker(index: int, deadline: float, record: bool):
+                    rng = random.Random(seed * 1000 + index)
+                    while time.perf_counter() < deadline:
+                        route = rng.choices(routes, weights)[0]
+                        method, url, kwargs = workload.request(route, rng)
+                        start = time.perf_counter()
+                        resp = await client.request(method, url, **kwargs)
+                        if record:
+                            samples[route].append(
+                                (time.perf_counter() - start, resp.status_code)
+                            )
+
+                for record, seconds in ((False, warmup), (True, duration)):
+                    start = time.perf_counter()
+                    deadline = start + seconds
+                    await asyncio.gather(
+                        *(worker(i, deadline, record) for i in range(concurrency))
+                    )
+    return samples, time.perf_counter() - start
+
+
+def print_report(report: dict):
+    columns = ["count", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print(f"{'route':<22}" + "".join(f"{c:>10}" for c in columns))
+    for route, stats in report.items():
+        print(f"{route:<22}" + "".join(f"{stats.get(c, 0):>10}" for c in columns))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report to compare p95 against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    if "DATABASE_URL" not in os.environ:
+        sys.exit("Set DATABASE_URL to a dedicated benchmark database first.")
+
+    workload = Workload(args.users, args.seed)
+    samples, elapsed = asyncio.run(
+        run(workload, args.concurrency, args.duration, args.seed, args.warmup)
+    )
+    report = summarize(samples, elapsed)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            slower = regressions(report, json.load(f), args.tolerance)
+        for line in slower:
+            print("REGRESSION", line)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""生成用于基准测试的大规模合成数据。
+
+单词由常见音节拼成，带中文释义，约三成附带短语，通过临时词书文件走
+:func:`crud.sync_wordbooks` 导入，因此全文索引等派生数据与线上一致。
+复习记录的分布尽量贴近真实使用：
+
+* 用户活跃度服从帕累托分布，少数重度用户贡献大部分复习；
+* 每个用户大致按词书顺序学习，靠前的单词更常被复习；
+* 评分以 3–5 分为主，低分时重置 SM-2 进度，间隔按 SM-2 递推；
+* 每个单词的上次复习时间落在其间隔之内，再加上该用户已闲置的天数（指数
+  分布），因此常用的用户只有少量单词到期，久未使用的用户积压较多。
+
+用法（必须显式指定一个独立的数据库）::
+
+    DATABASE_URL=sqlite:///./bench.db python -m backend.benchmarks.synthetic \\
+        --users 200 --words 100000 --reviews 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func, insert
+from sqlmodel import select
+from ..app.models import ReviewLog, User, Word
+from ..app.database import get_session, init_db
+from ..app.security import get_password_hash
+from ..app import crud
+
+# 合成用户的用户名前缀和统一密码
+USERNAME_PREFIX = "bench"
+PASSWORD = "bench"
+
+_ONSETS = ["", "b", "c", "d", "f", "g", "h", "l", "m", "n", "p", "r", "s", "t"]
+_ONSETS += ["v", "w", "br", "cl", "cr", "dr", "fl", "gr", "pl", "pr", "sh", "st"]
+_ONSETS += ["str", "th", "tr"]
+_NUCLEI = ["a", "e", "i", "o", "u", "ai", "ea", "ee", "ie", "io", "ou", "oo"]
+_CODAS = ["", "", "b", "ck", "d", "l", "m", "n", "nd", "ng", "nt", "r", "s", "st"]
+_CODAS += ["t", "x"]
+_SUFFIXES = ["", "", "", "ing", "ed", "er", "ly", "tion", "ment", "ness", "able"]
+# 释义从这些常用汉字中随机选取
+_HANZI = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发"
+    "年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化"
+    "高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政"
+)
+_TYPES = ["n", "v", "adj", "adv", "prep"]
+_QUALITY_P = [0.03, 0.05, 0.1, 0.25, 0.35, 0.22]
+
+BATCH_SIZE = 10000
+
+
+def vocabulary(rng: np.random.Generator, count: int) -> list[dict]:
+    """返回 *count* 个拼写互不相同的词书条目。"""
+    words, seen = [], set()
+    while len(words) < count:
+        syllables = rng.integers(1, 4)
+        word = (
+            "".join(
+                _ONSETS[rng.integers(len(_ONSETS))]
+                + _NUCLEI[rng.integers(len(_NUCLEI))]
+                + _CODAS[rng.integers(len(_CODAS))]
+                for _ in range(syllables)
+            )
+            + _SUFFIXES[rng.integers(len(_SUFFIXES))]
+        )
+        if len(word) < 3 or word in seen:
+            continue
+        seen.add(word)
+        entry = {
+            "word": word,
+            "translations": [
+                {"translation": _hanzi(rng), "type": _TYPES[rng.integers(len(_TYPES))]}
+                for _ in range(rng.integers(1, 3))
+            ],
+        }
+        if rng.random() < 0.3:
+            entry["phrases"] = [
+                {
+                    "phrase": f"{word} {words[-1]['word'] if words else 'in'}",
+                    "translation": _hanzi(rng),
+                }
+            ]
+        words.append(entry)
+    return words
+
+
+def _hanzi(rng: np.random.Generator) -> str:
+    return "".join(
+        _HANZI[i] for i in rng.integers(len(_HANZI), size=rng.integers(2, 6))
+    )
+
+
+def review_counts(rng: np.random.Generator, users: int, words: int, total: int):
+    """把 *total* 条复习记录按帕累托分布分给各用户，每人不超过 *words* 条。"""
+    weights = rng.pareto(1.2, size=users) + 1
+    counts = np.floor(weights / weights.sum() * total).astype(np.int64)
+    return np.minimum(counts, words)
+
+
+def review_rows(
+    rng: np.random.Generator,
+    user_id: int,
+    word_ids: np.ndarray,
+    count: int,
+    now,
+    idle_days: float = 0.0,
+) -> list[dict]:
+    """生成一个用户的 *count* 条复习记录，每个单词至多一条。
+
+    *idle_days* 为该用户最近一次使用距今的天数。
+    """
+    # Efraimidis–Spirakis 加权无放回抽样（取对数形式避免下溢）：
+    # 第 i 个单词的权重为 1 / (i + 50)，靠前的单词更常被选中
+    keys = np.log(rng.random(len(word_ids))) * (np.arange(len(word_ids)) + 50.0)
+    chosen = word_ids[np.argpartition(-keys, count - 1)[:count]] if count else []
+    quality = rng.choice(6, size=count, p=_QUALITY_P)
+    repetitions = np.where(quality < 3, 0, rng.geometric(0.25, size=count))
+    ease = np.clip(rng.normal(2.5, 0.15, size=count), 1.3, 2.8)
+    interval = np.where(
+        repetitions <= 1,
+        1,
+        np.where(
+            repetitions == 2,
+            6,
+            np.minimum(6 * ease ** np.maximum(repetitions - 2, 0), 365).round(),
+        ),
+    ).astype(np.int64)
+    age = np.minimum(idle_days + rng.random(count) * interval, 365.0)
+    rows = []
+    for i in range(count):
+        reviewed_at = now - timedelta(days=float(age[i]))
+        rows.append(
+            {
+                "user_id": user_id,
+                "word_id": int(chosen[i]),
+                "quality": int(quality[i]),
+                "last_interval": int(interval[i]),
+                "repetitions": int(repetitions[i]),
+                "ease_factor": round(float(ease[i]), 2),
+                "next_review": reviewed_at.date() + timedelta(days=int(interval[i])),
+                "reviewed_at": reviewed_at,
+            }
+        )
+    return rows
+
+
+def generate(users: int, words: int, reviews: int, seed: int = 0) -> dict:
+    """向当前数据库写入合成数据，返回各阶段的耗时（秒）。"""
+    rng = np.random.default_rng(seed)
+    timings = {}
+    init_db()
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"wordBook_SYNTH{seed}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(vocabulary(rng, words), f, ensure_ascii=False)
+        crud.sync_wordbooks(directory)
+    timings["words"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hashed = get_password_hash(PASSWORD)
+    with get_session() as session:
+        # 直接批量插入，不经过 users.json 日志；用户名按 ID 区间编号，可重复追加
+        first = (session.exec(select(func.max(User.id))).one() or 0) + 1
+        session.execute(
+            insert(User),
+            [
+                {"username": f"{USERNAME_PREFIX}{first + i}", "hashed_password": hashed}
+                for i in range(users)
+            ],
+        )
+        session.commit()
+        user_ids = session.exec(select(User.id).where(User.id >= first)).all()
+        word_ids = np.array(session.exec(select(Word.id).order_by(Word.id)).all())
+    timings["users"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    counts = review_counts(rng, len(user_ids), len(word_ids), reviews)
+    with get_session() as session:
+        batch = []
+        for user_id, count in zip(user_ids, counts):
+            idle = rng.exponential(1.0)
+            batch += review_rows(rng, user_id, word_ids, int(count), now, idle)
+            if len(batch) >= BATCH_SIZE:
+                session.execute(insert(ReviewLog), batch)
+                batch = []
+        if batch:
+            session.execute(insert(ReviewLog), batch)
+        session.commit()
+    crud.backfill_daily_stats()
+    timings["reviews"] = time.perf_counter() - start
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--reviews", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if "DATABASE_URL" not in os.environ:
+        sys.exit("Set DATABASE_URL to a dedicated benchmark database first.")
+    timings = generate(args.users, args.words, args.reviews, args.seed)
+    for name, seconds in timings.items():
+        print(f"{name:<8} {seconds:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
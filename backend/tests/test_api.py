@@ -2,13 +2,24 @@
 
 import os, sys
 
+import pytest
+
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 from fastapi.testclient import TestClient
 from backend.app.main import app
+from backend.app import security, startup
 
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def started_app():
+    """Run the app lifespan and wait for the background startup phases."""
+    with client:
+        assert startup.state.wait(timeout=60)
+        yield
+
+
 def test_register_and_login():
     """Users can register and subsequently log in."""
     r = client.post("/auth/register", json={"username": "alice", "password": "pwd"})
@@ -44,6 +55,21 @@ def test_refresh_and_search():
     data = r_search.json()
     assert any("absorb" == w["word"] for w in data)
 
+    # 词头完全相同的排在最前，分页不重复
+    r_page = client.get("/search", params={"q": "acc", "limit": 2}, headers=headers)
+    r_next = client.get(
+        "/search", params={"q": "acc", "limit": 2, "offset": 2}, headers=headers
+    )
+    first, second = [w["id"] for w in r_page.json()], [w["id"] for w in r_next.json()]
+    assert len(first) == 2 and not set(first) & set(second)
+    r_exact = client.get("/search", params={"q": "access"}, headers=headers)
+    assert r_exact.json()[0]["word"] == "access"
+
+    # 没有子串命中时回退到模糊匹配，容忍拼写错误
+    r_typo = client.get("/search", params={"q": "absrob"}, headers=headers)
+    assert r_typo.json()[0]["word"] == "absorb"
+    assert client.get("/search", params={"q": "qzx"}, headers=headers).json() == []
+
 
 def test_stats_overview():
     """Stats endpoint returns expected keys."""
@@ -99,6 +125,27 @@ def test_daily_limit_respected():
     assert r_stats.json()["due"] == 0
 
 
+def test_daily_limit_counts_distinct_words():
+    """Re-reviewing the same card today uses up only one slot of the limit."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    due = client.get("/words/today", params={"limit": 3}, headers=headers).json()
+    word_id = due[0]["id"]
+    for quality in (1, 4):
+        client.post(f"/review/{word_id}", json={"quality": quality}, headers=headers)
+
+    r_today = client.get("/words/today", params={"limit": 3}, headers=headers)
+    assert len(r_today.json()) == 2
+    r_stats = client.get("/stats/overview", params={"limit": 3}, headers=headers)
+    assert r_stats.json()["due"] == 2
+    # the roll-up still counts both review events
+    daily = client.get("/stats/daily", headers=headers).json()
+    assert sum(day["total"] for day in daily) == 2
+
+
 def test_account_deletion_flow():
     """Users can request deletion and admin can approve it."""
     r = client.post("/auth/register", json={"username": "deluser", "password": "pwd"})
@@ -133,3 +180,953 @@ def test_account_deletion_flow():
         "/auth/login", data={"username": "deluser", "password": "pwd"}
     )
     assert r_login.status_code == 401
+
+
+def test_search_suggest_prefix():
+    """Autocomplete returns headwords starting with the query."""
+    r = client.post("/auth/register", json={"username": "dave", "password": "pwd"})
+    if r.status_code == 400:
+        r = client.post("/auth/login", data={"username": "dave", "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    r_sug = client.get(
+        "/search/suggest", params={"q": "ACC", "limit": 3}, headers=headers
+    )
+    assert r_sug.status_code == 200
+    data = r_sug.json()
+    assert 0 < len(data) <= 3
+    assert all(w["word"].lower().startswith("acc") for w in data)
+
+
+def test_reviewed_word_leaves_due_list():
+    """A word reviewed successfully is no longer due today."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+
+    before = client.get("/words/today", headers=headers).json()
+    word_id = before[0]["id"]
+    client.post(f"/review/{word_id}", json={"quality": 4}, headers=headers)
+
+    after = client.get("/words/today", headers=headers).json()
+    assert len(after) == len(before) - 1
+    assert word_id not in {w["id"] for w in after}
+
+
+def test_favorites_payload_shape():
+    """Favorites carry added_at while cached search payloads stay untouched."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+
+    word = client.get("/search", params={"q": "absorb"}, headers=headers).json()[0]
+    assert word["added_at"] is None
+    assert isinstance(word["translations"], list)
+
+    client.post(f"/favorites/{word['id']}", headers=headers)
+    favs = client.get("/favorites", headers=headers).json()
+    assert [f["id"] for f in favs] == [word["id"]]
+    assert favs[0]["added_at"]
+    assert favs[0]["phrases"] == word["phrases"]
+
+    again = client.get("/search", params={"q": "absorb"}, headers=headers).json()[0]
+    assert again["added_at"] is None
+
+
+def test_streaming_exports():
+    """Personal CSV and admin ZIP exports contain the review logs."""
+    import csv, io, uuid, zipfile
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    word_id = client.get("/words/today", headers=headers).json()[0]["id"]
+    client.post(f"/review/{word_id}", json={"quality": 3}, headers=headers)
+
+    r_csv = client.get("/stats/export", headers=headers)
+    assert r_csv.status_code == 200
+    rows = list(csv.reader(io.StringIO(r_csv.text)))
+    assert rows[0][0] == "word_id"
+    assert [int(row[0]) for row in rows[1:]] == [word_id]
+
+    assert client.get("/admin/logs/export", headers=headers).status_code == 403
+    admin_token = client.post(
+        "/auth/login", data={"username": "Admin", "password": "88888888"}
+    ).json()["access_token"]
+    r_zip = client.get("/admin/logs/export", headers=auth_header(admin_token))
+    assert r_zip.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r_zip.content)) as zf:
+        name = next(n for n in zf.namelist() if n.endswith(f"_{username}.csv"))
+        content = zf.read(name).decode("utf-8")
+    assert content.splitlines()[1].startswith(f"{word_id},3,")
+
+
+def test_cached_identity_invalidated():
+    """Role changes and deletions are visible to already cached tokens."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    me = client.get("/users/me", headers=headers).json()
+    assert me["role"] == "user"
+
+    admin_token = client.post(
+        "/auth/login", data={"username": "Admin", "password": "88888888"}
+    ).json()["access_token"]
+    admin_headers = auth_header(admin_token)
+    r_role = client.put(
+        f"/admin/users/{me['id']}/role", params={"role": "admin"}, headers=admin_headers
+    )
+    assert r_role.status_code == 200
+    assert client.get("/users/me", headers=headers).json()["role"] == "admin"
+
+    client.post(f"/admin/deletion_requests/{me['id']}/approve", headers=admin_headers)
+    assert client.get("/users/me", headers=headers).status_code == 401
+
+
+def test_login_rehashes_outdated_cost():
+    """Hashes with a stale bcrypt cost are upgraded transparently on login."""
+    import uuid
+    from passlib.context import CryptContext
+    from backend.app import crud
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    assert r.status_code == 200
+    user = crud.get_user_by_username(username)
+    cheap = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("pwd")
+    crud.set_password_hash(user.id, cheap)
+
+    r_login = client.post("/auth/login", data={"username": username, "password": "pwd"})
+    assert r_login.status_code == 200
+    upgraded = crud.get_user_by_username(username).hashed_password
+    assert upgraded != cheap
+    assert upgraded.startswith(f"$2b${security.BCRYPT_ROUNDS:02d}$")
+
+
+def test_password_hash_metrics():
+    """Admins can read password hashing pool metrics."""
+    admin_token = client.post(
+        "/auth/login", data={"username": "Admin", "password": "88888888"}
+    ).json()["access_token"]
+    r = client.get("/admin/metrics/password_hash", headers=auth_header(admin_token))
+    assert r.status_code == 200
+    data = r.json()
+    assert data["completed"] >= 1
+    assert data["in_flight"] == 0
+
+
+def test_review_batch_upserts():
+    """Batch review applies all records and returns the resulting schedule."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    ids = [w["id"] for w in client.get("/words/today", headers=headers).json()[:2]]
+
+    client.post(f"/review/{ids[0]}", json={"quality": 4}, headers=headers)
+    batch = [
+        {"word_id": ids[0], "quality": 5, "reviewed_at": "2030-01-01T08:00:00Z"},
+        {"word_id": ids[1], "quality": 1},
+        {"word_id": ids[1], "quality": 4, "reviewed_at": "2031-01-01T08:00:00"},
+    ]
+    r_batch = client.post("/review/batch", json=batch, headers=headers)
+    assert r_batch.status_code == 200
+    schedule = {s["word_id"]: s for s in r_batch.json()}
+    assert schedule[ids[0]]["last_interval"] == 6
+    assert schedule[ids[0]]["next_review"] == "2030-01-07"
+    assert schedule[ids[1]]["last_interval"] == 1
+    assert schedule[ids[1]]["next_review"] == "2031-01-02"
+
+    rows = client.get("/stats/export", headers=headers).text.splitlines()[1:]
+    assert sorted(int(row.split(",")[0]) for row in rows) == sorted(ids)
+
+
+def test_review_quality_must_be_between_0_and_5():
+    """Out-of-range quality scores are rejected before reaching SM-2."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    word_id = client.get("/words/today", headers=headers).json()[0]["id"]
+    for quality in (-1, 6):
+        r_one = client.post(
+            f"/review/{word_id}", json={"quality": quality}, headers=headers
+        )
+        assert r_one.status_code == 422
+        batch = [{"word_id": word_id, "quality": quality}]
+        assert (
+            client.post("/review/batch", json=batch, headers=headers).status_code == 422
+        )
+    assert client.get("/stats/overview", headers=headers).json()["reviewed"] == 0
+
+
+def test_review_batch_caps_intervals():
+    """Many perfect reviews of one word in a batch do not overflow dates."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    word_id = client.get("/words/today", headers=headers).json()[0]["id"]
+    batch = [{"word_id": word_id, "quality": 5}] * 40
+    r_batch = client.post("/review/batch", json=batch, headers=headers)
+    assert r_batch.status_code == 200
+    assert r_batch.json()[0]["last_interval"] == 36500
+
+
+def test_stats_overview_counts_match_due_list():
+    """The aggregate overview agrees with the due list and review history."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    due = client.get("/words/today", headers=headers).json()
+    stats = client.get("/stats/overview", headers=headers).json()
+    assert stats == {"reviewed": 0, "due": len(due), "next_due": None}
+
+    client.post(f"/review/{due[0]['id']}", json={"quality": 5}, headers=headers)
+    stats = client.get("/stats/overview", headers=headers).json()
+    assert stats["reviewed"] == 1
+    assert stats["due"] == len(due) - 1
+    assert stats["next_due"] is not None
+    limited = client.get("/stats/overview", params={"limit": 3}, headers=headers)
+    assert limited.json()["due"] == 2
+
+
+def test_stats_overview_uses_one_session(monkeypatch):
+    """The overview, a cold word count and today's count share one session."""
+    import uuid
+    from backend.app import crud, database
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    opened = []
+
+    def counting(factory):
+        def wrapper():
+            opened.append(factory.__name__)
+            return factory()
+
+        return wrapper
+
+    monkeypatch.setattr(
+        database, "get_async_session", counting(database.get_async_session)
+    )
+    monkeypatch.setattr(database, "get_session", counting(database.get_session))
+    monkeypatch.setattr(crud, "_word_count", None)
+    r_stats = client.get("/stats/overview", params={"limit": 3}, headers=headers)
+    assert r_stats.status_code == 200
+    assert opened == ["get_async_session"]
+
+    user_id = crud.get_user_by_username(username).id
+    opened.clear()
+    crud._word_count = None
+    crud.review_overview(user_id, 3)
+    assert opened == ["get_session"]
+
+
+def test_daily_stats_rollup():
+    """Reviews are rolled up per day and quality."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    ids = [w["id"] for w in client.get("/words/today", headers=headers).json()[:3]]
+    client.post(f"/review/{ids[0]}", json={"quality": 5}, headers=headers)
+    client.post(
+        "/review/batch",
+        json=[
+            {"word_id": ids[1], "quality": 5, "reviewed_at": "2030-03-01T10:00:00"},
+            {"word_id": ids[2], "quality": 2, "reviewed_at": "2030-03-01T11:00:00"},
+        ],
+        headers=headers,
+    )
+
+    r_daily = client.get(
+        "/stats/daily",
+        params={"from": "2030-03-01", "to": "2030-03-02"},
+        headers=headers,
+    )
+    assert r_daily.status_code == 200
+    assert r_daily.json() == [
+        {"day": "2030-03-01", "total": 2, "by_quality": {"2": 1, "5": 1}}
+    ]
+    today = client.get("/stats/daily", headers=headers).json()
+    assert today[-1]["total"] == 1
+    assert (
+        client.get(
+            "/stats/daily",
+            params={"from": "2030-03-02", "to": "2030-03-01"},
+            headers=headers,
+        ).status_code
+        == 400
+    )
+
+
+def test_sqlite_runs_in_wal_mode():
+    """SQLite connections are configured for concurrent readers."""
+    from sqlalchemy import text
+    from backend.app.database import engine
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+
+def test_async_routes_work_on_in_memory_database(tmp_path):
+    """With DATABASE_URL=sqlite:// both engines see the tables init_db creates."""
+    import subprocess
+
+    script = """
+from fastapi.testclient import TestClient
+from backend.app.main import app
+
+with TestClient(app) as c:
+    r = c.post("/auth/register", json={"username": "mem", "password": "pwd"})
+    h = {"Authorization": "Bearer " + r.json()["access_token"]}
+    words = c.get("/words/today", params={"limit": 2}, headers=h)
+    assert words.status_code == 200, words.text
+    word_id = words.json()[0]["id"]
+    assert c.post(f"/review/{word_id}", json={"quality": 4}, headers=h).is_success
+    for url in ("/stats/overview", "/favorites", "/search?q=abs", "/users/me"):
+        assert c.get(url, headers=h).status_code == 200, url
+"""
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    env = dict(
+        os.environ,
+        DATABASE_URL="sqlite://",
+        STARTUP_IN_BACKGROUND="0",
+        PYTHONPATH=os.path.abspath(root),
+    )
+    env.pop("ASYNC_DATABASE_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_get_session_is_independent_per_call():
+    """A rollback in one helper's session does not discard another's work."""
+    from backend.app import crud
+    from backend.app.database import get_session
+    from backend.app.models import DeletionRequest
+
+    user_id = crud.add_user("session_owner", "pwd").id
+    with get_session() as first, get_session() as second:
+        assert first is not second
+        first.add(DeletionRequest(user_id=user_id))
+        second.rollback()
+        first.commit()
+    assert any(r.user_id == user_id for r in crud.list_deletion_requests())
+
+
+def test_async_crud_matches_sync():
+    """Async CRUD helpers return the same results as the sync API."""
+    import asyncio
+    import uuid
+    from backend.app import crud, crud_async
+
+    user = crud.create_user("user" + uuid.uuid4().hex[:8], "pwd")
+    crud.record_review(user.id, 1, 5)
+
+    async def fetch():
+        return (
+            await crud_async.get_due_words(user.id, 3),
+            await crud_async.review_overview(user.id),
+            await crud_async.search_words("acc"),
+        )
+
+    due, overview, found = asyncio.run(fetch())
+    assert [w.id for w in due] == [w.id for w in crud.get_due_words(user.id, 3)]
+    assert overview == crud.review_overview(user.id)
+    assert [w.id for w in found] == [w.id for w in crud.search_words("acc")]
+
+
+def test_wordbook_conditional_compressed_and_paged():
+    """Word books support ETag revalidation, gzip and pagination."""
+    r = client.get("/wordbook/TEST", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    book = r.json()
+    assert len(book) == 10
+
+    etag = r.headers["etag"]
+    r_304 = client.get("/wordbook/TEST", headers={"If-None-Match": etag})
+    assert r_304.status_code == 304
+    r_ims = client.get(
+        "/wordbook/TEST", headers={"If-Modified-Since": r.headers["last-modified"]}
+    )
+    assert r_ims.status_code == 304
+
+    r_page = client.get("/wordbook/TEST", params={"offset": 2, "limit": 3})
+    assert r_page.json() == book[2:5]
+    assert r_page.headers["x-total-count"] == "10"
+    assert r_page.headers["etag"] != etag
+    assert client.get("/wordbook/MISSING").status_code == 404
+
+
+def test_health_and_readiness(monkeypatch):
+    """/healthz always answers; /readyz reports phase timings once started."""
+    assert client.get("/healthz").json() == {"status": "ok"}
+    r = client.get("/readyz")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ready"
+    # the rollup backfill runs before requests are served, not in the background
+    assert list(body["phases"])[:3] == ["init_db", "backfill_daily_stats", "seed_words"]
+    assert "sync_wordbooks" in body["phases"]
+    monkeypatch.setattr(startup, "state", startup.Startup())
+    assert client.get("/readyz").status_code == 503
+
+
+def test_failed_startup_phase_is_reported():
+    """A failing phase stops startup and surfaces the error."""
+    state = startup.Startup()
+    ran = []
+
+    def boom():
+        raise RuntimeError("boom")
+
+    state.run([("ok", lambda: ran.append(1)), ("bad", boom), ("after", ran.clear)])
+    assert not state.wait(timeout=1)
+    assert ran == [1]
+    assert state.snapshot()["status"] == "failed"
+    assert state.snapshot()["error"] == "bad: boom"
+    assert "after" not in state.timings
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Serve chat completions from a local HTTP server and point the app at it."""
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from backend.app import main
+
+    class Stub:
+        calls = []
+        delay = 0.0
+        status = 200
+        # optional callable building the reply content from the request body
+        reply = None
+        # streaming replies: pieces written so far and client disconnects
+        sent = 0
+        chunk_delay = 0.0
+        aborted = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            Stub.calls.append(body)
+            time.sleep(Stub.delay)
+            prompt = body["messages"][-1]["content"]
+            content = Stub.reply(body) if Stub.reply else f" echo:{prompt} "
+            if body.get("stream") and Stub.status == 200:
+                self.stream_reply(content)
+                return
+            reply = json.dumps({"choices": [{"message": {"content": content}}]})
+            reply = reply.encode()
+            self.send_response(Stub.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def stream_reply(self, content):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            try:
+                for i in range(0, len(content), 8):
+                    delta = {"choices": [{"delta": {"content": content[i : i + 8]}}]}
+                    self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode())
+                    self.wfile.flush()
+                    Stub.sent += 1
+                    time.sleep(Stub.chunk_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                Stub.aborted.set()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        main, "TRANSLATE_API_URL", f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    monkeypatch.setattr(main, "TRANSLATE_API_KEY", "test-key")
+    yield Stub
+    server.shutdown()
+    server.server_close()
+
+
+def test_translate_cache_memory_and_db(stub_llm):
+    """Repeated translations hit the LRU, then the table after a memory flush."""
+    import uuid
+    from backend.app import translation_cache
+
+    payload = {"text": "hello " + uuid.uuid4().hex, "lang": "Chinese"}
+    first = client.post("/translate", json=payload)
+    assert first.status_code == 200
+    assert payload["text"] in first.json()["result"]
+    before = translation_cache.stats()
+    assert client.post("/translate", json=payload).json() == first.json()
+    translation_cache.clear()
+    assert client.post("/translate", json=payload).json() == first.json()
+    assert len(stub_llm.calls) == 1
+    after = translation_cache.stats()
+    assert after["memory_hits"] == before["memory_hits"] + 1
+    assert after["db_hits"] == before["db_hits"] + 1
+    other = client.post("/translate", json={**payload, "lang": "French"})
+    assert other.status_code == 200
+    assert len(stub_llm.calls) == 2
+
+
+def test_translate_coalesces_concurrent_requests(stub_llm):
+    """Identical in-flight translations share a single upstream call."""
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+
+    stub_llm.delay = 0.3
+    payload = {"text": "coalesce " + uuid.uuid4().hex, "lang": "Chinese"}
+    with ThreadPoolExecutor(5) as pool:
+        results = list(
+            pool.map(lambda _: client.post("/translate", json=payload), range(5))
+        )
+    assert {r.status_code for r in results} == {200}
+    assert len({r.json()["result"] for r in results}) == 1
+    assert len(stub_llm.calls) == 1
+
+
+def test_translate_errors_are_not_cached(stub_llm):
+    """Upstream client errors propagate and leave nothing in the cache."""
+    import uuid
+
+    payload = {"text": "fail " + uuid.uuid4().hex, "lang": "Chinese"}
+    stub_llm.status = 400
+    assert client.post("/translate", json=payload).status_code == 400
+    stub_llm.status = 200
+    assert client.post("/translate", json=payload).status_code == 200
+    assert len(stub_llm.calls) == 2
+
+
+def test_translation_cache_metrics_admin_only():
+    """Hit-rate statistics are restricted to admins."""
+    admin_token = client.post(
+        "/auth/login", data={"username": "Admin", "password": "88888888"}
+    ).json()["access_token"]
+    r = client.get("/admin/metrics/translation_cache", headers=auth_header(admin_token))
+    assert r.status_code == 200
+    assert {"hit_rate", "misses", "coalesced"} <= set(r.json())
+
+
+def test_llm_breaker_fails_fast_when_upstream_down(stub_llm, monkeypatch):
+    """Upstream 5xx errors are retried, then the breaker short-circuits calls."""
+    import uuid
+    from backend.app import llm_client
+
+    monkeypatch.setattr(llm_client, "breaker", llm_client.CircuitBreaker(3, 60))
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 1)
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF_BASE", 0)
+    stub_llm.status = 500
+
+    def translate():
+        text = "down " + uuid.uuid4().hex
+        return client.post("/translate", json={"text": text, "lang": "Chinese"})
+
+    assert translate().status_code == 502
+    assert len(stub_llm.calls) == 2
+    # the third failure opens the breaker, so the retry is skipped
+    assert translate().status_code == 503
+    assert len(stub_llm.calls) == 3
+    assert llm_client.breaker.state == "open"
+    assert translate().status_code == 503
+    assert len(stub_llm.calls) == 3
+
+    # after the cooldown a single trial request closes the breaker again
+    llm_client.breaker.opened_at -= 60
+    stub_llm.status = 200
+    assert translate().status_code == 200
+    assert llm_client.breaker.state == "closed"
+
+
+def test_circuit_breaker_half_open_allows_one_trial():
+    """Only one request passes while the breaker is half-open."""
+    from backend.app.llm_client import CircuitBreaker
+
+    breaker = CircuitBreaker(2, 60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    breaker.opened_at -= 60
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_translate_batch_dedupes_chunks_and_reports_partial_failures(
+    stub_llm, monkeypatch
+):
+    """Batch items are deduped, framed as JSON, chunked and split back per item."""
+    import json
+    import uuid
+    from backend.app import batch_translate
+
+    monkeypatch.setattr(batch_translate, "TRANSLATE_BATCH_MAX_ITEMS", 2)
+
+    def reply(body):
+        prompt = body["messages"][-1]["content"]
+        texts = json.loads(prompt[prompt.index("{") :])
+        if any("BROKEN" in t for t in texts.values()):
+            return "sorry, I cannot do that"
+        # drop one id to simulate the model skipping an item
+        return json.dumps(
+            {k: "T:" + v for k, v in texts.items() if "SKIP" not in v},
+            ensure_ascii=False,
+        )
+
+    stub_llm.reply = reply
+    tag = uuid.uuid4().hex[:8]
+    tricky = f'say "}}, {{\n" {tag}\n---'
+    texts = [f"a {tag}", tricky, f"a {tag}", f"b {tag}", f"SKIP {tag}"]
+    texts.append(f"BROKEN {tag}")
+    items = [{"text": t, "lang": "Chinese"} for t in texts]
+    r = client.post("/translate/batch", json={"items": items})
+    assert r.status_code == 200
+    out = r.json()
+    assert [o["text"] for o in out] == texts
+    assert out[0]["result"] == f"T:a {tag}" == out[2]["result"]
+    assert out[1]["result"] == "T:" + tricky
+    assert out[3]["result"] == f"T:b {tag}"
+    assert out[4]["result"] is None and out[4]["error"]
+    assert out[5]["result"] is None and out[5]["error"]
+    # five unique texts in chunks of two
+    assert len(stub_llm.calls) == 3
+
+    # successful items are cached and no longer sent upstream
+    r = client.post("/translate/batch", json={"items": items[:4]})
+    assert [o["result"] for o in r.json()] == [o["result"] for o in out[:4]]
+    assert len(stub_llm.calls) == 3
+    single = client.post("/translate", json=items[3])
+    assert single.json()["result"] == f"T:b {tag}"
+    assert len(stub_llm.calls) == 3
+
+
+def test_translate_many_isolates_unexpected_chunk_errors(monkeypatch):
+    """A chunk failing with a non-LLM error only fails its own items."""
+    import asyncio
+    import json
+    import uuid
+    from backend.app import batch_translate
+
+    monkeypatch.setattr(batch_translate, "TRANSLATE_BATCH_MAX_ITEMS", 1)
+
+    async def complete(system_prompt, user_prompt, max_tokens, temperature):
+        texts = json.loads(user_prompt[user_prompt.index("{") :])
+        if "bad" in texts["0"]:
+            raise KeyError("choices")
+        return json.dumps({"0": "T:" + texts["0"]})
+
+    tag = uuid.uuid4().hex[:8]
+    items = [(f"good {tag}", "Chinese"), (f"bad {tag}", "Chinese")]
+    results, errors = asyncio.run(
+        batch_translate.translate_many(items, "stub-model", complete)
+    )
+    assert results == {items[0]: f"T:good {tag}"}
+    assert list(errors) == [items[1]]
+
+
+def test_chunk_texts_respects_token_budget():
+    """Chunks stay within the budget; an oversized text gets its own chunk."""
+    from backend.app.batch_translate import chunk_texts, estimate_tokens
+
+    texts = ["x" * 30, "y" * 30, "z" * 300, "w" * 3]
+    chunks = chunk_texts(texts, budget=40, max_items=10)
+    assert chunks == [["x" * 30, "y" * 30], ["z" * 300], ["w" * 3]]
+    assert sum(len(c) for c in chunks) == len(texts)
+    assert estimate_tokens("中文") == 3
+
+
+def parse_sse(text):
+    """Split an SSE body into (event, data) pairs."""
+    import json
+
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_translate_stream_relays_deltas_and_caches(stub_llm):
+    """stream=true relays upstream deltas as SSE and caches the final text."""
+    import uuid
+
+    payload = {"text": "stream " + uuid.uuid4().hex, "lang": "Chinese"}
+    r = client.post("/translate?stream=true", json=payload)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(r.text)
+    deltas = "".join(data["delta"] for name, data in events if name == "message")
+    assert len(events) > 3
+    assert events[-1] == ("done", {"result": deltas.strip()})
+    assert stub_llm.calls[0]["stream"] is True
+    assert payload["text"] in deltas
+
+    assert client.post("/translate", json=payload).json()["result"] == deltas.strip()
+    again = parse_sse(client.post("/translate?stream=true", json=payload).text)
+    assert again == [("done", {"result": deltas.strip()})]
+    assert len(stub_llm.calls) == 1
+
+
+def test_generate_article_stream_and_error_event(stub_llm):
+    """Article generation streams too; upstream errors become an error event."""
+    import uuid
+
+    r = client.post(
+        "/auth/register",
+        json={"username": "user" + uuid.uuid4().hex[:8], "password": "pwd"},
+    )
+    headers = auth_header(r.json()["access_token"])
+    r = client.post(
+        "/generate_article?stream=true", json={"word_ids": [1, 2]}, headers=headers
+    )
+    events = parse_sse(r.text)
+    assert events[-1][0] == "done"
+    assert events[-1][1]["result"].startswith("echo:Please write")
+
+    # a word set that has not been cached yet
+    stub_llm.status = 400
+    r = client.post(
+        "/generate_article?stream=true", json={"word_ids": [1, 2, 7]}, headers=headers
+    )
+    assert parse_sse(r.text) == [
+        ("error", {"status": 400, "detail": "LLM returned 400"})
+    ]
+
+
+def test_stream_close_releases_upstream(stub_llm, monkeypatch):
+    """Closing the stream early drops the upstream connection immediately."""
+    import asyncio
+    from backend.app import llm_client, main
+
+    # the shared client belongs to the app's event loop; use a fresh one here
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.setattr(llm_client, "_semaphore", None)
+    stub_llm.reply = lambda body: "x" * 8 * 200
+    stub_llm.chunk_delay = 0.01
+
+    async def read_one_then_close():
+        payload = {"messages": [{"role": "user", "content": "long"}]}
+        stream = llm_client.stream_chat(main.TRANSLATE_API_URL, "key", payload)
+        first = await stream.__anext__()
+        await stream.aclose()
+        in_flight = llm_client._in_flight
+        await llm_client.close()
+        return first, in_flight
+
+    first, in_flight = asyncio.run(read_one_then_close())
+    assert first == "x" * 8
+    assert in_flight == 0
+    assert stub_llm.aborted.wait(timeout=5)
+    assert stub_llm.sent < 200
+
+
+@pytest.fixture
+def empty_article_cache():
+    """Start from an empty article cache so runs do not depend on each other."""
+    from sqlmodel import delete
+    from backend.app.database import get_session
+    from backend.app import article_cache
+    from backend.app.models import ArticleCache
+
+    with get_session() as session:
+        session.exec(delete(ArticleCache))
+        session.commit()
+    article_cache._entries = None
+
+
+def test_generate_article_cache_rotates_variants(
+    stub_llm, monkeypatch, empty_article_cache
+):
+    """Repeat requests are served from cache while variants fill in the background."""
+    import uuid
+    from backend.app import article_cache
+
+    monkeypatch.setattr(article_cache, "ARTICLE_CACHE_VARIANTS", 2)
+    stub_llm.reply = lambda body: f"article {len(stub_llm.calls)}"
+    r = client.post(
+        "/auth/register",
+        json={"username": "user" + uuid.uuid4().hex[:8], "password": "pwd"},
+    )
+    headers = auth_header(r.json()["access_token"])
+    # listed out of order and with a duplicate
+    body = {"word_ids": [17, 11, 13, 11]}
+
+    def generate(**params):
+        return client.post(
+            "/generate_article", json=body, headers=headers, params=params
+        ).json()["result"]
+
+    assert generate() == "article 1"
+    # cache hit; the second variant is generated after the response
+    assert generate() == "article 1"
+    assert len(stub_llm.calls) == 2
+    results = [generate() for _ in range(4)]
+    assert sorted(set(results)) == ["article 1", "article 2"]
+    assert len(stub_llm.calls) == 2
+    events = parse_sse(
+        client.post("/generate_article?stream=true", json=body, headers=headers).text
+    )
+    assert events[0][0] == "done" and len(events) == 1
+    assert len(stub_llm.calls) == 2
+
+
+def test_article_cache_evicts_least_recently_used(monkeypatch, empty_article_cache):
+    """The table never grows past its entry cap."""
+    import asyncio
+    import uuid
+    from sqlmodel import select
+    from backend.app import article_cache
+    from backend.app.database import get_session
+    from backend.app.models import ArticleCache
+
+    monkeypatch.setattr(article_cache, "ARTICLE_CACHE_MAX_ENTRIES", 3)
+    keys = [uuid.uuid4().hex for _ in range(4)]
+
+    async def fill():
+        for key in keys:
+            await article_cache.put(key, "text " + key)
+        return await article_cache.get(keys[0])
+
+    assert asyncio.run(fill()) == (None, 0)
+    with get_session() as session:
+        left = session.exec(select(ArticleCache.key)).all()
+    assert sorted(left) == sorted(keys[1:])
+
+
+def test_article_cache_fill_logs_unexpected_errors(caplog):
+    """A non-LLM failure in the background fill is logged, not raised."""
+    import asyncio
+    from backend.app import article_cache
+
+    async def complete(*args, **kwargs):
+        raise KeyError("choices")
+
+    with caplog.at_level("ERROR", logger="uvicorn.error"):
+        asyncio.run(article_cache.fill("broken-key", ["word"], complete))
+    assert "article cache fill failed" in caplog.text
+    assert "broken-key" not in article_cache._filling
+
+
+def test_favorites_warm_article_cache(stub_llm, monkeypatch, empty_article_cache):
+    """With warming on, changing favorites pre-generates their article."""
+    import uuid
+    from backend.app import article_cache
+
+    monkeypatch.setattr(article_cache, "ARTICLE_CACHE_WARM", True)
+    monkeypatch.setattr(article_cache, "ARTICLE_CACHE_VARIANTS", 1)
+    stub_llm.reply = lambda body: "warm " + body["messages"][-1]["content"]
+    r = client.post(
+        "/auth/register",
+        json={"username": "user" + uuid.uuid4().hex[:8], "password": "pwd"},
+    )
+    headers = auth_header(r.json()["access_token"])
+    client.post("/favorites/3", headers=headers)
+    client.post("/favorites/5", headers=headers)
+    calls = len(stub_llm.calls)
+    assert calls == 2
+    r = client.post("/generate_article", json={"word_ids": [5, 3]}, headers=headers)
+    assert r.json()["result"].startswith("warm ")
+    assert len(stub_llm.calls) == calls
+
+
+def test_favorites_filter_uses_text_not_json_keys():
+    """q matches headwords and translations but never JSON keys like 'type'."""
+    import uuid
+
+    username = "user" + uuid.uuid4().hex[:8]
+    r = client.post("/auth/register", json={"username": username, "password": "pwd"})
+    headers = auth_header(r.json()["access_token"])
+    absorb = client.get("/search", params={"q": "absorb"}, headers=headers).json()[0]
+    other = client.get("/search", params={"q": "access"}, headers=headers).json()[0]
+    for word in (absorb, other):
+        client.post(f"/favorites/{word['id']}", headers=headers)
+
+    def favorites(q):
+        r = client.get("/favorites", params={"q": q}, headers=headers)
+        return [w["word"] for w in r.json()]
+
+    assert favorites("type") == []
+    assert favorites("translation") == []
+    assert favorites("吸收") == ["absorb"]
+    assert favorites("SORB") == ["absorb"]
+    assert sorted(favorites("a")) == sorted([absorb["word"], other["word"]])
+
+
+def test_favorites_keyset_pagination_and_idempotent_upsert():
+    """Favorites page by (added_at, id) cursor; re-adding keeps one row."""
+    import uuid
+    from datetime import datetime
+    from sqlmodel import update
+    from backend.app import crud
+    from backend.app.database import get_session
+    from backend.app.models import Favorite
+
+    r = client.post(
+        "/auth/register",
+        json={"username": "user" + uuid.uuid4().hex[:8], "password": "pwd"},
+    )
+    headers = auth_header(r.json()["access_token"])
+    user_id = client.get("/users/me", headers=headers).json()["id"]
+    for word_id in range(1, 8):
+        assert client.post(f"/favorites/{word_id}", headers=headers).status_code == 200
+    assert not crud.add_favorite(user_id, 3)
+    # several favorites sharing a timestamp must still page without gaps
+    with get_session() as session:
+        session.exec(
+            update(Favorite)
+            .where(Favorite.user_id == user_id, Favorite.word_id <= 4)
+            .values(added_at=datetime(2024, 1, 1))
+        )
+        session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/favorites", params=params, headers=headers)
+        seen += [f["id"] for f in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == [w.id for w, *_ in crud.list_favorites(user_id)]
+    assert sorted(seen) == list(range(1, 8))
+    assert seen[-4:] == [4, 3, 2, 1]
+
+    r = client.get("/favorites", params={"cursor": "!!"}, headers=headers)
+    assert r.status_code == 400
+    assert client.delete("/favorites/3", headers=headers).status_code == 200
+    assert client.delete("/favorites/3", headers=headers).status_code == 404
+    assert len(client.get("/favorites", headers=headers).json()) == 6
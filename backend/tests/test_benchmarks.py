@@ -0,0 +1,85 @@
+"""Tests for the pure helpers behind the synthetic data and load tools."""
+
+import os, sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from backend.benchmarks import load, synthetic
+
+
+def test_review_counts_are_capped_and_skewed():
+    """Totals stay within budget, no user exceeds the word count."""
+    rng = np.random.default_rng(1)
+    counts = synthetic.review_counts(rng, 200, 300, 20000)
+    assert counts.sum() <= 20000
+    assert counts.max() <= 300
+    # Pareto activity: the busiest tenth of users does most of the reviewing
+    top = np.sort(counts)[-20:].sum()
+    assert top > counts.sum() / 3
+
+
+def test_review_rows_are_consistent_sm2_state():
+    """Each word appears once and next_review follows from the interval."""
+    rng = np.random.default_rng(2)
+    now = datetime(2024, 6, 1, 12)
+    rows = synthetic.review_rows(rng, 7, np.arange(1, 1001), 400, now, idle_days=3)
+    assert len(rows) == 400
+    assert len({r["word_id"] for r in rows}) == 400
+    for r in rows:
+        assert r["user_id"] == 7
+        assert 0 <= r["quality"] <= 5
+        assert 1.3 <= r["ease_factor"] <= 2.8
+        assert 1 <= r["last_interval"] <= 365
+        if r["quality"] < 3:
+            assert r["repetitions"] == 0
+        assert r["reviewed_at"] <= now - timedelta(days=3)
+        assert r["next_review"] == r["reviewed_at"].date() + timedelta(
+            days=r["last_interval"]
+        )
+    # earlier words in the book are reviewed more often
+    chosen = np.array([r["word_id"] for r in rows])
+    assert (chosen <= 500).sum() > (chosen > 500).sum()
+    assert synthetic.review_rows(rng, 7, np.arange(1, 10), 0, now) == []
+
+
+def test_vocabulary_is_unique():
+    entries = synthetic.vocabulary(np.random.default_rng(3), 500)
+    assert len({e["word"] for e in entries}) == 500
+    assert all(len(e["word"]) >= 3 and e["translations"] for e in entries)
+
+
+def test_summarize_and_regressions():
+    """Percentiles are reported in ms and p95 slowdowns are flagged."""
+    samples = {
+        "GET /search": [(i / 1000, 200) for i in range(1, 101)],
+        "POST /review/{id}": [(0.005, 200), (0.010, 500)],
+        "GET /stats/overview": [],
+    }
+    report = load.summarize(samples, 2.0)
+    search = report["GET /search"]
+    assert search["count"] == 100 and search["errors"] == 0
+    assert search["rps"] == 50.0
+    assert search["p50_ms"] == 50.5 and search["max_ms"] == 100.0
+    assert report["POST /review/{id}"]["errors"] == 1
+    assert report["GET /stats/overview"]["count"] == 0
+
+    baseline = {"GET /search": {"p95_ms": 80.0}, "POST /review/{id}": {"p95_ms": 9}}
+    slower = load.regressions(report, baseline, 0.1)
+    assert len(slower) == 1 and slower[0].startswith("GET /search")
+    assert load.regressions(report, baseline, 0.5) == []
+
+
+def test_scratch_journal_keeps_users_json_untouched(tmp_path, monkeypatch):
+    """Users created during a load run go to a throwaway journal."""
+    from backend.app import user_journal
+
+    monkeypatch.chdir(tmp_path)
+    real = user_journal.journal
+    with load.scratch_journal():
+        assert user_journal.journal is not real
+        user_journal.journal.record_create(1, "admin", "admin")
+        assert [u["id"] for u in user_journal.journal.load_users()] == [1]
+    assert user_journal.journal is real
+    assert list(tmp_path.iterdir()) == []
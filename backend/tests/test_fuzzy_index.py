@@ -0,0 +1,86 @@
+"""Tests for the trigram fuzzy matcher used by typo-tolerant search."""
+
+import os, sys
+import random
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from backend.app import fuzzy_index
+
+
+def osa(a, b):
+    """Reference optimal-string-alignment distance."""
+    d = [
+        [i + j if i * j == 0 else 0 for j in range(len(b) + 1)]
+        for i in range(len(a) + 1)
+    ]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(
+                d[i - 1][j] + 1,
+                d[i][j - 1] + 1,
+                d[i - 1][j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+@pytest.fixture
+def empty_index(monkeypatch):
+    """Swap in an empty index so tests do not depend on the word table."""
+    monkeypatch.setattr(fuzzy_index, "_entries", [])
+    monkeypatch.setattr(
+        fuzzy_index, "_codes", np.zeros((0, fuzzy_index.MAX_WORD_LENGTH), np.uint32)
+    )
+    monkeypatch.setattr(fuzzy_index, "_lengths", np.zeros(0, np.int16))
+    monkeypatch.setattr(fuzzy_index, "_sizes", np.zeros(0, np.int16))
+    monkeypatch.setattr(fuzzy_index, "_letters", np.zeros((0, 27), np.int8))
+    monkeypatch.setattr(fuzzy_index, "_postings", {})
+
+
+def test_distances_match_reference():
+    """Vectorised banded distances agree with the reference, capped at bound + 1."""
+    rng = random.Random(0)
+    words = ["".join(rng.choices("abc", k=rng.randint(1, 9))) for _ in range(300)]
+    codes = np.zeros((len(words), fuzzy_index.MAX_WORD_LENGTH), np.uint32)
+    for row, w in enumerate(words):
+        codes[row, : len(w)] = [ord(c) for c in w]
+    lengths = np.array([len(w) for w in words])
+    for key in ("abcab", "cab", "bbbbbbb"):
+        for bound in (1, 2):
+            got = fuzzy_index.distances(key, codes, lengths, bound)
+            assert list(got) == [min(osa(key, w), bound + 1) for w in words]
+
+
+def test_match_finds_every_word_within_bound(empty_index):
+    """Filters never drop a true match: results equal a brute-force scan."""
+    rng = random.Random(1)
+    words = sorted(
+        {"".join(rng.choices("abcde", k=rng.randint(3, 10))) for _ in range(3000)}
+    )
+    fuzzy_index.add_many(enumerate(words))
+    for key in rng.sample(words, 40) + ["abcdeab", "eeeee"]:
+        bound = fuzzy_index.max_distance(key)
+        expected = {
+            i
+            for i, w in enumerate(words)
+            if abs(len(w) - len(key)) <= bound and osa(key, w) <= bound
+        }
+        assert {i for i, _ in fuzzy_index.match(key, len(words))} == expected
+
+
+def test_match_ranks_typos(empty_index):
+    """Transpositions count as one edit and closer words rank first."""
+    fuzzy_index.add_many(
+        [(1, "receive"), (2, "retrieve"), (3, "Believe"), (4, "absorb"), (5, "deceive")]
+    )
+    found = fuzzy_index.match("recieve")
+    assert found[0] == (1, "receive")
+    assert sorted(found[1:]) == [(2, "retrieve"), (3, "Believe"), (5, "deceive")]
+    assert fuzzy_index.match("BELEIVE", limit=1) == [(3, "Believe")]
+    assert fuzzy_index.match("absrob") == [(4, "absorb")]
+    assert fuzzy_index.match("ab") == []
+    assert fuzzy_index.size() == 5
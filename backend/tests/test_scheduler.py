@@ -0,0 +1,96 @@
+"""Tests for the SM-2 scheduler and bulk rescheduling."""
+
+import os, sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from backend.app import crud, scheduler
+from backend.app.database import init_db
+from backend.app.scheduler import SM2Params
+
+init_db()
+
+
+def test_sm2_step_sequence():
+    """Successful reviews follow the 1, 6, I*EF progression; failures reset."""
+    state = (0, 2.5, 0)
+    intervals = []
+    for _ in range(4):
+        state = scheduler.sm2_step(4, *state)
+        intervals.append(state[2])
+    assert intervals == [1, 6, 15, 38]
+    reps, ease, interval = scheduler.sm2_step(1, *state)
+    assert (reps, interval) == (0, 1)
+    assert ease < state[1]
+    assert scheduler.sm2_step(0, 0, 1.3, 1)[1] == 1.3
+
+
+def test_vectorized_intervals_match_scalar_steps():
+    """sm2_intervals reproduces iterated sm2_step for a constant ease."""
+    state = (0, 2.5, 0)
+    expected = []
+    for _ in range(8):
+        state = scheduler.sm2_step(4, *state)
+        expected.append(state[2])
+    got = scheduler.sm2_intervals(list(range(1, 9)), [2.5] * 8).tolist()
+    assert got == expected
+
+
+def test_intervals_are_capped_after_many_perfect_reviews():
+    """A long run of 5s stays at max_interval instead of overflowing dates."""
+    state = (0, 2.5, 0)
+    for _ in range(200):
+        state = scheduler.sm2_step(5, *state)
+    assert state[2] == scheduler.DEFAULT_PARAMS.max_interval
+    datetime.utcnow().date() + timedelta(days=state[2])
+    assert scheduler.sm2_intervals([200, 3], [2.8, 2.5]).tolist() == [36500, 15]
+    small = SM2Params(max_interval=10)
+    assert scheduler.sm2_step(5, 5, 2.5, 8, small)[2] == 10
+
+
+def test_reschedule_rewrites_user_logs():
+    """A parameter change is written back in bulk for the user's logs."""
+    import uuid
+
+    user = crud.create_user("user" + uuid.uuid4().hex[:8], "pwd")
+    reviewed_at = datetime(2030, 1, 1, 12, 0)
+    crud.record_reviews(
+        user.id,
+        [(1, 4, reviewed_at), (1, 4, reviewed_at + timedelta(days=1)), (2, 1, None)],
+    )
+    params = SM2Params(second_interval=3)
+    assert scheduler.reschedule(user.id, params, batch_size=1) == 2
+
+    logs = {log.word_id: log for log in crud.get_review_logs(user.id)}
+    assert logs[1].last_interval == 3
+    assert logs[1].next_review == (reviewed_at + timedelta(days=4)).date()
+    assert logs[2].last_interval == 1
+
+
+def test_legacy_logs_keep_their_progress_on_next_review():
+    """Pre-SM-2 rows (repetitions=0 after the column is added) are not reset."""
+    import uuid
+    from backend.app.database import get_session
+    from backend.app.models import ReviewLog
+
+    user = crud.create_user("user" + uuid.uuid4().hex[:8], "pwd")
+    with get_session() as session:
+        for word_id in (1, 2):
+            session.add(
+                ReviewLog(
+                    user_id=user.id,
+                    word_id=word_id,
+                    quality=4,
+                    last_interval=16,
+                    repetitions=0,
+                    ease_factor=2.5,
+                    next_review=datetime(2030, 1, 1).date(),
+                )
+            )
+        session.commit()
+
+    # doubling scheduler: 16 days means four successes, so 16 * 2.5 = 40 next
+    assert crud.record_review(user.id, 1, 4).last_interval == 40
+    [row] = crud.record_reviews(user.id, [(2, 4, None)])
+    assert (row["repetitions"], row["last_interval"]) == (5, 40)
+    assert scheduler.resume_state(2, 0, 1.3, 16) == (0, 1.3, 16)
@@ -0,0 +1,113 @@
+"""Tests for the append-only users.json journal."""
+
+import json
+import os, sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from backend.app import user_journal
+from backend.app.user_journal import UserJournal
+
+
+def make_journal(tmp_path):
+    return UserJournal(str(tmp_path / "users.json"), str(tmp_path / "users.journal"))
+
+
+def test_replay_create_and_delete(tmp_path):
+    """The reader rebuilds the current list from snapshot plus journal."""
+    j = make_journal(tmp_path)
+    j.record_create(1, "alice", "user")
+    j.record_create(2, "bob", "admin")
+    j.record_delete(1)
+    assert j.load_users() == [{"id": 2, "username": "bob", "role": "admin"}]
+
+
+def test_compaction_is_atomic_and_idempotent(tmp_path):
+    """Compaction writes the snapshot and empties the journal."""
+    j = make_journal(tmp_path)
+    for i in range(5):
+        j.record_create(i, f"u{i}", "user")
+    j.compact()
+    with open(j.snapshot_path, encoding="utf-8") as f:
+        assert [u["id"] for u in json.load(f)] == list(range(5))
+    assert os.path.getsize(j.journal_path) == 0
+
+    # 重放已经压缩过的事件不会产生重复条目
+    j.record_create(4, "u4", "user")
+    assert len(j.load_users()) == 5
+
+
+def test_torn_trailing_line_is_ignored(tmp_path):
+    """A half-written last record does not break the reader."""
+    j = make_journal(tmp_path)
+    j.record_create(1, "alice", "user")
+    with open(j.journal_path, "ab") as f:
+        f.write(b'{"op": "create", "id": 2, "usern')
+    assert [u["id"] for u in j.load_users()] == [1]
+
+
+def test_append_after_torn_line_is_kept(tmp_path):
+    """A record written after a crashed writer's half line is not lost."""
+    j = make_journal(tmp_path)
+    j.record_create(1, "alice", "user")
+    with open(j.journal_path, "ab") as f:
+        f.write(b'{"op": "create", "id": 2')
+    j.record_create(3, "carol", "user")
+    j.record_delete(1)
+    assert [u["id"] for u in j.load_users()] == [3]
+
+
+def test_updates_are_replayed_and_compacted(tmp_path):
+    """Role and username changes reach the rebuilt user list."""
+    j = make_journal(tmp_path)
+    j.record_create(1, "alice", "user")
+    j.record_update(1, role="admin")
+    j.record_update(1, username="alicia")
+    j.record_update(2, role="admin")  # unknown ids are ignored
+    expected = [{"id": 1, "username": "alicia", "role": "admin"}]
+    assert j.load_users() == expected
+    j.compact()
+    assert j.load_users() == expected
+
+
+def test_size_triggered_compaction(tmp_path, monkeypatch):
+    """The journal is folded into the snapshot once it grows large enough."""
+    monkeypatch.setattr(user_journal, "COMPACT_MIN_BYTES", 200)
+    j = make_journal(tmp_path)
+    for i in range(50):
+        j.record_create(i, f"user{i}", "user")
+    assert os.path.exists(j.snapshot_path)
+    assert os.path.getsize(j.journal_path) < 1000
+    assert len(j.load_users()) == 50
+
+
+def _append_many(args):
+    snapshot, journal, start = args
+    j = UserJournal(snapshot, journal)
+    for i in range(start, start + 50):
+        j.record_create(i, f"user{i}", "user")
+
+
+def test_concurrent_writers(tmp_path):
+    """Several processes appending at once lose no records."""
+    snapshot, journal = str(tmp_path / "users.json"), str(tmp_path / "users.journal")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_append_many, [(snapshot, journal, k * 50) for k in range(4)]))
+    users = UserJournal(snapshot, journal).load_users()
+    assert sorted(u["id"] for u in users) == list(range(200))
+
+
+def test_crud_role_and_username_changes_are_journaled(tmp_path, monkeypatch):
+    """set_role and set_username keep the users.json mirror in sync."""
+    import uuid
+    from backend.app import crud
+    from backend.app.database import init_db
+
+    init_db()
+    j = make_journal(tmp_path)
+    monkeypatch.setattr(user_journal, "journal", j)
+    user = crud.create_user("user" + uuid.uuid4().hex[:8], "pwd")
+    crud.set_role(user.id, "admin")
+    renamed = "user" + uuid.uuid4().hex[:8]
+    crud.set_username(user.id, renamed)
+    assert j.load_users() == [{"id": user.id, "username": renamed, "role": "admin"}]
@@ -0,0 +1,178 @@
+"""Tests for the streaming JSON parser and incremental wordbook sync."""
+
+import io
+import json
+import os, sys
+import uuid
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from backend.app import crud, fuzzy_index, jsonstream, search_index
+from backend.app.database import init_db
+
+init_db()
+
+
+def test_iter_array_across_chunk_boundaries():
+    """Items split across tiny chunks are reassembled in order."""
+    data = [{"word": "a", "n": 12345}, [1, 2], "x,]", 3.5, None]
+    text = json.dumps(data, indent=2)
+    assert list(jsonstream.iter_array(io.StringIO(text), chunk_size=3)) == data
+    assert list(jsonstream.iter_array(io.StringIO(" [ ] "))) == []
+
+
+@pytest.mark.parametrize("text", ["{}", "[1,]", "[1 2]", "[1,", '[{"a": 1'])
+def test_iter_array_rejects_malformed_input(text):
+    """Anything that is not a complete JSON array raises ValueError."""
+    with pytest.raises(ValueError):
+        list(jsonstream.iter_array(io.StringIO(text), chunk_size=2))
+
+
+def write_book(directory, words):
+    path = directory / f"wordBook_{uuid.uuid4().hex[:8]}.json"
+    path.write_text(
+        json.dumps([{"word": w, "translations": [], "phrases": []} for w in words]),
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_sync_skips_unchanged_books(tmp_path, monkeypatch):
+    """New words are inserted once; untouched or merely touched books are skipped."""
+    prefix = "sync" + uuid.uuid4().hex[:8]
+    words = [f"{prefix}a", f"{prefix}b", f"{prefix.upper()}A"]
+    path = write_book(tmp_path, words)
+    before = crud.count_words()
+    crud.sync_wordbooks(str(tmp_path))
+    assert crud.count_words() == before + 2
+    assert [w for _, w in search_index.suggest(prefix)] == words[:2]
+    assert fuzzy_index.match(prefix + "ax", 1) == search_index.suggest(prefix, 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged book was parsed")
+
+    monkeypatch.setattr(crud, "_import_wordbook", fail)
+    crud.sync_wordbooks(str(tmp_path))
+    # 只改 mtime、不改内容时只重新计算哈希
+    os.utime(path, ns=(0, 1_000_000_000))
+    crud.sync_wordbooks(str(tmp_path))
+    assert crud.count_words() == before + 2
+
+
+def test_sync_retries_broken_book(tmp_path):
+    """A book that fails to parse is rolled back and retried next time."""
+    word = "broken" + uuid.uuid4().hex[:8]
+    path = tmp_path / "wordBook_broken.json"
+    path.write_text(f'[{{"word": "{word}", "translations": []}}, ', encoding="utf-8")
+    before = crud.count_words()
+    crud.sync_wordbooks(str(tmp_path))
+    assert crud.count_words() == before
+    path.write_text(f'[{{"word": "{word}", "translations": []}}]', encoding="utf-8")
+    crud.sync_wordbooks(str(tmp_path))
+    assert crud.count_words() == before + 1
+
+
+def test_sync_indexes_translations_for_full_text_search(tmp_path):
+    """Synced words are searchable by translation and phrase text, not JSON keys."""
+    token = uuid.uuid4().hex[:8]
+    path = tmp_path / "wordBook_fts.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "word": f"ftsa{token}",
+                    "translations": [{"translation": f"甲{token}", "type": "n"}],
+                    "phrases": [{"phrase": f"in {token}", "translation": "乙"}],
+                },
+                {
+                    "word": f"ftsb{token}",
+                    "translations": [{"translation": f"{token}丙", "type": "v"}],
+                },
+            ],
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    crud.sync_wordbooks(str(tmp_path))
+    found = [w.word for w in crud.search_words(token)]
+    assert sorted(found) == [f"ftsa{token}", f"ftsb{token}"]
+    assert [w.word for w in crud.search_words(f"in {token}")] == [f"ftsa{token}"]
+    assert [w.word for w in crud.search_words(f"ftsb{token}")] == [f"ftsb{token}"]
+    assert [w.word for w in crud.search_words(token, limit=1, offset=1)] == found[1:]
+    assert crud.search_words(f'"type": "n{token}') == []
+
+
+def test_init_db_merges_words_differing_only_in_case(tmp_path, monkeypatch):
+    """Old databases with 'Apple' and 'apple' upgrade instead of failing."""
+    from datetime import date, datetime
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+    from sqlmodel import SQLModel, create_engine
+    from backend.app import database
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "fulltext_enabled", database.fulltext_enabled)
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX {database.WORD_CASE_INDEX}"))
+        for word_id, word in ((1, "Apple"), (2, "apple"), (3, "pear")):
+            conn.execute(
+                text("INSERT INTO word (id, word, translations) VALUES (:i, :w, '[]')"),
+                {"i": word_id, "w": word},
+            )
+        conn.execute(
+            text(
+                "INSERT INTO user (id, username, hashed_password, role) VALUES "
+                "(1, 'a', 'x', 'user'), (2, 'b', 'x', 'user')"
+            )
+        )
+        reviews = [
+            # user 1 reviewed both spellings; the later review of 'apple' wins
+            (1, 1, 3, datetime(2024, 1, 1)),
+            (1, 2, 5, datetime(2024, 2, 1)),
+            (2, 2, 4, datetime(2024, 1, 1)),
+        ]
+        for user_id, word_id, quality, reviewed_at in reviews:
+            conn.execute(
+                text(
+                    "INSERT INTO reviewlog (user_id, word_id, quality, last_interval,"
+                    " repetitions, ease_factor, next_review, reviewed_at) VALUES "
+                    "(:u, :w, :q, 1, 1, 2.5, :n, :r)"
+                ),
+                {
+                    "u": user_id,
+                    "w": word_id,
+                    "q": quality,
+                    "n": date(2024, 3, 1),
+                    "r": reviewed_at,
+                },
+            )
+        for user_id, word_id in ((1, 1), (1, 2), (2, 2)):
+            conn.execute(
+                text(
+                    "INSERT INTO favorite (user_id, word_id, added_at) "
+                    "VALUES (:u, :w, :a)"
+                ),
+                {"u": user_id, "w": word_id, "a": datetime(2024, 1, 1)},
+            )
+
+    database.init_db()
+
+    with engine.connect() as conn:
+        words = conn.execute(text("SELECT id, word FROM word ORDER BY id")).all()
+        reviews = conn.execute(
+            text("SELECT user_id, word_id, quality FROM reviewlog ORDER BY user_id")
+        ).all()
+        favorites = conn.execute(
+            text("SELECT user_id, word_id FROM favorite ORDER BY user_id")
+        ).all()
+    assert [tuple(w) for w in words] == [(1, "Apple"), (3, "pear")]
+    assert [tuple(r) for r in reviews] == [(1, 1, 5), (2, 1, 4)]
+    assert [tuple(f) for f in favorites] == [(1, 1), (2, 1)]
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO word (word, translations) VALUES ('PEAR', '[]')")
+            )
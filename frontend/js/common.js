@@ -11,8 +11,8 @@ function escapeHTML(str) {
     .replace(/'/g, '&#39;');
 }
 
-// 通用的后端 API 调用封装，会带上存储的令牌。
-function api(path, options = {}) {
+// 为请求加上存储的令牌，并把普通对象请求体编码为 JSON。
+function prepareRequest(options) {
   options.headers = options.headers || {};
   const token = localStorage.getItem('token');
   if (token) options.headers['Authorization'] = 'Bearer ' + token;
@@ -20,13 +20,49 @@ function api(path, options = {}) {
     options.headers['Content-Type'] = 'application/json';
     options.body = JSON.stringify(options.body);
   }
-  return fetch(API_URL + path, options).then(async (res) => {
+  return options;
+}
+
+// 通用的后端 API 调用封装，会带上存储的令牌。
+function api(path, options = {}) {
+  return fetch(API_URL + path, prepareRequest(options)).then(async (res) => {
     if (!res.ok) throw new Error(await res.text());
     const ct = res.headers.get('content-type');
     return ct && ct.includes('application/json') ? res.json() : res.text();
   });
 }
 
+// 以 SSE 方式调用流式接口：每收到一段文本调用 onDelta，返回最终完整结果。
+// 通过 options.signal 中止时，后端会随之断开与 LLM 的连接。
+async function apiStream(path, options = {}, onDelta = () => {}) {
+  const res = await fetch(API_URL + path, prepareRequest(options));
+  if (!res.ok) throw new Error(await res.text());
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let end;
+    while ((end = buf.indexOf('\n\n')) >= 0) {
+      const block = buf.slice(0, end);
+      buf = buf.slice(end + 2);
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      const payload = JSON.parse(data);
+      if (event === 'done') return payload.result;
+      if (event === 'error') throw new Error(JSON.stringify(payload));
+      onDelta(payload.delta);
+    }
+  }
+  throw new Error(JSON.stringify({ detail: '连接中断' }));
+}
+
 // 登录/注册界面使用的密码格式校验。
 function validatePassword(pwd) {
   return /^[A-Za-z0-9]{6,}$/.test(pwd)
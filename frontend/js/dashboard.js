@@ -531,37 +531,40 @@ async function showFavorites() {
     const modal = document.getElementById('modal');
     const content = document.getElementById('articleContent');
     const loading = document.getElementById('articleLoading');
+    const controller = new AbortController();
+    document.getElementById('closeModal').onclick = () => {
+      modal.classList.add('hidden');
+      controller.abort();
+    };
     btn.disabled = true;
     content.innerHTML = '';
     modal.classList.remove('hidden');
     loading.classList.remove('hidden');
     try {
-      const res = await api('/generate_article', { method: 'POST', body: { word_ids: ids } });
-      let text = res.result;
+      // 边生成边显示，收到完整结果后再高亮单词并渲染 Markdown
+      let cursor = null;
+      let text = await apiStream(
+        '/generate_article?stream=true',
+        { method: 'POST', body: { word_ids: ids }, signal: controller.signal },
+        delta => {
+          if (!cursor) {
+            loading.classList.add('hidden');
+            content.innerHTML = '<span class="cursor typing-dot">●</span>';
+            cursor = content.querySelector('.cursor');
+          }
+          content.insertBefore(document.createTextNode(delta), cursor);
+          content.scrollTop = content.scrollHeight;
+        }
+      );
       const selected = ids.map(id => data.find(w => w.id === id).word);
       selected.forEach(w => {
         const reg = new RegExp('\\b' + w.replace(/[-/\\^$*+?.()|[\]{}]/g, '\\$&') + '\\b', 'gi');
         text = text.replace(reg, m => `**${m}**`);
       });
       loading.classList.add('hidden');
-      content.innerHTML = '<span class="cursor typing-dot">●</span>';
-      const cursor = content.querySelector('.cursor');
-      let idx = 0;
-      const timer = setInterval(() => {
-        if (idx >= text.length) {
-          clearInterval(timer);
-          cursor.remove();
-          content.innerHTML = marked.parse(text);
-          return;
-        }
-        content.insertBefore(document.createTextNode(text[idx++]), cursor);
-        content.scrollTop = content.scrollHeight;
-      }, 30);
-      document.getElementById('closeModal').onclick = () => {
-        modal.classList.add('hidden');
-        clearInterval(timer);
-      };
+      content.innerHTML = marked.parse(text);
     } catch (err) {
+      if (err.name === 'AbortError') return;
       console.error(err);
       loading.classList.add('hidden');
       modal.classList.add('hidden');